@@ -1,12 +1,19 @@
 import random
+import atexit
+import bisect
 import json
+import base64
+import time
+from collections import defaultdict
 from datetime import datetime, date, timedelta, time as dt_time
 from flask import Flask, request, jsonify, current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit, join_room, leave_room
-from sqlalchemy import desc, or_, and_, func, text
+from flask_socketio import emit, join_room, leave_room
+from sqlalchemy import desc, or_, and_, func, text, event, tuple_
+from sqlalchemy.orm import Session, object_session
 import pandas as pd
+import numpy as np
 import os
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -25,6 +32,25 @@ except ImportError as e:
     print(f"⚠️ 그룹 매칭 모듈을 불러올 수 없습니다: {e}")
     GROUP_MATCHING_AVAILABLE = False
 
+# 추천 그룹 계산 엔진 및 저장소
+from recommendation_store import create_recommendation_store
+from realtime import create_socketio, message_queue_redis, socketio_channel
+from utils.availability_index import AvailabilityIndex, find_common_dates
+from utils.recurrence import iter_occurrences
+from utils.spatial_index import SpatialIndex, METERS_PER_LAT_DEGREE, radius_bounds
+from utils.search_index import RestaurantSearchIndex
+from utils.restaurant_scoring import RestaurantFeatures, TasteProfile, RecommendationScores
+from utils.chat_writer import SharedMessageIdSequence, ChatMessageWriter
+from utils.read_receipts import ReadReceiptAggregator
+from utils.recommendation_engine import (
+    CompatibilityMatrix,
+    ActivityCounter,
+    RecommendationEnrichment,
+    RecommendationContext,
+    pattern_scores,
+    snapshot_users
+)
+
 # 환경변수 로드
 from config.env_loader import load_environment_variables
 load_environment_variables()
@@ -116,7 +142,8 @@ if AUTH_AVAILABLE:
 else:
     print("ℹ️ 인증 시스템 초기화를 건너뜁니다.")
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Socket.IO 서버 (SOCKETIO_MESSAGE_QUEUE 설정 시 여러 워커/서버가 방 브로드캐스트 공유)
+socketio = create_socketio(app)
 
 # Root route to handle base URL requests
 @app.route('/')
@@ -165,9 +192,29 @@ def internal_error(error):
 def handle_exception(e):
     return jsonify({'error': 'Unexpected error', 'message': str(e)}), 500
 
-# 추천 그룹 캐시 (사용자별, 날짜별)
-RECOMMENDATION_CACHE = {}
-CACHE_GENERATION_DATE = None
+# 추천 그룹 캐시 (사용자별, 날짜별) - 워커 간 공유 저장소 + 프로세스 내 LRU
+RECOMMENDATION_STORE = create_recommendation_store()
+RECOMMENDATION_CONTEXT = None  # 증분 갱신용 계산 상태
+
+# 사용자별 파티 참여 횟수 (PartyMember 변경 시 증분 갱신)
+PARTY_ACTIVITY_COUNTER = ActivityCounter()
+
+# 날짜별 바쁜 사용자 인덱스 (파티/개인 일정 변경이 커밋되면 해당 날짜만 다시 로드, 다른 워커의 변경은 1분 후 반영)
+AVAILABILITY_INDEX = AvailabilityIndex(ttl_seconds=60)
+
+# 식당 좌표 공간 인덱스 (식당 추가/삭제/이동이 커밋되면 다음 조회에서 다시 로드, 다른 워커의 변경은 5분 후 반영)
+RESTAURANT_SPATIAL_INDEX = SpatialIndex(ttl_seconds=300)
+
+# 식당 이름/카테고리 검색 인덱스 (식당 변경이 커밋되면 해당 식당만 갱신, 다른 워커의 변경은 5분 후 반영)
+RESTAURANT_SEARCH_INDEX = RestaurantSearchIndex(ttl_seconds=300)
+
+# 개인화 추천용 식당 특성 배열 (식당 변경 시 또는 5분 후 다시 로드)
+RESTAURANT_FEATURES = RestaurantFeatures(ttl_seconds=300)
+
+# 사용자 닉네임 캐시 {employee_id: (닉네임, 조회 시각)} (채팅 전송 시 User 조회 대신 사용)
+# 이 워커의 사용자 변경은 바로 제거, 다른 워커의 변경은 TTL이 지나면 반영
+USER_NICKNAMES = {}
+USER_NICKNAME_TTL = float(os.getenv('USER_NICKNAME_TTL', '60'))
 
 # --- 유틸리티 함수 ---
 def get_seoul_today():
@@ -176,126 +223,211 @@ def get_seoul_today():
     return korean_time.date()
 
 def generate_recommendation_cache():
-    """최적화된 추천 그룹 캐시 생성 - O(N log N) 성능"""
-    global RECOMMENDATION_CACHE, CACHE_GENERATION_DATE
+    """최적화된 추천 그룹 캐시 생성 - O(N log N) 성능 (빌더 워커 한 곳에서만 실행)"""
+    global RECOMMENDATION_CONTEXT
     
     today = get_seoul_today()
     current_date_str = today.strftime('%Y-%m-%d')
     
-    # 이미 오늘 생성된 캐시가 있으면 재사용
-    if CACHE_GENERATION_DATE == current_date_str and RECOMMENDATION_CACHE:
+    # 이미 오늘 생성된 캐시가 있으면 재사용 (다른 워커가 생성한 것 포함)
+    if RECOMMENDATION_STORE.generation == current_date_str:
         print(f"DEBUG: Using existing cache for {current_date_str}")
         return
     
-    print(f"DEBUG: Generating optimized recommendation cache for 1 month starting from {current_date_str}")
-    RECOMMENDATION_CACHE = {}
-    CACHE_GENERATION_DATE = current_date_str
-    
-    # 모든 사용자 조회 (한 번만) - 배치 처리로 최적화
-    all_users = db.session.query(User).all()
-    user_count = len(all_users)
-    
-    if user_count == 0:
-        print("DEBUG: No users found")
+    # 다른 워커가 생성 중이면 공유 저장소에 기록될 때까지 읽기만 함
+    if not RECOMMENDATION_STORE.try_acquire_build_lock():
+        print("DEBUG: Recommendation cache is being generated by another worker")
         return
     
-    # 사용자별 호환성 점수를 미리 계산하여 캐시
-    compatibility_cache = {}
-    
-    # 효율적인 호환성 점수 계산 (O(N log N))
-    # 병렬 처리를 위한 배치 크기 설정
-    batch_size = 100
-    for i in range(0, user_count, batch_size):
-        batch_users = all_users[i:i + batch_size]
-        for user in batch_users:
-            compatibility_cache[user.employee_id] = {}
-            for other_user in all_users:
-                if user.employee_id != other_user.employee_id:
-                    # 호환성 점수 계산 (캐시된 결과 사용)
-                    score = calculate_compatibility_score_cached(user, other_user)
-                    compatibility_cache[user.employee_id][other_user.employee_id] = score
-    
-    # 1달간 (30일) 각 날짜에 대해 추천 그룹 생성
-    for day_offset in range(30):
-        target_date = today + timedelta(days=day_offset)
-        target_date_str = target_date.strftime('%Y-%m-%d')
-        
-        # 주말 제외
-        if target_date.weekday() >= 5:
-            continue
-            
-        print(f"DEBUG: Generating recommendations for {target_date_str}")
-        
-        # 해당 날짜에 사용 가능한 사용자들을 한 번에 조회 (최적화)
-        available_user_ids = get_available_users_for_date(target_date_str)
+    try:
+        print(f"DEBUG: Generating optimized recommendation cache for 1 month starting from {current_date_str}")
         
-        if not available_user_ids:
-            print(f"DEBUG: No available users for {target_date_str}")
-            continue
+        context = build_recommendation_context(today)
+        RECOMMENDATION_CONTEXT = context
+        entries = {}
         
-        # 각 사용자에 대해 추천 그룹 생성
-        for user in all_users:
-            employee_id = user.employee_id
-            
-            # 해당 사용자가 해당 날짜에 사용 가능한지 확인
-            if employee_id not in available_user_ids:
-                continue
-            
-            # 사용 가능한 다른 사용자들만 필터링
-            available_users = [u for u in all_users if u.employee_id in available_user_ids and u.employee_id != employee_id]
-            
-            if len(available_users) < 1:
-                continue
-            
-            # 미리 계산된 호환성 점수 사용
-            scored_users = []
-            for available_user in available_users:
-                compatibility_score = compatibility_cache[employee_id].get(available_user.employee_id, 0)
-                pattern_score = calculate_pattern_score_cached(user, available_user)
-                # 랜덤 점수 추가 (0~50 범위로 줄임)
-                random_score = random.uniform(0, 50)
-                total_score = compatibility_score + pattern_score + random_score
-                scored_users.append((available_user, total_score))
-            
-            # 점수로 정렬 (높은 점수 순)
-            scored_users.sort(key=lambda x: x[1], reverse=True)
+        if context is None:
+            print("DEBUG: No users found")
+        else:
+            party_activity = PARTY_ACTIVITY_COUNTER.vector(context.matrix.employee_ids)
             
-            # 효율적인 그룹 생성 (최대 10개)
-            recommendations = generate_efficient_groups(scored_users, target_date_str, employee_id)
+            # 1달간 가용성 인덱스를 한 번에 로드 (전체 사용자 목록도 새로 고침)
+            window_dates = [(today + timedelta(days=day_offset)).strftime('%Y-%m-%d') for day_offset in range(30)]
+            AVAILABILITY_INDEX.discard_before(current_date_str)
+            AVAILABILITY_INDEX.set_user_ids(user.employee_id for user in context.users)
+            load_availability_index(window_dates)
             
-            # 캐시에 저장
-            cache_key = f"{employee_id}_{target_date_str}"
-            RECOMMENDATION_CACHE[cache_key] = recommendations
-            print(f"DEBUG: Created {len(recommendations)} recommendations for {cache_key}")
+            # 1달간 (30일) 각 날짜에 대해 추천 그룹 생성
+            for day_offset in range(30):
+                target_date = today + timedelta(days=day_offset)
+                target_date_str = target_date.strftime('%Y-%m-%d')
+                
+                # 주말 제외
+                if target_date.weekday() >= 5:
+                    continue
+                    
+                print(f"DEBUG: Generating recommendations for {target_date_str}")
+                
+                # 해당 날짜에 사용 가능한 사용자들을 한 번에 조회 (최적화)
+                available_user_ids = get_available_users_for_date(target_date_str)
+                
+                if not available_user_ids:
+                    print(f"DEBUG: No available users for {target_date_str}")
+                    continue
+                
+                # 사용 가능한 사용자들의 행 인덱스 (원래 사용자 순서 유지)
+                available_indices = context.matrix.indices_of(available_user_ids)
+                
+                # 각 사용자에 대해 추천 그룹 생성
+                for i in available_indices:
+                    recommendations = build_user_recommendations(context, i, available_indices, party_activity, target_date_str)
+                    if recommendations is None:
+                        continue
+                    
+                    cache_key = f"{context.users[i].employee_id}_{target_date_str}"
+                    entries[cache_key] = recommendations
+                    print(f"DEBUG: Created {len(recommendations)} recommendations for {cache_key}")
+        
+        # 공유 저장소에 한 번에 기록 (모든 워커가 읽음)
+        RECOMMENDATION_STORE.replace_all(entries, current_date_str)
+        print(f"DEBUG: Cache generation completed. Total cache entries: {len(entries)}")
+    finally:
+        RECOMMENDATION_STORE.release_build_lock()
+
+def build_recommendation_context(start_date):
+    """추천 계산 상태(사용자 스냅샷, 호환성 행렬, 멤버 정보) 생성 (사용자가 없으면 None)"""
+    # 모든 사용자 조회 (한 번만) - 세션과 분리된 스냅샷으로 보관
+    all_users = snapshot_users(db.session.query(User).all())
+    if not all_users:
+        return None
+    
+    # 사용자별 파티 참여 횟수 벡터 (전체 생성마다 GROUP BY 한 번으로 다시 로드해 다른 워커의 커밋도 반영,
+    # 생성 사이에는 이 워커의 커밋만 증분 반영)
+    load_party_activity_counts()
     
-    print(f"DEBUG: Cache generation completed. Total cache entries: {len(RECOMMENDATION_CACHE)}")
+    # 사용자 간 호환성 점수 행렬(NumPy 브로드캐스팅)과 그룹 멤버 정보를 한 번에 준비
+    return RecommendationContext(
+        all_users,
+        CompatibilityMatrix.from_users(all_users),
+        load_recommendation_enrichment(),
+        start_date
+    )
 
-def get_available_users_for_date(date_str):
-    """특정 날짜에 사용 가능한 사용자 ID 목록을 효율적으로 조회"""
-    # 파티에 참여 중인 사용자들
-    party_user_ids = set()
-    parties = db.session.query(Party).filter_by(party_date=date_str).all()
-    for party in parties:
-        party_user_ids.add(party.host_employee_id)
-        party_members = PartyMember.query.filter_by(party_id=party.id).all()
-        for member in party_members:
-            party_user_ids.add(member.employee_id)
+def get_recommendation_context():
+    """공유 캐시 세대에 맞는 계산 상태 반환 (캐시를 생성하지 않은 워커는 필요할 때 생성)"""
+    global RECOMMENDATION_CONTEXT
     
-    # 개인 일정이 있는 사용자들
-    schedule_user_ids = set()
-    schedules = db.session.query(PersonalSchedule).filter_by(schedule_date=date_str).all()
-    for schedule in schedules:
-        schedule_user_ids.add(schedule.employee_id)
+    generation = RECOMMENDATION_STORE.generation
+    if not generation:
+        return None
+    
+    start_date = datetime.strptime(generation, '%Y-%m-%d').date()
+    if RECOMMENDATION_CONTEXT is None or RECOMMENDATION_CONTEXT.start_date != start_date:
+        RECOMMENDATION_CONTEXT = build_recommendation_context(start_date)
+    return RECOMMENDATION_CONTEXT
+
+def build_user_recommendations(context, user_index, available_indices, party_activity, target_date_str):
+    """한 사용자의 특정 날짜 추천 그룹 계산 (후보가 없으면 None)"""
+    # 사용 가능한 다른 사용자들만 필터링
+    candidate_indices = available_indices[available_indices != user_index]
+    
+    if len(candidate_indices) < 1:
+        return None
+    
+    # 호환성 점수 + 패턴 점수 + 랜덤 점수(0~50)를 배열 연산으로 계산
+    total_scores = (context.matrix.scores[user_index, candidate_indices]
+                    + pattern_scores(party_activity, user_index, candidate_indices)
+                    + np.random.uniform(0, 50, len(candidate_indices)))
+    
+    # 점수로 정렬 (높은 점수 순)
+    order = np.argsort(-total_scores, kind='stable')
+    scored_users = [(context.users[candidate_indices[k]], float(total_scores[k])) for k in order]
+    
+    # 효율적인 그룹 생성 (최대 10개)
+    return generate_efficient_groups(scored_users, target_date_str, context.users[user_index].employee_id, context.enrichment)
+
+def emit_availability_delta(employee_ids, *date_strs):
+    """파티/개인 일정 변경으로 가용성이 바뀐 (사용자, 날짜)를 추천 캐시에 반영"""
+    employee_ids = {employee_id for employee_id in employee_ids if employee_id}
+    if not employee_ids:
+        return
     
-    # 모든 사용자 ID
-    all_user_ids = {user.employee_id for user in db.session.query(User).all()}
+    for date_str in set(date_strs):
+        # 커밋 이후 값으로 다시 로드되도록 가용성 인덱스 무효화
+        AVAILABILITY_INDEX.invalidate(date_str)
+        try:
+            apply_availability_delta(employee_ids, date_str)
+        except Exception as e:
+            # 캐시 갱신 실패가 원래 요청을 실패시키지 않도록 함 (다음 전체 생성 시 복구)
+            print(f"Error applying availability delta for {date_str}: {e}")
+
+def apply_availability_delta(employee_ids, date_str):
+    """영향받는 (사용자, 날짜) 캐시 키만 재계산"""
+    context = get_recommendation_context()
+    if context is None or not context.covers(date_str):
+        return
     
-    # 사용 가능한 사용자 ID = 전체 - (파티 참여자 + 개인 일정자)
-    available_user_ids = all_user_ids - party_user_ids - schedule_user_ids
+    available_user_ids = get_available_users_for_date(date_str)
+    busy_user_ids = employee_ids - available_user_ids
+    
+    # 변경된 사용자 본인 + 바빠진 사용자가 추천 그룹에 포함된 다른 사용자들
+    affected_ids = set(employee_ids)
+    if busy_user_ids:
+        cached = RECOMMENDATION_STORE.get_many(f"{employee_id}_{date_str}" for employee_id in available_user_ids - employee_ids)
+        for cache_key, recommendations in cached.items():
+            if any(member['employee_id'] in busy_user_ids
+                   for recommendation in recommendations
+                   for member in recommendation['recommended_group']):
+                affected_ids.add(cache_key.rsplit('_', 1)[0])
+    
+    available_indices = context.matrix.indices_of(available_user_ids)
+    party_activity = PARTY_ACTIVITY_COUNTER.vector(context.matrix.employee_ids)
+    
+    for employee_id in affected_ids:
+        cache_key = f"{employee_id}_{date_str}"
+        user_index = context.matrix.index.get(employee_id)
+        recommendations = None
+        if user_index is not None and employee_id in available_user_ids:
+            recommendations = build_user_recommendations(context, user_index, available_indices, party_activity, date_str)
+        
+        if recommendations is None:
+            RECOMMENDATION_STORE.delete(cache_key)
+        else:
+            RECOMMENDATION_STORE.set(cache_key, recommendations)
     
+    print(f"DEBUG: Recomputed {len(affected_ids)} recommendation cache entries for {date_str}")
+
+def get_available_users_for_date(date_str):
+    """특정 날짜에 사용 가능한 사용자 ID 목록을 가용성 인덱스에서 조회"""
+    available_user_ids = AVAILABILITY_INDEX.available_on(date_str)
+    if available_user_ids is None:
+        load_availability_index([date_str])
+        available_user_ids = AVAILABILITY_INDEX.available_on(date_str)
     return available_user_ids
 
-def generate_efficient_groups(scored_users, target_date_str, requester_id):
+def load_availability_index(dates):
+    """날짜 목록의 바쁜 사용자 집합을 범위 쿼리 두 번으로 로드"""
+    dates = list(dates)
+    if not dates:
+        return
+    start_date, end_date = min(dates), max(dates)
+    
+    if not AVAILABILITY_INDEX.user_ids:
+        AVAILABILITY_INDEX.set_user_ids(employee_id for (employee_id,) in db.session.query(User.employee_id))
+    
+    # 파티 호스트와 멤버 (멤버가 없는 파티도 호스트는 포함되도록 outer join)
+    party_rows = db.session.query(Party.party_date, Party.host_employee_id, PartyMember.employee_id).outerjoin(
+        PartyMember, Party.id == PartyMember.party_id
+    ).filter(Party.party_date >= start_date, Party.party_date <= end_date).all()
+    
+    # 개인 일정이 있는 사용자들
+    schedule_rows = db.session.query(PersonalSchedule.schedule_date, PersonalSchedule.employee_id).filter(
+        PersonalSchedule.schedule_date >= start_date, PersonalSchedule.schedule_date <= end_date
+    ).all()
+    
+    AVAILABILITY_INDEX.load(dates, party_rows, schedule_rows)
+
+def generate_efficient_groups(scored_users, target_date_str, requester_id, enrichment):
     """효율적인 그룹 생성 (최대 10개)"""
     recommendations = []
     
@@ -306,7 +438,7 @@ def generate_efficient_groups(scored_users, target_date_str, requester_id):
                 if len(recommendations) >= 6:
                     break
                 group = [scored_users[i][0], scored_users[j][0], scored_users[k][0]]
-                recommendation = create_recommendation(group, target_date_str, requester_id)
+                recommendation = create_recommendation(group, target_date_str, requester_id, enrichment)
                 recommendations.append(recommendation)
             if len(recommendations) >= 6:
                 break
@@ -320,7 +452,7 @@ def generate_efficient_groups(scored_users, target_date_str, requester_id):
                 if len(recommendations) >= 9:
                     break
                 group = [scored_users[i][0], scored_users[j][0]]
-                recommendation = create_recommendation(group, target_date_str, requester_id)
+                recommendation = create_recommendation(group, target_date_str, requester_id, enrichment)
                 recommendations.append(recommendation)
             if len(recommendations) >= 9:
                 break
@@ -328,22 +460,22 @@ def generate_efficient_groups(scored_users, target_date_str, requester_id):
     # 1명 그룹 생성 (최대 1개)
     if len(recommendations) < 10 and len(scored_users) >= 1:
         group = [scored_users[0][0]]
-        recommendation = create_recommendation(group, target_date_str, requester_id)
+        recommendation = create_recommendation(group, target_date_str, requester_id, enrichment)
         recommendations.append(recommendation)
     
     return recommendations[:10]
 
-def create_recommendation(group, target_date_str, requester_id):
-    """추천 그룹 객체 생성"""
+def create_recommendation(group, target_date_str, requester_id, enrichment):
+    """추천 그룹 객체 생성 (일괄 조회된 enrichment에서 딕셔너리 조회만 수행)"""
     return {
         'proposed_date': target_date_str,
         'recommended_group': [
             {
                 'employee_id': member.employee_id,
                 'nickname': member.nickname or '익명',
-                'lunch_preference': get_user_preference(member.employee_id, 'lunch_preference'),
+                'lunch_preference': enrichment.preference(member.employee_id),
                 'main_dish_genre': member.main_dish_genre or '',
-                'last_dining_together': get_last_dining_together(requester_id, member.employee_id)
+                'last_dining_together': describe_last_dining(enrichment.last_dining_date(requester_id, member.employee_id))
             }
             for member in group
         ]
@@ -357,67 +489,51 @@ def get_user_preference(user_id, preference_type):
     ).first()
     return preference.preference_value if preference else ''
 
-def calculate_compatibility_score_cached(user1, user2):
-    """캐시된 호환성 점수 계산"""
-    # 간단한 호환성 점수 (실제로는 더 복잡한 로직 구현)
-    score = 0
-    
-    # 메인 요리 장르 일치
-    if user1.main_dish_genre and user2.main_dish_genre:
-        if user1.main_dish_genre == user2.main_dish_genre:
-            score += 30
-    
-    # 나이대 일치
-    if user1.age_group and user2.age_group:
-        if user1.age_group == user2.age_group:
-            score += 20
-    
-    # 성별 다양성 (같은 성별이면 점수 감소)
-    if user1.gender and user2.gender:
-        if user1.gender != user2.gender:
-            score += 15
-    
-    return score
+def load_party_activity_counts():
+    """사용자별 파티 참여 횟수를 GROUP BY 한 번으로 로드"""
+    rows = db.session.query(PartyMember.employee_id, func.count(PartyMember.id)).group_by(PartyMember.employee_id).all()
+    PARTY_ACTIVITY_COUNTER.load(rows)
 
-def calculate_pattern_score_cached(user1, user2):
-    """캐시된 패턴 점수 계산"""
-    # 간단한 패턴 점수 (실제로는 더 복잡한 로직 구현)
-    score = 0
+def load_recommendation_enrichment():
+    """추천 그룹 멤버 정보(점심 성향, 마지막 식사 날짜)를 일괄 조회"""
+    preference_rows = db.session.query(UserPreference.user_id, UserPreference.preference_value).filter_by(
+        preference_type='lunch_preference'
+    ).order_by(UserPreference.id).all()
     
-    # 파티 참여 패턴
-    user1_parties = PartyMember.query.filter_by(employee_id=user1.employee_id).count()
-    user2_parties = PartyMember.query.filter_by(employee_id=user2.employee_id).count()
+    # Party/PartyMember 한 번의 스캔으로 모든 (호스트, 멤버) 쌍의 식사 날짜 조회
+    dining_rows = db.session.query(Party.host_employee_id, PartyMember.employee_id, Party.party_date).join(
+        PartyMember, Party.id == PartyMember.party_id
+    ).filter(Party.party_date < get_seoul_today().strftime('%Y-%m-%d')).all()
     
-    # 비슷한 활동 수준
-    activity_diff = abs(user1_parties - user2_parties)
-    if activity_diff <= 2:
-        score += 20
-    elif activity_diff <= 5:
-        score += 10
-    
-    return score
+    return RecommendationEnrichment(preference_rows, dining_rows)
 
-def get_last_dining_together(user1_id, user2_id):
-    """두 사용자가 마지막으로 함께 식사한 날짜를 반환"""
+def describe_last_dining(last_party_date):
+    """마지막으로 함께 식사한 날짜를 '3일 전' 형태의 문구로 변환"""
+    if not last_party_date:
+        return "처음 만나는 동료"
+    
     try:
-        # 두 사용자가 모두 참여한 파티 중 가장 최근 것을 찾기
-        # PartyMember 테이블을 사용하여 정규화된 방식으로 조회
-        last_party = Party.query.join(PartyMember, Party.id == PartyMember.party_id).filter(
-            and_(
-                or_(
-                    and_(Party.host_employee_id == user1_id, PartyMember.employee_id == user2_id),
-                    and_(Party.host_employee_id == user2_id, PartyMember.employee_id == user1_id)
-                ),
-                Party.party_date < get_seoul_today().strftime('%Y-%m-%d')
-            )
-        ).order_by(desc(Party.party_date)).first()
-        
-        if last_party:
-            return last_party.party_date
-        return None
-    except Exception as e:
-        print(f"Error getting last dining together: {e}")
-        return None
+        party_date = datetime.strptime(last_party_date, '%Y-%m-%d').date()
+    except ValueError:
+        return "알 수 없음"
+    today = get_seoul_today()
+    days_diff = (today - party_date).days
+    
+    if days_diff == 0:
+        return "오늘"
+    elif days_diff == 1:
+        return "어제"
+    elif days_diff < 7:
+        return f"{days_diff}일 전"
+    elif days_diff < 30:
+        weeks = days_diff // 7
+        return f"{weeks}주 전"
+    elif days_diff < 365:
+        months = days_diff // 30
+        return f"{months}개월 전"
+    else:
+        years = days_diff // 365
+        return f"{years}년 전"
 
 def get_korean_time():
     """한국 시간을 반환하는 함수"""
@@ -428,42 +544,6 @@ def format_korean_time(dt):
     """한국 시간으로 포맷팅하는 함수"""
     if dt:
         korean_time = dt + timedelta(hours=9)
-
-def get_restaurant_recommend_count(restaurant_id):
-    """식당의 오찬 추천 하트 개수를 반환하는 함수"""
-    try:
-        # 애플리케이션 컨텍스트 확인
-        from flask import current_app
-        if not current_app:
-            # 컨텍스트가 없으면 기본값 반환
-            return random.randint(5, 25)  # 테스트용 랜덤 값
-        
-        # 실제 추천 데이터를 계산
-        # 1. 해당 식당에 대한 리뷰 수
-        review_count = Review.query.filter_by(restaurant_id=restaurant_id).count()
-        
-        # 2. 해당 식당에 대한 좋아요 수 (리뷰의 likes 합계)
-        total_likes = db.session.query(func.sum(Review.likes)).filter_by(restaurant_id=restaurant_id).scalar() or 0
-        
-        # 3. 해당 식당이 파티에서 언급된 횟수
-        party_mentions = Party.query.filter(
-            or_(
-                Party.restaurant_name.ilike(f'%{restaurant_id}%'),
-                Party.restaurant_name.ilike(f'%{restaurant_id}%')
-            )
-        ).count()
-        
-        # 4. 최근 30일 내 방문 기록 (가상 데이터)
-        recent_visits = random.randint(0, 10)  # 실제로는 방문 로그에서 계산
-        
-        # 종합 점수 계산 (가중치 적용)
-        recommend_score = (review_count * 2) + (total_likes * 3) + (party_mentions * 2) + recent_visits
-        
-        return min(recommend_score, 99)  # 최대 99개로 제한
-        
-    except Exception as e:
-        print(f"Error getting restaurant recommend count: {e}")
-        return random.randint(5, 25)  # 에러 시 테스트용 랜덤 값
         return korean_time.strftime('%Y-%m-%d %H:%M')
     return None
 
@@ -600,6 +680,7 @@ class Restaurant(db.Model):
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
     reviews = db.relationship('Review', backref='restaurant', lazy=True, cascade="all, delete-orphan")
+    stats = db.relationship('RestaurantStats', uselist=False, lazy='joined', cascade="all, delete-orphan")
     
     def __init__(self, name, category, address=None, latitude=None, longitude=None):
         self.name = name
@@ -608,15 +689,23 @@ class Restaurant(db.Model):
         self.latitude = latitude
         self.longitude = longitude
     
+    # 리뷰 집계는 restaurant_stats 테이블에서 읽음 (리뷰 행을 불러오지 않음)
     @property
     def review_count(self):
-        return len(self.reviews)  # type: ignore
+        return self.stats.review_count if self.stats else 0
     
     @property
     def avg_rating(self):
-        if self.reviews and len(self.reviews) > 0:  # type: ignore
-            return sum(r.rating for r in self.reviews) / len(self.reviews)  # type: ignore
-        return 0
+        return self.stats.avg_rating if self.stats else 0
+    
+    @property
+    def like_count(self):
+        return self.stats.like_sum if self.stats else 0
+    
+    @property
+    def recommend_count(self):
+        """오찬 추천 하트 개수"""
+        return self.stats.recommend_score if self.stats else 0
     
     def to_dict(self):
         """식당 정보를 딕셔너리로 변환"""
@@ -651,6 +740,220 @@ class Review(db.Model):
         self.photo_url = photo_url
         self.tags = tags
 
+class RestaurantStats(db.Model):
+    """식당별 리뷰 집계 (목록 정렬/페이지네이션을 SQL에서 처리하기 위한 비정규화 테이블)"""
+    __tablename__ = 'restaurant_stats'
+    
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id', ondelete='CASCADE'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    avg_rating = db.Column(db.Float, nullable=False, default=0.0)
+    like_sum = db.Column(db.Integer, nullable=False, default=0)
+    last_review_at = db.Column(db.DateTime, nullable=True)
+    # 추천 점수용 신호 (주기적으로 재계산)
+    party_mentions = db.Column(db.Integer, nullable=False, default=0)
+    recent_visits = db.Column(db.Integer, nullable=False, default=0)
+    
+    # 오찬 추천 점수 가중치 및 상한
+    REVIEW_WEIGHT = 2
+    LIKE_WEIGHT = 3
+    PARTY_WEIGHT = 2
+    VISIT_WEIGHT = 1
+    MAX_RECOMMEND_SCORE = 99
+    RECENT_VISIT_DAYS = 30
+    
+    __table_args__ = (
+        db.Index('idx_restaurant_stats_rating', 'avg_rating', 'restaurant_id'),
+        db.Index('idx_restaurant_stats_reviews', 'review_count', 'restaurant_id'),
+    )
+    
+    @property
+    def recommend_score(self):
+        score = (self.review_count * self.REVIEW_WEIGHT + self.like_sum * self.LIKE_WEIGHT
+                 + self.party_mentions * self.PARTY_WEIGHT + self.recent_visits * self.VISIT_WEIGHT)
+        return min(score, self.MAX_RECOMMEND_SCORE)
+    
+    @classmethod
+    def recommend_score_expression(cls):
+        """recommend_score와 같은 계산의 SQL 식 (집계 행이 없는 식당은 0)"""
+        score = (func.coalesce(cls.review_count, 0) * cls.REVIEW_WEIGHT
+                 + func.coalesce(cls.like_sum, 0) * cls.LIKE_WEIGHT
+                 + func.coalesce(cls.party_mentions, 0) * cls.PARTY_WEIGHT
+                 + func.coalesce(cls.recent_visits, 0) * cls.VISIT_WEIGHT)
+        return db.case((score > cls.MAX_RECOMMEND_SCORE, cls.MAX_RECOMMEND_SCORE), else_=score)
+
+def apply_review_stats_delta(connection, restaurant_id, count_delta=0, rating_delta=0, like_delta=0,
+                             reviewed_at=None, recompute_last_review=False):
+    """리뷰 추가/수정/삭제분만큼 식당 집계 갱신 (리뷰와 같은 flush/트랜잭션에서 실행)"""
+    stats = RestaurantStats.__table__
+    new_count = stats.c.review_count + count_delta
+    new_sum = stats.c.rating_sum + rating_delta
+    values = {
+        'review_count': new_count,
+        'rating_sum': new_sum,
+        'avg_rating': db.case((new_count > 0, db.cast(new_sum, db.Float) / new_count), else_=0.0),
+        'like_sum': stats.c.like_sum + like_delta,
+    }
+    if recompute_last_review:
+        # 삭제된 리뷰가 가장 최근 리뷰였을 수 있으므로 남은 리뷰 기준으로 다시 계산
+        values['last_review_at'] = db.select(func.max(Review.created_at)).where(
+            Review.restaurant_id == restaurant_id
+        ).scalar_subquery()
+    elif reviewed_at is not None:
+        values['last_review_at'] = db.case(
+            (or_(stats.c.last_review_at.is_(None), stats.c.last_review_at < reviewed_at), reviewed_at),
+            else_=stats.c.last_review_at
+        )
+    
+    result = connection.execute(stats.update().where(stats.c.restaurant_id == restaurant_id).values(**values))
+    if result.rowcount == 0 and count_delta > 0:
+        connection.execute(stats.insert().values(
+            restaurant_id=restaurant_id,
+            review_count=count_delta,
+            rating_sum=rating_delta,
+            avg_rating=rating_delta / count_delta,
+            like_sum=like_delta,
+            last_review_at=reviewed_at
+        ))
+
+@event.listens_for(Review, 'after_insert')
+def add_review_stats(mapper, connection, target):
+    apply_review_stats_delta(connection, target.restaurant_id, 1, target.rating or 0, target.likes or 0,
+                             reviewed_at=target.created_at)
+
+@event.listens_for(Review, 'after_update')
+def update_review_stats(mapper, connection, target):
+    """평점/좋아요 변경분만 반영"""
+    state = db.inspect(target)
+    rating_history = state.attrs.rating.history
+    likes_history = state.attrs.likes.history
+    rating_delta = (sum(rating_history.added or [0]) - sum(rating_history.deleted or [0])
+                    if rating_history.has_changes() else 0)
+    like_delta = (sum(v or 0 for v in likes_history.added) - sum(v or 0 for v in likes_history.deleted)
+                  if likes_history.has_changes() else 0)
+    if rating_delta or like_delta:
+        apply_review_stats_delta(connection, target.restaurant_id, 0, rating_delta, like_delta)
+
+@event.listens_for(Review, 'after_delete')
+def remove_review_stats(mapper, connection, target):
+    apply_review_stats_delta(connection, target.restaurant_id, -1, -(target.rating or 0), -(target.likes or 0),
+                             recompute_last_review=True)
+
+def rebuild_restaurant_stats():
+    """리뷰 테이블 기준으로 식당 집계 전체 재생성 (증분 갱신 누락/드리프트 보정용)"""
+    rows = db.session.query(
+        Review.restaurant_id,
+        func.count(Review.id),
+        func.coalesce(func.sum(Review.rating), 0),
+        func.coalesce(func.sum(Review.likes), 0),
+        func.max(Review.created_at)
+    ).group_by(Review.restaurant_id).all()
+    db.session.query(RestaurantStats).delete()
+    db.session.bulk_insert_mappings(RestaurantStats, [{
+        'restaurant_id': restaurant_id,
+        'review_count': review_count,
+        'rating_sum': rating_sum,
+        'avg_rating': rating_sum / review_count if review_count else 0.0,
+        'like_sum': like_sum,
+        'last_review_at': last_review_at
+    } for restaurant_id, review_count, rating_sum, like_sum, last_review_at in rows])
+    update_recommend_signals()
+    db.session.commit()
+
+def update_recommend_signals():
+    """파티 언급 수/최근 방문 수를 그룹 쿼리 2회로 재계산 (커밋은 호출자가 수행)"""
+    party_counts = dict(db.session.query(Restaurant.id, func.count(Party.id)).join(
+        Party, Party.restaurant_name == Restaurant.name
+    ).group_by(Restaurant.id).all())
+    since = get_seoul_today() - timedelta(days=RestaurantStats.RECENT_VISIT_DAYS)
+    visit_counts = dict(db.session.query(RestaurantVisit.restaurant_id, func.count(RestaurantVisit.id)).filter(
+        RestaurantVisit.visit_date >= since
+    ).group_by(RestaurantVisit.restaurant_id).all())
+    
+    db.session.query(RestaurantStats).update({'party_mentions': 0, 'recent_visits': 0}, synchronize_session=False)
+    signal_ids = set(party_counts) | set(visit_counts)
+    existing_ids = {restaurant_id for (restaurant_id,) in db.session.query(RestaurantStats.restaurant_id).filter(
+        RestaurantStats.restaurant_id.in_(signal_ids)
+    )} if signal_ids else set()
+    mappings = [{
+        'restaurant_id': restaurant_id,
+        'party_mentions': party_counts.get(restaurant_id, 0),
+        'recent_visits': visit_counts.get(restaurant_id, 0)
+    } for restaurant_id in signal_ids]
+    db.session.bulk_update_mappings(RestaurantStats, [m for m in mappings if m['restaurant_id'] in existing_ids])
+    db.session.bulk_insert_mappings(RestaurantStats, [
+        dict(m, review_count=0, rating_sum=0, avg_rating=0.0, like_sum=0)
+        for m in mappings if m['restaurant_id'] not in existing_ids
+    ])
+
+def refresh_recommend_signals():
+    """스케줄러용 추천 점수 신호 갱신 작업"""
+    with app.app_context():
+        try:
+            update_recommend_signals()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"추천 점수 갱신 오류: {e}")
+
+def get_restaurant_spatial_index():
+    """식당 공간 인덱스 반환 (무효화된 상태면 좌표 컬럼만 한 번 조회해 다시 로드)"""
+    if not RESTAURANT_SPATIAL_INDEX.loaded:
+        RESTAURANT_SPATIAL_INDEX.load(db.session.query(Restaurant.id, Restaurant.latitude, Restaurant.longitude).filter(
+            Restaurant.latitude.isnot(None), Restaurant.longitude.isnot(None)
+        ).all())
+    return RESTAURANT_SPATIAL_INDEX
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_delete')
+def invalidate_restaurant_spatial_index(mapper, connection, target):
+    pending_commit_changes(target)['restaurant_spatial'].append(target.id)
+
+@event.listens_for(Restaurant, 'after_update')
+def invalidate_moved_restaurant(mapper, connection, target):
+    state = db.inspect(target)
+    if state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes():
+        pending_commit_changes(target)['restaurant_spatial'].append(target.id)
+
+def get_restaurant_search_index():
+    """식당 검색 인덱스 반환 (처음 사용할 때 이름/카테고리 컬럼만 조회해 로드)"""
+    if not RESTAURANT_SEARCH_INDEX.loaded:
+        RESTAURANT_SEARCH_INDEX.load(db.session.query(Restaurant.id, Restaurant.name, Restaurant.category).all())
+    return RESTAURANT_SEARCH_INDEX
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_update')
+def index_restaurant_search(mapper, connection, target):
+    pending_commit_changes(target)['restaurant_search'].append((target.id, target.name, target.category))
+
+@event.listens_for(Restaurant, 'after_delete')
+def unindex_restaurant_search(mapper, connection, target):
+    pending_commit_changes(target)['restaurant_search'].append((target.id, None, None))
+
+def get_restaurant_features():
+    """개인화 추천용 식당 특성 배열 반환 (만료되었으면 쿼리 한 번으로 다시 로드)"""
+    if not RESTAURANT_FEATURES.loaded:
+        RESTAURANT_FEATURES.load(db.session.query(
+            Restaurant.id, Restaurant.name, Restaurant.category, Restaurant.latitude, Restaurant.longitude,
+            RestaurantStats.avg_rating, RestaurantStats.review_count
+        ).outerjoin(RestaurantStats, RestaurantStats.restaurant_id == Restaurant.id).order_by(Restaurant.id).all())
+    return RESTAURANT_FEATURES
+
+@event.listens_for(Restaurant, 'after_insert')
+@event.listens_for(Restaurant, 'after_update')
+@event.listens_for(Restaurant, 'after_delete')
+def invalidate_restaurant_features(mapper, connection, target):
+    RESTAURANT_FEATURES.invalidate()
+
+def reconcile_restaurant_stats():
+    """스케줄러용 식당 집계 재계산 작업"""
+    with app.app_context():
+        try:
+            rebuild_restaurant_stats()
+        except Exception as e:
+            db.session.rollback()
+            print(f"식당 집계 재계산 오류: {e}")
+
 class Party(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     host_employee_id = db.Column(db.String(50), db.ForeignKey('users.employee_id'), nullable=False)
@@ -736,6 +1039,67 @@ class PartyMember(db.Model):
         self.employee_id = employee_id
         self.is_host = is_host
 
+# PartyMember 추가/삭제 시 파티 참여 횟수 벡터 증분 갱신 (커밋된 변경만 반영)
+@event.listens_for(PartyMember, 'after_insert')
+def increment_party_activity(mapper, connection, target):
+    pending_commit_changes(target)['party_activity'].append((target.employee_id, 1))
+
+@event.listens_for(PartyMember, 'after_delete')
+def decrement_party_activity(mapper, connection, target):
+    pending_commit_changes(target)['party_activity'].append((target.employee_id, -1))
+
+class PartyHydration:
+    """파티 카드 렌더링용 멤버/사용자 정보 일괄 조회 (파티 수와 무관하게 쿼리 2회)"""
+    
+    def __init__(self, parties):
+        party_ids = [party.id for party in parties]
+        self.member_ids = {party_id: [] for party_id in party_ids}
+        self.users = {}
+        if not party_ids:
+            return
+        
+        member_rows = db.session.query(PartyMember.party_id, PartyMember.employee_id).filter(
+            PartyMember.party_id.in_(party_ids)
+        ).order_by(PartyMember.id).all()
+        for party_id, employee_id in member_rows:
+            self.member_ids[party_id].append(employee_id)
+        
+        all_member_ids = {employee_id for _, employee_id in member_rows}
+        if all_member_ids:
+            users = User.query.filter(User.employee_id.in_(all_member_ids)).order_by(User.id).all()  # type: ignore
+            self.users = {user.employee_id: user for user in users}
+    
+    def member_count(self, party_id):
+        return len(self.member_ids.get(party_id, []))
+    
+    def member_users(self, party_id, exclude_id=None):
+        """파티 멤버의 User 목록 (사용자 등록 순서)"""
+        member_ids = set(self.member_ids.get(party_id, [])) - {exclude_id}
+        return sorted((self.users[employee_id] for employee_id in member_ids if employee_id in self.users),
+                      key=lambda user: user.id)
+    
+    def card(self, party):
+        """파티 카드 응답 형식"""
+        return {
+            'id': party.id,
+            'host_employee_id': party.host_employee_id,
+            'title': party.title,
+            'restaurant_name': party.restaurant_name,
+            'restaurant_address': party.restaurant_address,
+            'party_date': party.party_date,
+            'party_time': party.party_time,
+            'meeting_location': party.meeting_location,
+            'max_members': party.max_members,
+            'current_members': self.member_count(party.id),
+            'members': [{
+                'employee_id': user.employee_id,
+                'nickname': user.nickname,
+                'lunch_preference': user.lunch_preference,
+                'main_dish_genre': user.main_dish_genre
+            } for user in self.member_users(party.id)],
+            'is_from_match': party.is_from_match
+        }
+
 class PersonalSchedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.String(50), nullable=False)
@@ -760,6 +1124,82 @@ class PersonalSchedule(db.Model):
         self.recurrence_end_date = recurrence_end_date
         self.original_schedule_id = original_schedule_id
 
+def pending_commit_changes(target):
+    """target이 속한 세션에서 커밋 후 메모리 인덱스에 반영할 변경 (롤백되면 버림)"""
+    return object_session(target).info.setdefault('pending_commit_changes', defaultdict(list))
+
+@event.listens_for(Session, 'after_commit')
+def apply_committed_changes(session):
+    """커밋된 변경만 프로세스 내 인덱스에 반영 (커밋 전에 무효화하면 다른 요청이 커밋 전 값으로 다시 로드할 수 있음)"""
+    changes = session.info.pop('pending_commit_changes', None)
+    if not changes:
+        return
+    for employee_id, delta in changes['party_activity']:
+        PARTY_ACTIVITY_COUNTER.increment(employee_id, delta)
+    for date_str in set(changes['availability_dates']):
+        AVAILABILITY_INDEX.invalidate(date_str)
+    if AVAILABILITY_INDEX.user_ids:
+        AVAILABILITY_INDEX.user_ids.update(changes['availability_user_ids'])
+    if changes['restaurant_spatial']:
+        RESTAURANT_SPATIAL_INDEX.invalidate()
+    # 검색 인덱스: 플러시 순서대로 추가/수정(name 있음)과 삭제(name 없음) 반영
+    for restaurant_id, name, category in changes['restaurant_search']:
+        if name is None:
+            RESTAURANT_SEARCH_INDEX.remove(restaurant_id)
+        elif RESTAURANT_SEARCH_INDEX.loaded:
+            RESTAURANT_SEARCH_INDEX.upsert(restaurant_id, name, category)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_uncommitted_changes(session):
+    session.info.pop('pending_commit_changes', None)
+
+# 파티/멤버/개인 일정 변경 시 커밋 후 해당 날짜의 가용성 인덱스 무효화
+def invalidate_changed_date(target, date_attr):
+    dates = pending_commit_changes(target)['availability_dates']
+    dates.append(getattr(target, date_attr))
+    dates.extend(db.inspect(target).attrs[date_attr].history.deleted)
+
+@event.listens_for(Party, 'after_insert')
+@event.listens_for(Party, 'after_update')
+@event.listens_for(Party, 'after_delete')
+def invalidate_party_availability(mapper, connection, target):
+    invalidate_changed_date(target, 'party_date')
+
+@event.listens_for(PersonalSchedule, 'after_insert')
+@event.listens_for(PersonalSchedule, 'after_update')
+@event.listens_for(PersonalSchedule, 'after_delete')
+def invalidate_schedule_availability(mapper, connection, target):
+    invalidate_changed_date(target, 'schedule_date')
+
+@event.listens_for(User, 'after_insert')
+def add_user_availability(mapper, connection, target):
+    pending_commit_changes(target)['availability_user_ids'].append(target.employee_id)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_user_nickname(mapper, connection, target):
+    USER_NICKNAMES.pop(target.employee_id, None)
+
+def get_user_nickname(employee_id):
+    """닉네임 캐시 조회 (없거나 TTL이 지나면 다시 읽어 캐시, 존재하지 않는 사용자는 None)"""
+    cached = USER_NICKNAMES.get(employee_id)
+    if cached is not None and time.monotonic() - cached[1] < USER_NICKNAME_TTL:
+        return cached[0]
+    nickname = db.session.query(User.nickname).filter(User.employee_id == employee_id).scalar()
+    if nickname is None:
+        USER_NICKNAMES.pop(employee_id, None)
+    else:
+        USER_NICKNAMES[employee_id] = (nickname, time.monotonic())
+    return nickname
+
+@event.listens_for(PartyMember, 'after_insert')
+@event.listens_for(PartyMember, 'after_delete')
+def invalidate_party_member_availability(mapper, connection, target):
+    party_date = connection.execute(
+        db.select(Party.party_date).where(Party.id == target.party_id)
+    ).scalar()
+    pending_commit_changes(target)['availability_dates'].append(party_date)
+
 class LunchProposal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     proposer_id = db.Column(db.String(50), nullable=False)
@@ -793,6 +1233,13 @@ class ChatMessage(db.Model):
     sender_nickname = db.Column(db.String(50), nullable=False)
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 'text', 'voting_notification', 'voting_cancelled', 'voting_completed', 'voting_updated'
+    message_type = db.Column(db.String(30), nullable=False, default='text', server_default='text')
+    voting_session_id = db.Column(db.Integer, nullable=True)  # 투표 메시지가 가리키는 투표 세션
+    
+    __table_args__ = (
+        db.Index('idx_chat_message_room', 'chat_type', 'chat_id', 'id'),
+    )
 
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -826,6 +1273,10 @@ class UserAnalytics(db.Model):
     average_rating_given = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('idx_user_analytics_user_date', 'user_id', 'date', unique=True),
+    )
+    
     def __init__(self, user_id, date):
         self.user_id = user_id
         self.date = date
@@ -841,6 +1292,10 @@ class RestaurantAnalytics(db.Model):
     popular_tags = db.Column(db.String(500), nullable=True)  # JSON 형태로 저장
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('idx_restaurant_analytics_date', 'date', 'restaurant_id'),
+    )
+    
     def __init__(self, restaurant_id, date):
         self.restaurant_id = restaurant_id
         self.date = date
@@ -958,6 +1413,7 @@ class ChatParticipant(db.Model):
         self.room_id = room_id
         self.user_id = user_id
 
+# 메시지별 읽음 기록 (ChatReadCursor 도입 전 데이터, 읽음 위치 초기 생성에만 사용)
 class ChatMessageRead(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     message_id = db.Column(db.Integer, db.ForeignKey('chat_message.id'), nullable=False)
@@ -968,6 +1424,338 @@ class ChatMessageRead(db.Model):
         self.message_id = message_id
         self.user_id = user_id
 
+class ChatRoomSummary(db.Model):
+    """채팅 목록용 방 요약 (메시지 전송/멤버 변경 시 증분 갱신)"""
+    __tablename__ = 'chat_room_summary'
+    id = db.Column(db.Integer, primary_key=True)
+    chat_type = db.Column(db.String(20), nullable=False)  # 'party', 'dangolpot', 'group', 'custom'
+    chat_id = db.Column(db.Integer, nullable=False)
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_message_preview = db.Column(db.String(500), nullable=True)
+    last_message_time = db.Column(db.DateTime, nullable=True)
+    member_count = db.Column(db.Integer, default=0, nullable=False)
+
+    PREVIEW_LENGTH = 500
+
+    __table_args__ = (
+        db.Index('idx_chat_room_summary_key', 'chat_type', 'chat_id', unique=True),
+        db.Index('idx_chat_room_summary_time', 'last_message_time'),
+    )
+
+def chat_room_summary_type(room_type):
+    """ChatRoom.type -> 메시지/요약에 저장되는 chat_type"""
+    return 'group' if room_type == 'group' else 'custom'
+
+def apply_chat_summary(connection, chat_type, chat_id, member_delta=0, message=None):
+    """방 요약에 새 메시지/멤버 수 변경분 반영 (같은 flush/트랜잭션에서 실행)"""
+    summary = ChatRoomSummary.__table__
+    values = {}
+    if member_delta:
+        values['member_count'] = summary.c.member_count + member_delta
+    if message is not None:
+        values['last_message_id'] = message.id
+        values['last_message_preview'] = (message.message or '')[:ChatRoomSummary.PREVIEW_LENGTH]
+        values['last_message_time'] = message.created_at
+    if not values:
+        return
+
+    key = and_(summary.c.chat_type == chat_type, summary.c.chat_id == chat_id)
+    query = summary.update().where(key)
+    if message is not None:
+        # 늦게 커밋된 이전 메시지가 더 최근 메시지를 덮어쓰지 않도록 id가 더 클 때만 교체
+        query = query.where(or_(summary.c.last_message_id.is_(None), summary.c.last_message_id < message.id))
+    result = connection.execute(query.values(**values))
+    if result.rowcount == 0 and connection.execute(db.select(summary.c.id).where(key)).first() is None:
+        values['member_count'] = max(member_delta, 0)
+        connection.execute(summary.insert().values(chat_type=chat_type, chat_id=chat_id, **values))
+
+def remove_chat_summary(connection, chat_types, chat_id):
+    summary = ChatRoomSummary.__table__
+    connection.execute(summary.delete().where(summary.c.chat_type.in_(chat_types), summary.c.chat_id == chat_id))
+
+@event.listens_for(ChatMessage, 'after_insert')
+def add_chat_summary_message(mapper, connection, target):
+    apply_chat_summary(connection, target.chat_type, target.chat_id, message=target)
+
+@event.listens_for(ChatMessage, 'after_delete')
+def remove_chat_summary_message(mapper, connection, target):
+    """삭제된 메시지가 마지막 메시지였으면 남은 메시지 기준으로 다시 계산"""
+    summary = ChatRoomSummary.__table__
+    messages = ChatMessage.__table__
+    last = connection.execute(db.select(messages.c.id, messages.c.message, messages.c.created_at).where(
+        messages.c.chat_type == target.chat_type, messages.c.chat_id == target.chat_id
+    ).order_by(messages.c.id.desc()).limit(1)).first()
+    connection.execute(summary.update().where(
+        summary.c.chat_type == target.chat_type, summary.c.chat_id == target.chat_id,
+        summary.c.last_message_id == target.id
+    ).values(
+        last_message_id=last.id if last else None,
+        last_message_preview=(last.message or '')[:ChatRoomSummary.PREVIEW_LENGTH] if last else None,
+        last_message_time=last.created_at if last else None
+    ))
+
+@event.listens_for(PartyMember, 'after_insert')
+def add_party_chat_member(mapper, connection, target):
+    apply_chat_summary(connection, 'party', target.party_id, member_delta=1)
+
+@event.listens_for(PartyMember, 'after_delete')
+def remove_party_chat_member(mapper, connection, target):
+    apply_chat_summary(connection, 'party', target.party_id, member_delta=-1)
+
+@event.listens_for(DangolPotMember, 'after_insert')
+def add_dangolpot_chat_member(mapper, connection, target):
+    apply_chat_summary(connection, 'dangolpot', target.dangolpot_id, member_delta=1)
+
+@event.listens_for(DangolPotMember, 'after_delete')
+def remove_dangolpot_chat_member(mapper, connection, target):
+    apply_chat_summary(connection, 'dangolpot', target.dangolpot_id, member_delta=-1)
+
+def chat_participant_summary_type(connection, room_id):
+    room_type = connection.execute(db.select(ChatRoom.__table__.c.type).where(
+        ChatRoom.__table__.c.id == room_id
+    )).scalar()
+    return chat_room_summary_type(room_type)
+
+@event.listens_for(ChatParticipant, 'after_insert')
+def add_room_chat_member(mapper, connection, target):
+    apply_chat_summary(connection, chat_participant_summary_type(connection, target.room_id), target.room_id,
+                       member_delta=1)
+
+@event.listens_for(ChatParticipant, 'after_delete')
+def remove_room_chat_member(mapper, connection, target):
+    apply_chat_summary(connection, chat_participant_summary_type(connection, target.room_id), target.room_id,
+                       member_delta=-1)
+
+@event.listens_for(Party, 'after_delete')
+def remove_party_chat_summary(mapper, connection, target):
+    remove_chat_summary(connection, ('party',), target.id)
+
+@event.listens_for(DangolPot, 'after_delete')
+def remove_dangolpot_chat_summary(mapper, connection, target):
+    remove_chat_summary(connection, ('dangolpot',), target.id)
+
+@event.listens_for(ChatRoom, 'after_delete')
+def remove_room_chat_summary(mapper, connection, target):
+    remove_chat_summary(connection, ('group', 'custom'), target.id)
+
+def rebuild_chat_summaries():
+    """메시지/멤버 테이블 기준으로 방 요약 전체 재생성 (벌크 삭제 등 이벤트 누락 보정용)"""
+    summaries = {}
+
+    def summary_for(chat_type, chat_id):
+        return summaries.setdefault((chat_type, chat_id), {
+            'chat_type': chat_type, 'chat_id': chat_id, 'member_count': 0,
+            'last_message_id': None, 'last_message_preview': None, 'last_message_time': None
+        })
+
+    party_counts = db.session.query(PartyMember.party_id, func.count(PartyMember.id)).group_by(
+        PartyMember.party_id
+    ).all()
+    for party_id, member_count in party_counts:
+        summary_for('party', party_id)['member_count'] = member_count
+
+    pot_counts = db.session.query(DangolPotMember.dangolpot_id, func.count(DangolPotMember.id)).group_by(
+        DangolPotMember.dangolpot_id
+    ).all()
+    for pot_id, member_count in pot_counts:
+        summary_for('dangolpot', pot_id)['member_count'] = member_count
+
+    room_counts = db.session.query(ChatRoom.type, ChatParticipant.room_id, func.count(ChatParticipant.id)).join(
+        ChatRoom, ChatRoom.id == ChatParticipant.room_id
+    ).group_by(ChatParticipant.room_id, ChatRoom.type).all()
+    for room_type, room_id, member_count in room_counts:
+        summary_for(chat_room_summary_type(room_type), room_id)['member_count'] = member_count
+
+    last_ids = db.session.query(func.max(ChatMessage.id).label('id')).group_by(
+        ChatMessage.chat_type, ChatMessage.chat_id
+    ).subquery()
+    last_messages = db.session.query(
+        ChatMessage.chat_type, ChatMessage.chat_id, ChatMessage.id, ChatMessage.message, ChatMessage.created_at
+    ).join(last_ids, last_ids.c.id == ChatMessage.id).all()
+    for chat_type, chat_id, message_id, message, created_at in last_messages:
+        summary = summary_for(chat_type, chat_id)
+        summary['last_message_id'] = message_id
+        summary['last_message_preview'] = (message or '')[:ChatRoomSummary.PREVIEW_LENGTH]
+        summary['last_message_time'] = created_at
+
+    db.session.query(ChatRoomSummary).delete()
+    db.session.bulk_insert_mappings(ChatRoomSummary, list(summaries.values()))
+    db.session.commit()
+
+class ChatReadCursor(db.Model):
+    """사용자별 채팅방 읽음 위치 (이 id 이하의 메시지는 모두 읽음)"""
+    __tablename__ = 'chat_read_cursor'
+    id = db.Column(db.Integer, primary_key=True)
+    chat_type = db.Column(db.String(20), nullable=False)
+    chat_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.String(50), nullable=False)
+    last_read_message_id = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_chat_read_cursor_key', 'chat_type', 'chat_id', 'user_id', unique=True),
+        db.Index('idx_chat_read_cursor_user', 'user_id'),
+    )
+
+def advance_read_cursor(connection, chat_type, chat_id, user_id, message_id):
+    """읽음 위치를 message_id까지 전진 (뒤로 가지 않음). 위치가 바뀌었으면 True"""
+    cursors = ChatReadCursor.__table__
+    key = and_(cursors.c.chat_type == chat_type, cursors.c.chat_id == chat_id, cursors.c.user_id == user_id)
+    result = connection.execute(cursors.update().where(key, cursors.c.last_read_message_id < message_id).values(
+        last_read_message_id=message_id, updated_at=datetime.utcnow()
+    ))
+    if result.rowcount:
+        return True
+    if connection.execute(db.select(cursors.c.id).where(key)).first() is not None:
+        return False
+    connection.execute(cursors.insert().values(
+        chat_type=chat_type, chat_id=chat_id, user_id=user_id,
+        last_read_message_id=message_id, updated_at=datetime.utcnow()
+    ))
+    return True
+
+@event.listens_for(ChatMessage, 'after_insert')
+def advance_sender_read_cursor(mapper, connection, target):
+    """보낸 사람은 자기 메시지까지 읽은 것으로 처리"""
+    if target.sender_employee_id != 'SYSTEM':
+        advance_read_cursor(connection, target.chat_type, target.chat_id, target.sender_employee_id, target.id)
+
+def seed_read_cursors():
+    """기존 ChatMessageRead 기록에서 방/사용자별 마지막 읽은 메시지로 읽음 위치 생성"""
+    rows = db.session.query(
+        ChatMessage.chat_type, ChatMessage.chat_id, ChatMessageRead.user_id, func.max(ChatMessageRead.message_id)
+    ).join(ChatMessage, ChatMessage.id == ChatMessageRead.message_id).group_by(
+        ChatMessage.chat_type, ChatMessage.chat_id, ChatMessageRead.user_id
+    ).all()
+    db.session.bulk_insert_mappings(ChatReadCursor, [{
+        'chat_type': chat_type,
+        'chat_id': chat_id,
+        'user_id': user_id,
+        'last_read_message_id': last_read_message_id
+    } for chat_type, chat_id, user_id, last_read_message_id in rows])
+    db.session.commit()
+
+def resolve_chat_type(chat_type, chat_id):
+    """프론트엔드 chat_type -> 메시지에 저장되는 chat_type ('custom'으로 요청된 그룹 채팅방은 'group')"""
+    if chat_type == 'custom':
+        room_type = db.session.query(ChatRoom.type).filter(ChatRoom.id == chat_id).scalar()
+        return chat_room_summary_type(room_type)
+    return chat_type
+
+def get_chat_member_ids(chat_type, chat_id):
+    """채팅방 멤버 id 목록 (chat_type은 저장되는 값 기준)"""
+    if chat_type == 'party':
+        query = db.session.query(PartyMember.employee_id).filter(PartyMember.party_id == chat_id)
+    elif chat_type == 'dangolpot':
+        query = db.session.query(DangolPotMember.employee_id).filter(DangolPotMember.dangolpot_id == chat_id)
+    elif chat_type in ('group', 'custom'):
+        query = db.session.query(ChatParticipant.user_id).filter(ChatParticipant.room_id == chat_id)
+    else:
+        return []
+    return [member_id for member_id, in query.all()]
+
+class ChatReadState:
+    """채팅방 멤버들의 읽음 위치 (멤버 수만큼만 조회, 메시지별 안읽음 수는 이진 탐색)"""
+
+    def __init__(self, chat_type, chat_id):
+        self.member_ids = get_chat_member_ids(chat_type, chat_id)
+        cursors = {}
+        if self.member_ids:
+            cursors = dict(db.session.query(ChatReadCursor.user_id, ChatReadCursor.last_read_message_id).filter(
+                ChatReadCursor.chat_type == chat_type,
+                ChatReadCursor.chat_id == chat_id,
+                ChatReadCursor.user_id.in_(self.member_ids)
+            ).all())
+        self.cursors = sorted(cursors.get(member_id, 0) for member_id in self.member_ids)
+
+    def unread_count(self, message_id):
+        """message_id 메시지를 아직 읽지 않은 멤버 수"""
+        return bisect.bisect_left(self.cursors, message_id)
+
+def load_max_chat_message_id():
+    """저장된 최대 메시지 id (공유 id 시퀀스 초기화용, 별도 연결에서 읽기만 수행)"""
+    with app.app_context(), db.engine.connect() as connection:
+        return connection.execute(db.select(func.max(ChatMessage.__table__.c.id))).scalar() or 0
+
+def create_chat_message_ids():
+    """Socket.IO 메시지 큐가 Redis면 같은 Redis 카운터로 모든 워커가 공유하는 id 시퀀스 생성
+
+    Redis가 없으면 None - 메시지는 전송 전에 저장되고 DB 자동 증가 id를 사용
+    """
+    client = message_queue_redis(socketio)
+    if client is None:
+        return None
+    return SharedMessageIdSequence(client, f"{socketio_channel()}:chat_message_id", load_max_chat_message_id)
+
+# 채팅 메시지 id 시퀀스 (id 순서 = 전송 순서, 읽음 위치/이전 메시지 조회/방 요약이 이 순서에 의존)
+CHAT_MESSAGE_IDS = create_chat_message_ids()
+
+@event.listens_for(ChatMessage, 'before_insert')
+def assign_chat_message_id(mapper, connection, target):
+    """공유 시퀀스가 있으면 ORM으로 저장하는 메시지도 같은 시퀀스에서 id 할당 (Redis만 사용, DB 예약 없음)"""
+    if CHAT_MESSAGE_IDS is not None and target.id is None:
+        target.id = CHAT_MESSAGE_IDS.next_id()
+
+def persist_chat_messages(records):
+    """메시지 배치를 한 트랜잭션으로 저장 (방 요약/읽음 위치는 매퍼 이벤트로 함께 갱신)
+
+    id가 없는 레코드(sync 모드)에는 저장 후 할당된 id를 기록
+    """
+    with app.app_context():
+        try:
+            messages = [ChatMessage(**record) for record in records]
+            db.session.add_all(messages)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for record, message in zip(records, messages):
+            record['id'] = message.id
+
+# 채팅 메시지 쓰기 지연 작성기
+# CHAT_MESSAGE_WRITE_MODE: 'batch'(기본값) - 백그라운드 배치 저장, 'sync' - 전송 전에 저장 (테스트/내구성 우선)
+# 배치 저장은 전송 전에 id가 필요하므로 공유 id 시퀀스(Redis)가 있을 때만 사용
+CHAT_MESSAGE_WRITE_MODE = os.getenv('CHAT_MESSAGE_WRITE_MODE', 'batch').lower()
+if CHAT_MESSAGE_WRITE_MODE == 'batch' and CHAT_MESSAGE_IDS is None:
+    print("ℹ️ Redis 메시지 큐가 없어 채팅 메시지를 전송 전에 저장합니다 (sync 모드).")
+    CHAT_MESSAGE_WRITE_MODE = 'sync'
+CHAT_MESSAGE_WRITER = ChatMessageWriter(
+    persist_chat_messages,
+    max_batch=int(os.getenv('CHAT_WRITE_BATCH_SIZE', '100')),
+    max_delay=float(os.getenv('CHAT_WRITE_MAX_DELAY_MS', '50')) / 1000,
+    sync=CHAT_MESSAGE_WRITE_MODE == 'sync'
+)
+atexit.register(CHAT_MESSAGE_WRITER.close)
+
+def flush_pending_chat_messages(chat_type, chat_id):
+    """조회하려는 방에 이 워커에서 아직 저장되지 않은 메시지가 있으면 먼저 저장
+
+    다른 워커가 전송한 메시지는 그 워커의 배치가 커밋될 때까지(최대 CHAT_WRITE_MAX_DELAY_MS) 조회되지 않음
+    (이미 소켓으로 전달된 메시지이므로 이전 메시지 조회에서만 잠시 빠짐)
+    """
+    if any(record['chat_type'] == chat_type and record['chat_id'] == chat_id
+           for record in CHAT_MESSAGE_WRITER.pending_records()):
+        CHAT_MESSAGE_WRITER.flush()
+
+def find_chat_message_room(message_id):
+    """메시지의 (chat_type, chat_id) 조회 (없으면 None) - 기다리거나 대기 메시지를 저장하지 않음
+
+    이 워커의 대기 메시지 -> DB -> 공유 시퀀스의 id별 방 기록(다른 워커가 아직 저장 중인 메시지) 순으로 찾음
+    """
+    for record in CHAT_MESSAGE_WRITER.pending_records():
+        if record.get('id') == message_id:
+            return record['chat_type'], record['chat_id']
+
+    message = db.session.query(ChatMessage.chat_type, ChatMessage.chat_id).filter(ChatMessage.id == message_id).first()
+    if message is not None:
+        return message.chat_type, message.chat_id
+
+    room = CHAT_MESSAGE_IDS.room_of(message_id) if CHAT_MESSAGE_IDS is not None else None
+    if room is None:
+        return None
+    chat_type, chat_id = room.rsplit('_', 1)
+    return chat_type, int(chat_id)
+
 # 포인트 시스템 관련 테이블들
 class UserActivity(db.Model):
     """사용자 활동 기록 테이블"""
@@ -1058,6 +1846,59 @@ class VotingSession(db.Model):
         self.created_by = created_by
         self.expires_at = expires_at
 
+def latest_voting_session_ids(chat_room_id):
+    """채팅방의 최신 진행 중 투표와 최근 확정된 투표 id (쿼리 1회)"""
+    sessions = db.session.query(
+        VotingSession.id, VotingSession.status, VotingSession.created_at, VotingSession.confirmed_at
+    ).filter(
+        VotingSession.chat_room_id == chat_room_id,
+        VotingSession.status.in_(('active', 'completed'))
+    ).all()
+    active = [s for s in sessions if s.status == 'active']
+    completed = [s for s in sessions if s.status == 'completed']
+    return {
+        'active': max(active, key=lambda s: (s.created_at or datetime.min, s.id)).id if active else None,
+        'completed': max(completed, key=lambda s: (s.confirmed_at or datetime.min, s.id)).id if completed else None
+    }
+
+def legacy_system_message_type(message):
+    """message_type 컬럼 도입 전 시스템 메시지의 종류를 문구로 판별"""
+    if '📊 새로운 투표가 시작되었습니다!' in message and '이 메시지를 터치하여 투표에 참여하세요' in message:
+        return 'voting_notification'
+    if '🚫' in message and '투표가 삭제되었습니다' in message:
+        return 'voting_cancelled'
+    if ('⏰' in message and '투표가 마감되었습니다' in message) or ('🎉' in message and '투표가 완료되었습니다' in message):
+        return 'voting_completed'
+    if '📝' in message and '투표 정보가 수정되었습니다' in message:
+        return 'voting_updated'
+    return None
+
+def upgrade_chat_message_types():
+    """기존 DB에 message_type/voting_session_id 컬럼 추가 후 시스템 메시지를 한 번만 분류"""
+    # 풀에 남은 다른 연결의 스키마 캐시를 보지 않도록 ALTER와 같은 연결에서 확인
+    with db.engine.begin() as connection:
+        columns = {column['name'] for column in db.inspect(connection).get_columns('chat_message')}
+        if {'message_type', 'voting_session_id'} <= columns:
+            return
+        if 'message_type' not in columns:
+            connection.execute(text("ALTER TABLE chat_message ADD COLUMN message_type VARCHAR(30) NOT NULL DEFAULT 'text'"))
+        if 'voting_session_id' not in columns:
+            connection.execute(text("ALTER TABLE chat_message ADD COLUMN voting_session_id INTEGER"))
+    
+    # 기존에는 조회 시점의 방별 최신 투표를 연결했으므로 같은 기준으로 채움
+    voting_sessions = {}
+    for msg in ChatMessage.query.filter_by(sender_employee_id='SYSTEM').all():
+        message_type = legacy_system_message_type(msg.message)
+        if message_type is None:
+            continue
+        msg.message_type = message_type
+        if message_type in ('voting_notification', 'voting_completed'):
+            if msg.chat_id not in voting_sessions:
+                voting_sessions[msg.chat_id] = latest_voting_session_ids(msg.chat_id)
+            status = 'active' if message_type == 'voting_notification' else 'completed'
+            msg.voting_session_id = voting_sessions[msg.chat_id][status]
+    db.session.commit()
+
 class DateVote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     voting_session_id = db.Column(db.Integer, db.ForeignKey('voting_session.id'), nullable=False)
@@ -1162,6 +2003,214 @@ class RestaurantVisit(db.Model):
             'restaurant': self.restaurant.to_dict() if self.restaurant else None
         }
 
+class RestaurantPopularity(db.Model):
+    """주간/월간 인기 식당 순위 (스케줄러가 주기적으로 재계산)"""
+    __tablename__ = 'restaurant_popularity'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)  # 'weekly', 'monthly'
+    rank = db.Column(db.Integer, nullable=False)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id', ondelete='CASCADE'), nullable=False)
+    visit_score = db.Column(db.Float, default=0.0)
+    review_score = db.Column(db.Float, default=0.0)
+    total_score = db.Column(db.Float, default=0.0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    restaurant = db.relationship('Restaurant')
+    
+    __table_args__ = (
+        db.Index('idx_popularity_period_rank', 'period', 'rank'),
+    )
+    
+    # 기간별 집계 일수, 저장 순위 수(API 최대 limit), 재계산 주기
+    PERIOD_DAYS = {'weekly': 7, 'monthly': 30}
+    TOP_N = 50
+    REFRESH_MINUTES = 10
+
+def rebuild_popularity_leaderboard(period):
+    """기간 내 방문 집계 + 리뷰 집계로 인기 순위 재계산 (커밋은 호출자가 수행)"""
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=RestaurantPopularity.PERIOD_DAYS[period])
+    
+    # 방문 기반 점수: 방문 수 * 2 + 평균 인원
+    scores = {}
+    visit_rows = db.session.query(
+        RestaurantVisit.restaurant_id,
+        func.count(RestaurantVisit.id),
+        func.avg(RestaurantVisit.party_size)
+    ).filter(RestaurantVisit.visit_date >= start_date, RestaurantVisit.visit_date <= end_date)\
+     .group_by(RestaurantVisit.restaurant_id).all()
+    for restaurant_id, visit_count, avg_party_size in visit_rows:
+        scores[restaurant_id] = [visit_count * 2 + float(avg_party_size or 1), 0.0]
+    
+    # 리뷰 기반 점수: 리뷰 수 + 평균 평점 * 2 (리뷰 수 상위 식당만 후보)
+    review_rows = db.session.query(
+        RestaurantStats.restaurant_id, RestaurantStats.review_count, RestaurantStats.avg_rating
+    ).filter(RestaurantStats.review_count > 0)\
+     .order_by(RestaurantStats.review_count.desc(), RestaurantStats.restaurant_id)\
+     .limit(RestaurantPopularity.TOP_N).all()
+    for restaurant_id, review_count, avg_rating in review_rows:
+        scores.setdefault(restaurant_id, [0.0, 0.0])[1] = review_count + (avg_rating or 0) * 2
+    
+    ranked = sorted(scores.items(), key=lambda item: (-(item[1][0] + item[1][1]), item[0]))[:RestaurantPopularity.TOP_N]
+    computed_at = datetime.utcnow()
+    RestaurantPopularity.query.filter_by(period=period).delete()
+    db.session.bulk_insert_mappings(RestaurantPopularity, [{
+        'period': period,
+        'rank': rank,
+        'restaurant_id': restaurant_id,
+        'visit_score': visit_score,
+        'review_score': review_score,
+        'total_score': visit_score + review_score,
+        'computed_at': computed_at
+    } for rank, (restaurant_id, (visit_score, review_score)) in enumerate(ranked, start=1)])
+
+def refresh_popularity_leaderboards():
+    """스케줄러용 인기 식당 순위 갱신 작업"""
+    with app.app_context():
+        try:
+            for period in RestaurantPopularity.PERIOD_DAYS:
+                rebuild_popularity_leaderboard(period)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"인기 식당 순위 갱신 오류: {e}")
+
+def snapshot_restaurant_analytics(snapshot_date):
+    """해당 날짜(KST) 기준 식당별 누적 리뷰 집계와 당일 방문/태그를 RestaurantAnalytics에 기록 (같은 날짜는 교체)
+
+    누적 집계도 그날 끝까지 작성된 리뷰로 계산하므로 지난 날짜를 다시 실행해도 같은 값이 기록됨
+    """
+    # Review.created_at은 UTC이므로 KST 하루 경계를 UTC로 변환
+    day_start = datetime.combine(snapshot_date, dt_time.min) - timedelta(hours=9)
+    day_end = day_start + timedelta(days=1)
+    
+    visit_counts = dict(db.session.query(RestaurantVisit.restaurant_id, func.count(RestaurantVisit.id))
+                        .filter(RestaurantVisit.visit_date == snapshot_date)
+                        .group_by(RestaurantVisit.restaurant_id).all())
+    
+    tag_counts = defaultdict(lambda: defaultdict(int))
+    for restaurant_id, tags in db.session.query(Review.restaurant_id, Review.tags).filter(
+        Review.created_at >= day_start, Review.created_at < day_end, Review.tags.isnot(None)
+    ):
+        for tag in tags.split(','):
+            if tag.strip():
+                tag_counts[restaurant_id][tag.strip()] += 1
+    
+    stats = {restaurant_id: (review_count, rating_sum / review_count, like_sum)
+             for restaurant_id, review_count, rating_sum, like_sum in db.session.query(
+                 Review.restaurant_id,
+                 func.count(Review.id),
+                 func.coalesce(func.sum(Review.rating), 0),
+                 func.coalesce(func.sum(Review.likes), 0)
+             ).filter(Review.created_at < day_end).group_by(Review.restaurant_id)}
+    restaurant_ids = set(stats) | set(visit_counts)
+    
+    RestaurantAnalytics.query.filter_by(date=snapshot_date).delete()
+    db.session.bulk_insert_mappings(RestaurantAnalytics, [{
+        'restaurant_id': restaurant_id,
+        'date': snapshot_date,
+        'total_visits': visit_counts.get(restaurant_id, 0),
+        'total_reviews': stats.get(restaurant_id, (0, 0.0, 0))[0],
+        'average_rating': stats.get(restaurant_id, (0, 0.0, 0))[1],
+        'total_likes': stats.get(restaurant_id, (0, 0.0, 0))[2],
+        'popular_tags': json.dumps(
+            sorted(tag_counts[restaurant_id].items(), key=lambda x: (-x[1], x[0]))[:5], ensure_ascii=False
+        ) if restaurant_id in tag_counts else None
+    } for restaurant_id in restaurant_ids])
+
+def compute_user_rollups(user_ids):
+    """사용자 목록의 누적 활동 통계를 그룹 쿼리 4회로 계산"""
+    user_ids = list(user_ids)
+    parties = dict(db.session.query(PartyMember.employee_id, func.count(PartyMember.id))
+                   .join(Party, Party.id == PartyMember.party_id)
+                   .filter(PartyMember.employee_id.in_(user_ids))
+                   .group_by(PartyMember.employee_id).all())
+    reviews = {user_id: (count, avg_rating) for user_id, count, avg_rating in
+               db.session.query(Review.user_id, func.count(Review.id), func.avg(Review.rating))
+               .filter(Review.user_id.in_(user_ids))
+               .group_by(Review.user_id).all()}
+    friends = dict(db.session.query(Friendship.requester_id, func.count(Friendship.id))
+                   .filter(Friendship.requester_id.in_(user_ids), Friendship.status == 'accepted')
+                   .group_by(Friendship.requester_id).all())
+    
+    # 사용자별 리뷰가 가장 많은 카테고리 (동률이면 카테고리 이름순)
+    favorite_categories = {}
+    category_rows = db.session.query(Review.user_id, Restaurant.category, func.count(Review.id))\
+        .join(Restaurant, Restaurant.id == Review.restaurant_id)\
+        .filter(Review.user_id.in_(user_ids))\
+        .group_by(Review.user_id, Restaurant.category).all()
+    for user_id, category, count in sorted(category_rows, key=lambda row: (row[0], -row[2], row[1])):
+        favorite_categories.setdefault(user_id, category)
+    
+    return {user_id: {
+        'total_parties_joined': parties.get(user_id, 0),
+        'total_reviews_written': reviews.get(user_id, (0, 0))[0],
+        'total_friends_added': friends.get(user_id, 0),
+        'favorite_restaurant_category': favorite_categories.get(user_id),
+        'average_rating_given': float(reviews.get(user_id, (0, 0))[1] or 0)
+    } for user_id in user_ids}
+
+def rollup_user_analytics(rollup_date, batch_size=500, force=False):
+    """모든 사용자의 누적 통계를 해당 날짜 UserAnalytics 행으로 기록
+
+    이미 행이 있는 사용자는 건너뛰고 배치마다 커밋하므로, 중간에 실패해도 다시 실행하면 남은 사용자만 처리됨
+    force=True면 해당 날짜 행을 지우고 다시 계산
+    """
+    if force:
+        UserAnalytics.query.filter_by(date=rollup_date).delete()
+        db.session.commit()
+    
+    done = db.session.query(UserAnalytics.user_id).filter(UserAnalytics.date == rollup_date)
+    pending = [user_id for (user_id,) in db.session.query(User.employee_id)
+               .filter(User.employee_id.notin_(done)).order_by(User.employee_id).all()]
+    
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        rollups = compute_user_rollups(batch)
+        db.session.bulk_insert_mappings(UserAnalytics, [
+            dict(rollups[user_id], user_id=user_id, date=rollup_date) for user_id in batch
+        ])
+        db.session.commit()
+    return len(pending)
+
+def rollup_daily_user_analytics():
+    """스케줄러용 전날 사용자 분석 롤업 작업"""
+    with app.app_context():
+        try:
+            rollup_user_analytics(get_seoul_today() - timedelta(days=1))
+        except Exception as e:
+            db.session.rollback()
+            print(f"사용자 분석 롤업 오류: {e}")
+
+def snapshot_daily_restaurant_analytics():
+    """스케줄러용 전날 식당 분석 스냅샷 작업"""
+    with app.app_context():
+        try:
+            snapshot_restaurant_analytics(get_seoul_today() - timedelta(days=1))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"식당 분석 스냅샷 오류: {e}")
+
+def create_missing_indexes(*tables):
+    """모델에 선언된 인덱스 중 DB에 없는 것만 생성 (create_all은 이미 있는 테이블에 인덱스를 추가하지 않음)"""
+    for table in tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def upgrade_user_analytics_index():
+    """기존 user_analytics에 (user_id, date) 고유 인덱스 추가 (중복 롤업 행은 마지막 행만 남김)"""
+    analytics = UserAnalytics.__table__
+    with db.engine.begin() as connection:
+        index_names = {index['name'] for index in db.inspect(connection).get_indexes('user_analytics')}
+        if 'idx_user_analytics_user_date' in index_names:
+            return
+        keep_ids = db.select(func.max(analytics.c.id)).group_by(analytics.c.user_id, analytics.c.date)
+        connection.execute(analytics.delete().where(analytics.c.id.notin_(keep_ids)))
+        for index in analytics.indexes:
+            index.create(connection, checkfirst=True)
+
 # --- 앱 실행 시 초기화 ---
 def initialize_database():
     """앱 시작 시 한 번만 실행되는 데이터베이스 초기화"""
@@ -1169,7 +2218,30 @@ def initialize_database():
         try:
             # 데이터베이스 테이블 생성
             db.create_all()
+            upgrade_chat_message_types()
+            create_missing_indexes(ChatMessage.__table__)
+            upgrade_user_analytics_index()
+            create_missing_indexes(RestaurantAnalytics.__table__)
             
+            # 식당 리뷰 집계가 비어 있으면 리뷰 테이블 기준으로 채움
+            if not db.session.query(RestaurantStats.restaurant_id).first() and db.session.query(Review.id).first():
+                rebuild_restaurant_stats()
+            else:
+                update_recommend_signals()
+                db.session.commit()
+
+            # 채팅방 요약이 비어 있으면 메시지/멤버 테이블 기준으로 채움
+            if not db.session.query(ChatRoomSummary.id).first():
+                rebuild_chat_summaries()
+
+            # 읽음 위치가 비어 있으면 기존 메시지별 읽음 기록에서 생성
+            if not db.session.query(ChatReadCursor.id).first() and db.session.query(ChatMessageRead.id).first():
+                seed_read_cursors()
+
+            # 공유 메시지 id 카운터를 저장된 최대 id 이후로 맞춤
+            if CHAT_MESSAGE_IDS is not None:
+                CHAT_MESSAGE_IDS.seed()
+
             # 초기 데이터가 없으면 생성 (인증 시스템이 활성화된 경우에만)
             if AUTH_AVAILABLE:
                 # 강제로 초기 데이터 생성 (개발 환경)
@@ -1349,14 +2421,28 @@ with app.app_context():
     initialize_database()
 
 # --- API 엔드포인트 ---
+# 캘린더 조회 기본 구간 (start/end 파라미터가 없을 때)
+DEFAULT_EVENT_WINDOW_DAYS = 90
+
 @app.route('/events/<employee_id>', methods=['GET'])
 def get_events(employee_id):
-    """사용자의 이벤트(파티, 개인 일정) 조회"""
+    """사용자의 이벤트(파티, 개인 일정) 조회 - start/end(YYYY-MM-DD) 구간 [start, end)만 반환"""
     try:
         events = {}
         today = get_seoul_today()
         
-        # 파티/랜덤런치 조회
+        # 조회 구간 파싱 (기본값: 오늘부터 90일)
+        try:
+            window_start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else today
+            window_end = (datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end')
+                          else window_start + timedelta(days=DEFAULT_EVENT_WINDOW_DAYS))
+        except ValueError:
+            return jsonify({'error': 'start/end는 YYYY-MM-DD 형식이어야 합니다.'}), 400
+        if window_end <= window_start:
+            return jsonify({'error': 'end는 start보다 이후여야 합니다.'}), 400
+        start_str, end_str = window_start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')
+        
+        # 파티/랜덤런치 조회 (구간 내)
         parties = Party.query.filter(
             or_(
                 Party.host_employee_id == employee_id,
@@ -1364,9 +2450,14 @@ def get_events(employee_id):
                     db.session.query(PartyMember.party_id)
                     .filter(PartyMember.employee_id == employee_id)
                 )
-            )
+            ),
+            Party.party_date >= start_str,
+            Party.party_date < end_str
         ).all()
         
+        # 파티 멤버와 닉네임을 일괄 조회
+        hydration = PartyHydration(parties)
+        
         for party in parties:
             # 날짜 데이터 검증 및 처리
             try:
@@ -1374,12 +2465,7 @@ def get_events(employee_id):
                 if not party.party_date or 'NaN' in str(party.party_date):
                     print(f"Warning: Invalid party_date found: {party.party_date} for party ID {party.id}")
                     continue
-                    
-                # 과거 파티는 제외
-                party_date = datetime.strptime(party.party_date, '%Y-%m-%d').date()
-                if party_date < today:
-                    continue
-                    
+                datetime.strptime(party.party_date, '%Y-%m-%d')
             except (ValueError, TypeError) as e:
                 print(f"Warning: Failed to parse party_date '{party.party_date}' for party ID {party.id}: {e}")
                 continue
@@ -1387,17 +2473,9 @@ def get_events(employee_id):
             if party.party_date not in events:
                 events[party.party_date] = []
                 
-            # 파티 멤버 정보 가져오기
-            member_ids = party.member_ids
-            other_member_ids = [mid for mid in member_ids if mid != employee_id]
-            
-            # 다른 멤버들의 닉네임 가져오기
-            other_members = User.query.filter(User.employee_id.in_(other_member_ids)).all()
-            member_nicknames = [user.nickname for user in other_members]
-            
-            # 모든 멤버들의 닉네임 가져오기
-            all_members = User.query.filter(User.employee_id.in_(member_ids)).all()
-            all_member_nicknames = [user.nickname for user in all_members]
+            # 다른 멤버들과 모든 멤버들의 닉네임
+            member_nicknames = [user.nickname for user in hydration.member_users(party.id, exclude_id=employee_id)]
+            all_member_nicknames = [user.nickname for user in hydration.member_users(party.id)]
             
             events[party.party_date].append({
                 'type': '랜덤 런치' if party.is_from_match else '파티',
@@ -1412,115 +2490,64 @@ def get_events(employee_id):
                 'all_members': all_member_nicknames
             })
         
-        # 개인 일정 조회
-        schedules = PersonalSchedule.query.filter_by(employee_id=employee_id).all()
-        print(f"DEBUG: Found {len(schedules)} personal schedules for employee {employee_id}")
-        print(f"DEBUG: Today (Seoul): {today}")
+        # 개인 일정 조회: 구간 내 일반 일정 + 구간 종료 전에 시작한 반복 일정
+        schedules = PersonalSchedule.query.filter(
+            PersonalSchedule.employee_id == employee_id,
+            or_(
+                and_(PersonalSchedule.is_recurring == True, PersonalSchedule.schedule_date < end_str),
+                and_(PersonalSchedule.schedule_date >= start_str, PersonalSchedule.schedule_date < end_str)
+            )
+        ).all()
+        
+        # 개별 수정/삭제로 대체된 반복 일정 날짜
+        overridden_dates = {}
+        for schedule in schedules:
+            if schedule.original_schedule_id and not schedule.is_recurring:
+                try:
+                    override_date = datetime.strptime(schedule.schedule_date, '%Y-%m-%d').date()
+                except (ValueError, TypeError):
+                    continue
+                overridden_dates.setdefault(schedule.original_schedule_id, set()).add(override_date)
         
         for schedule in schedules:
-                            # 디버그 로그 제거
             # 날짜 데이터 검증 및 처리
             try:
                 # NaN 값이나 잘못된 날짜 형식 확인
                 if not schedule.schedule_date or 'NaN' in str(schedule.schedule_date):
                     print(f"Warning: Invalid schedule_date found: {schedule.schedule_date} for schedule ID {schedule.id}")
                     continue
-                    
-                # 과거 일정은 제외 (하지만 반복 일정은 시작일이 과거여도 미래 반복을 위해 포함)
                 schedule_date = datetime.strptime(schedule.schedule_date, '%Y-%m-%d').date()
-                # 디버그 로그 제거
-                
-                # 반복 일정이 아닌 경우에만 과거 일정 제외
-                if not schedule.is_recurring and schedule_date < today:
-                    # 디버그 로그 제거
-                    continue
-                    
+                recurrence_end_date = (datetime.strptime(schedule.recurrence_end_date, '%Y-%m-%d').date()
+                                       if schedule.recurrence_end_date else None)
             except (ValueError, TypeError) as e:
-                print(f"Warning: Failed to parse schedule_date '{schedule.schedule_date}' for schedule ID {schedule.id}: {e}")
+                print(f"Warning: Failed to parse dates of schedule ID {schedule.id}: {e}")
                 continue
-                
-            if schedule.schedule_date not in events:
-                events[schedule.schedule_date] = []
-                
-            # 반복 일정인 경우 미래 날짜에 확장
+            
+            # 반복 일정은 구간 내 날짜만 지연 전개 (반복 간격, 종료일, 개별 대체 날짜 반영)
             if schedule.is_recurring and schedule.recurrence_type:
-                # 디버그 로그 제거
-                
-                # 시작일부터 90일 후까지 반복 일정 생성
-                start_date = schedule_date
-                
-                # 시작일 자체를 무조건 추가 (과거여도 반복 일정의 시작일이므로 포함)
-                start_date_str = start_date.strftime('%Y-%m-%d')
-                if start_date_str not in events:
-                    events[start_date_str] = []
-                
-                events[start_date_str].append({
-                    'type': '기타 일정',
-                    'id': schedule.id,
-                    'title': schedule.title,
-                    'description': schedule.description,
-                    'date': start_date_str,
-                    'is_recurring': schedule.is_recurring,
-                    'recurrence_type': schedule.recurrence_type
-                })
-                                    # 디버그 로그 제거
-                
-                # 이후 반복 일정 생성 (시작일 이후부터 정확한 간격으로만)
-                max_weeks = 520 # 최대 520주(10년)까지 반복 (무제한에 가까운 기간)
-                for week in range(1, max_weeks + 1):
-                    if schedule.recurrence_type == 'weekly':
-                        # 매주 반복: 시작일로부터 정확히 7일, 14일, 21일... 후
-                        future_date = start_date + timedelta(days=week * 7)
-                    elif schedule.recurrence_type == 'monthly':
-                        # 매월 반복: 시작일로부터 정확히 30일, 60일, 90일... 후
-                        future_date = start_date + timedelta(days=week * 30)
-                    elif schedule.recurrence_type == 'yearly':
-                        # 매년 반복: 시작일로부터 정확히 365일, 730일... 후
-                        future_date = start_date + timedelta(days=week * 365)
-                    else:
-                        continue
-                    
-                    # 시작일과 동일한 날짜는 건너뛰기 (중복 방지)
-                    if future_date == start_date:
-                        print(f"DEBUG: Skipping duplicate start date: {future_date_str}")
-                        continue
-                    
-                    # 시작일이 오늘인 경우, 첫 번째 반복은 7일 후부터 시작
-                    if start_date == today and week == 1:
-                        print(f"DEBUG: Skipping first week for today start date")
-                        continue
-                    
-                    # 과거 날짜는 건너뛰기
-                    if future_date < today:
-                        continue
-                        
-                    future_date_str = future_date.strftime('%Y-%m-%d')
-                    if future_date_str not in events:
-                        events[future_date_str] = []
-                    
-                    events[future_date_str].append({
-                        'type': '기타 일정',
-                        'id': schedule.id,
-                        'title': schedule.title,
-                        'description': schedule.description,
-                        'date': future_date_str,
-                        'is_recurring': schedule.is_recurring,
-                        'recurrence_type': schedule.recurrence_type
-                    })
-                    # 디버그 로그 제거
+                occurrences = iter_occurrences(
+                    schedule_date, schedule.recurrence_type, window_start, window_end,
+                    interval=schedule.recurrence_interval,
+                    end_date=recurrence_end_date,
+                    excluded_dates=overridden_dates.get(schedule.id, ())
+                )
+            elif window_start <= schedule_date < window_end:
+                occurrences = [schedule_date]
             else:
-                # 일반 일정
-                events[schedule.schedule_date].append({
+                continue
+            
+            for occurrence in occurrences:
+                occurrence_str = occurrence.strftime('%Y-%m-%d')
+                events.setdefault(occurrence_str, []).append({
                     'type': '기타 일정',
                     'id': schedule.id,
                     'title': schedule.title,
                     'description': schedule.description,
-                    'date': schedule.schedule_date,
+                    'date': occurrence_str,
                     'is_recurring': schedule.is_recurring,
                     'recurrence_type': schedule.recurrence_type
                 })
         
-        # 디버그 로그 제거
         return jsonify(events)
         
     except Exception as e:
@@ -1580,6 +2607,9 @@ def add_personal_schedule():
         db.session.commit()
         print(f"[DEBUG] DB 커밋 완료 - ID: {new_schedule.id}")
         
+        # 추천 캐시에 가용성 변경 반영
+        emit_availability_delta([new_schedule.employee_id], new_schedule.schedule_date)
+        
         message = '반복 일정이 추가되었습니다.' if is_recurring else '개인 일정이 추가되었습니다.'
         return jsonify({'message': message, 'id': new_schedule.id}), 201
         
@@ -1749,6 +2779,7 @@ def delete_personal_schedule(schedule_id):
             # 이미 개별 일정이 있으면 삭제 (반복 일정이 다시 나타나도록)
             db.session.delete(existing_individual)
             db.session.commit()
+            emit_availability_delta([schedule.employee_id], target_date)
             print(f"[DEBUG] 반복 일정 개별 삭제 - 날짜: {target_date}, 개별 일정 ID: {existing_individual.id}")
             return jsonify({'message': '해당 날짜의 일정이 삭제되었습니다.'})
         else:
@@ -1764,6 +2795,7 @@ def delete_personal_schedule(schedule_id):
             )
             db.session.add(deleted_schedule)
             db.session.commit()
+            emit_availability_delta([schedule.employee_id], target_date)
             print(f"[DEBUG] 반복 일정 개별 삭제 - 날짜: {target_date}, 삭제 표시 일정 생성")
             return jsonify({'message': '해당 날짜의 일정이 삭제되었습니다.'})
     
@@ -1771,18 +2803,23 @@ def delete_personal_schedule(schedule_id):
         # 반복 일정 전체 삭제
         # 해당 반복 일정에서 파생된 개별 일정들도 함께 삭제
         individual_schedules = PersonalSchedule.query.filter_by(original_schedule_id=schedule.id).all()
+        affected_dates = [schedule.schedule_date] + [individual.schedule_date for individual in individual_schedules]
         for individual in individual_schedules:
             db.session.delete(individual)
         
+        employee_id = schedule.employee_id
         db.session.delete(schedule)
         db.session.commit()
+        emit_availability_delta([employee_id], *affected_dates)
         print(f"[DEBUG] 반복 일정 전체 삭제 - ID: {schedule.id}, 개별 일정 {len(individual_schedules)}개 삭제")
         return jsonify({'message': '모든 반복 일정이 삭제되었습니다.'})
     
     else:
         # 일반 일정 삭제
+        employee_id, schedule_date = schedule.employee_id, schedule.schedule_date
         db.session.delete(schedule)
         db.session.commit()
+        emit_availability_delta([employee_id], schedule_date)
         print(f"[DEBUG] 일반 일정 삭제 - ID: {schedule.id}")
         return jsonify({'message': '일정이 삭제되었습니다.'})
 
@@ -1961,8 +2998,56 @@ def sync_excel_data():
         print(f"Excel/CSV 데이터 동기화 오류: {e}")
         return jsonify({'error': str(e)}), 500
 
+def restaurant_radius_condition(lat, lon, radius_m):
+    """반경 조건 SQL - 위도/경도 범위로 후보를 좁힌 뒤 평면 근사 거리로 원 밖 제외 (10km에서 하버사인과 수 m 이내)
+
+    반경 내 식당 id 목록을 IN 조건으로 넘기지 않으므로 반경이 커도 바인딩 변수 수가 일정함
+    """
+    min_lat, max_lat, min_lon, max_lon, meters_per_lon_degree = radius_bounds(lat, lon, radius_m)
+    dy = (Restaurant.latitude - lat) * METERS_PER_LAT_DEGREE
+    dx = (Restaurant.longitude - lon) * meters_per_lon_degree
+    return and_(
+        Restaurant.latitude.between(min_lat, max_lat),
+        Restaurant.longitude.between(min_lon, max_lon),
+        dy * dy + dx * dx <= radius_m * radius_m
+    )
+
+# 목록 정렬 기준: (정렬 컬럼, 내림차순 여부) - 동률은 식당 id 오름차순으로 고정
+RESTAURANT_SORT_KEYS = {
+    'name': (Restaurant.name, False),
+    'rating_desc': (func.coalesce(RestaurantStats.avg_rating, 0.0), True),
+    'reviews_desc': (func.coalesce(RestaurantStats.review_count, 0), True),
+    'recommend_desc': (RestaurantStats.recommend_score_expression(), True),
+}
+
+def encode_restaurant_cursor(sort_value, restaurant_id):
+    """마지막 행의 (정렬 값, id)를 다음 페이지 커서 문자열로 변환"""
+    payload = json.dumps([sort_value, restaurant_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_restaurant_cursor(cursor):
+    """커서 문자열을 (정렬 값, id)로 복원 (형식이 잘못되면 ValueError)"""
+    try:
+        sort_value, restaurant_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return sort_value, int(restaurant_id)
+    except Exception:
+        raise ValueError('잘못된 커서입니다.')
+
+def search_restaurant_ids(query, category_filter=None, location=None):
+    """검색어와 일치하는 식당 id 목록 (검색 순위 순) - 카테고리/반경 필터도 인덱스에서 적용"""
+    search_index = get_restaurant_search_index()
+    restaurant_ids = search_index.search(query)
+    if category_filter:
+        restaurant_ids = search_index.filter_category(restaurant_ids, category_filter)
+    if location is not None:
+        lat, lon, radius_m = location
+        nearby = {restaurant_id for restaurant_id, _ in get_restaurant_spatial_index().within_radius(lat, lon, radius_m)}
+        restaurant_ids = [restaurant_id for restaurant_id in restaurant_ids if restaurant_id in nearby]
+    return restaurant_ids
+
 @app.route('/restaurants', methods=['GET'])
 def get_restaurants():
+    """식당 목록 - 검색어가 있으면 검색 순위 순(sort_by 무시), 없으면 sort_by 순"""
     # 먼저 파라미터 파싱
     query = request.args.get('query', '')
     sort_by = request.args.get('sort_by', 'name')
@@ -1970,82 +3055,29 @@ def get_restaurants():
     lat = request.args.get('lat', None)
     lon = request.args.get('lon', None)
     radius = request.args.get('radius', 10)  # 기본 10km
-    page = request.args.get('page', 1, type=int)
-    per_page = min(request.args.get('per_page', 50, type=int), 200)  # 한 번에 최대 200개까지
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(min(request.args.get('per_page', 50, type=int), 200), 1)  # 한 번에 최대 200개까지
+    after = request.args.get('after')  # 키셋 페이지네이션 커서 (있으면 page 대신 사용)
 
-    q = Restaurant.query
-    
-    # 카테고리 필터
-    if category_filter:
-        q = q.filter(Restaurant.category == category_filter)  # type: ignore
-    
-    # 검색어 필터
-    if query:
-        q = q.filter(or_(Restaurant.name.ilike(f'%{query}%'), Restaurant.category.ilike(f'%{query}%')))  # type: ignore
-    
-    # 지역 필터 (위도/경도가 제공된 경우)
+    location = None
     if lat and lon:
-        # 간단한 거리 계산 (대략적)
-        lat = float(lat)
-        lon = float(lon)
-        radius = float(radius)
-        
-        print(f"지역 필터링: 중심점({lat}, {lon}), 반지름 {radius}km")
-        
-        # 위도 1도 ≈ 111km, 경도 1도 ≈ 88.9km (한반도 기준)
-        lat_range = radius / 111.0
-        lon_range = radius / 88.9
-        
-        print(f"위도 범위: {lat - lat_range} ~ {lat + lat_range}")
-        print(f"경도 범위: {lon - lon_range} ~ {lon + lon_range}")
-        
-        # 좌표가 있는 식당만 필터링
-        q = q.filter(
-            Restaurant.latitude.isnot(None),
-            Restaurant.longitude.isnot(None),
-            Restaurant.latitude >= lat - lat_range,
-            Restaurant.latitude <= lat + lat_range,
-            Restaurant.longitude >= lon - lon_range,
-            Restaurant.longitude <= lon + lon_range
-        )
-        
-        # 필터링된 결과 수 확인
-        filtered_count = q.count()
-        print(f"지역 필터링 후 식당 수: {filtered_count}")
+        location = (float(lat), float(lon), float(radius) * 1000)
     
-    # 전체 데이터를 먼저 가져와서 정렬 (전체 데이터 기반 정렬)
     try:
-        all_restaurants = q.all()
+        if query:
+            restaurants, total_count, next_cursor = search_restaurants_page(
+                query, category_filter, location, page, per_page, after
+            )
+        else:
+            restaurants, total_count, next_cursor = list_restaurants_page(
+                sort_by, category_filter, location, page, per_page, after
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"쿼리 실행 오류: {e}")
         return jsonify({'error': '데이터베이스 쿼리 오류'}), 500
     
-    # 정렬 로직 개선
-    try:
-        if sort_by == 'rating_desc':
-            # 평점순 정렬 (내림차순)
-            all_restaurants.sort(key=lambda r: r.avg_rating, reverse=True)
-        elif sort_by == 'reviews_desc':
-            # 리뷰순 정렬 (내림차순)
-            all_restaurants.sort(key=lambda r: r.review_count, reverse=True)
-        elif sort_by == 'recommend_desc':
-            # 오찬 추천순 정렬 (내림차순) - 추천 데이터가 있는 경우
-            all_restaurants.sort(key=lambda r: getattr(r, 'recommend_count', 0), reverse=True)
-        else:
-            # 이름순 정렬 (기본값)
-            all_restaurants.sort(key=lambda r: r.name)
-    except Exception as e:
-        print(f"정렬 오류: {e}")
-        return jsonify({'error': '정렬 오류'}), 500
-    
-    # 전체 결과 수
-    total_count = len(all_restaurants)
-    
-    # 수동 페이지네이션 구현
-    start_index = (page - 1) * per_page
-    end_index = start_index + per_page
-    restaurants_q = all_restaurants[start_index:end_index]
-    
     # 페이지 정보 계산
     total_pages = (total_count + per_page - 1) // per_page
     
@@ -2059,8 +3091,8 @@ def get_restaurants():
             'longitude': r.longitude, 
             'rating': round(r.avg_rating, 1), 
             'review_count': r.review_count,
-            'recommend_count': get_restaurant_recommend_count(r.id)  # 오찬 추천 하트 개수 추가
-        } for r in restaurants_q]
+            'recommend_count': r.recommend_count  # 오찬 추천 하트 개수 추가
+        } for r in restaurants]
     except Exception as e:
         print(f"데이터 변환 오류: {e}")
         return jsonify({'error': '데이터 변환 오류'}), 500
@@ -2069,11 +3101,66 @@ def get_restaurants():
         'restaurants': restaurants_list,
         'total': total_count,
         'pages': total_pages,
-        'current_page': page,
-        'per_page': per_page
+        'current_page': None if after else page,  # 커서 요청은 페이지 번호가 없음
+        'per_page': per_page,
+        'next_cursor': next_cursor
     }
     return jsonify(response_data)
 
+def search_restaurants_page(query, category_filter, location, page, per_page, after):
+    """검색 순위 id 목록을 Python에서 잘라 해당 페이지 식당만 조회 (커서는 다음 페이지 시작 위치)"""
+    restaurant_ids = search_restaurant_ids(query, category_filter, location)
+    if after:
+        start, _ = decode_restaurant_cursor(after)
+        if not isinstance(start, int) or start < 0:
+            raise ValueError('잘못된 커서입니다.')
+    else:
+        start = (page - 1) * per_page
+    page_ids = restaurant_ids[start:start + per_page]
+    
+    loaded = {r.id: r for r in Restaurant.query.outerjoin(Restaurant.stats).options(
+        db.contains_eager(Restaurant.stats)
+    ).filter(Restaurant.id.in_(page_ids)).all()} if page_ids else {}
+    restaurants = [loaded[restaurant_id] for restaurant_id in page_ids if restaurant_id in loaded]
+    
+    next_cursor = None
+    if start + per_page < len(restaurant_ids):
+        next_cursor = encode_restaurant_cursor(start + per_page, page_ids[-1])
+    return restaurants, len(restaurant_ids), next_cursor
+
+def list_restaurants_page(sort_by, category_filter, location, page, per_page, after):
+    """정렬/필터/페이지네이션을 SQL에서 처리한 식당 목록"""
+    sort_column, descending = RESTAURANT_SORT_KEYS.get(sort_by, RESTAURANT_SORT_KEYS['name'])
+    q = Restaurant.query.outerjoin(Restaurant.stats).options(db.contains_eager(Restaurant.stats))
+    
+    # 카테고리 필터
+    if category_filter:
+        q = q.filter(Restaurant.category == category_filter)  # type: ignore
+    
+    # 지역 필터 (위도/경도가 제공된 경우) - 반경 조건을 SQL로 적용
+    if location is not None:
+        q = q.filter(restaurant_radius_condition(*location))
+    
+    # 전체 결과 수 (행을 불러오지 않고 COUNT만 실행)
+    total_count = q.order_by(None).count()
+    
+    page_q = q.add_columns(sort_column)
+    if after:
+        # 키셋 페이지네이션: 커서 행 이후부터 조회
+        cursor_value, cursor_id = decode_restaurant_cursor(after)
+        beyond = sort_column < cursor_value if descending else sort_column > cursor_value
+        page_q = page_q.filter(or_(beyond, and_(sort_column == cursor_value, Restaurant.id > cursor_id)))
+    page_q = page_q.order_by(sort_column.desc() if descending else sort_column.asc(), Restaurant.id.asc())
+    if not after:
+        page_q = page_q.offset((page - 1) * per_page)
+    rows = page_q.limit(per_page).all()
+    
+    next_cursor = None
+    if len(rows) == per_page:
+        last_restaurant, last_sort_value = rows[-1]
+        next_cursor = encode_restaurant_cursor(last_sort_value, last_restaurant.id)
+    return [r for r, _ in rows], total_count, next_cursor
+
 @app.route('/restaurants/<int:restaurant_id>', methods=['GET'])
 def get_restaurant_detail(restaurant_id):
     restaurant = Restaurant.query.get(restaurant_id)
@@ -2155,16 +3242,20 @@ def add_review(restaurant_id):
 
 @app.route('/restaurants/search', methods=['GET'])
 def search_restaurants():
-    """식당 검색 API - 드롭다운용"""
+    """식당 검색 API - 드롭다운용 (완전 일치 > 접두 일치 > 부분/초성 일치 순)"""
     query = request.args.get('query', '')
-    limit = request.args.get('limit', 10, type=int)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
     
     if not query:
         return jsonify([])
     
-    # 검색 쿼리
-    restaurants_query = Restaurant.query.filter(Restaurant.name.contains(query))  # type: ignore
-    restaurants = restaurants_query.limit(limit).all()
+    # 검색 인덱스에서 순위대로 id를 구한 뒤 해당 식당만 조회
+    restaurant_ids = get_restaurant_search_index().search(query, limit=limit)
+    if not restaurant_ids:
+        return jsonify([])
+    restaurants_by_id = {r.id: r for r in Restaurant.query.filter(Restaurant.id.in_(restaurant_ids)).all()}
+    restaurants = [restaurants_by_id[restaurant_id] for restaurant_id in restaurant_ids
+                   if restaurant_id in restaurants_by_id]
     
     # 간단한 정보만 반환
     restaurants_data = []
@@ -2559,80 +3650,33 @@ def get_popular_restaurants():
     """인기 식당 조회 (주간/월간)"""
     try:
         period = request.args.get('period', 'weekly')  # weekly, monthly
-        limit = min(int(request.args.get('limit', 10)), 50)  # 최대 50개
-        
-        # 기간 설정
-        end_date = datetime.now().date()
-        if period == 'weekly':
-            start_date = end_date - timedelta(days=7)
-        else:  # monthly
-            start_date = end_date - timedelta(days=30)
-        
-        # 방문 기록 기반 인기 식당 계산
-        popular_restaurants = db.session.query(
-            Restaurant,
-            func.count(RestaurantVisit.id).label('visit_count'),
-            func.avg(RestaurantVisit.party_size).label('avg_party_size')
-        ).join(RestaurantVisit, Restaurant.id == RestaurantVisit.restaurant_id)\
-         .filter(RestaurantVisit.visit_date >= start_date)\
-         .filter(RestaurantVisit.visit_date <= end_date)\
-         .group_by(Restaurant.id)\
-         .order_by(func.count(RestaurantVisit.id).desc())\
-         .limit(limit)\
-         .all()
-        
-        # 리뷰 기반 인기 식당도 포함
-        review_popular = db.session.query(
-            Restaurant,
-            func.count(Review.id).label('review_count'),
-            func.avg(Review.rating).label('avg_rating')
-        ).join(Review, Restaurant.id == Review.restaurant_id)\
-         .group_by(Restaurant.id)\
-         .order_by(func.count(Review.id).desc())\
-         .limit(limit)\
-         .all()
-        
-        # 결과 합치기 및 정렬
-        all_restaurants = {}
-        
-        # 방문 기반 점수
-        for restaurant, visit_count, avg_party_size in popular_restaurants:
-            all_restaurants[restaurant.id] = {
-                'restaurant': restaurant.to_dict(),
-                'visit_score': visit_count * 2 + (avg_party_size or 1),
-                'review_score': 0,
-                'total_score': 0
-            }
-        
-        # 리뷰 기반 점수
-        for restaurant, review_count, avg_rating in review_popular:
-            if restaurant.id in all_restaurants:
-                all_restaurants[restaurant.id]['review_score'] = review_count + (avg_rating or 0) * 2
-            else:
-                all_restaurants[restaurant.id] = {
-                    'restaurant': restaurant.to_dict(),
-                    'visit_score': 0,
-                    'review_score': review_count + (avg_rating or 0) * 2,
-                    'total_score': 0
-                }
-        
-        # 총점 계산 및 정렬
-        for restaurant_data in all_restaurants.values():
-            restaurant_data['total_score'] = restaurant_data['visit_score'] + restaurant_data['review_score']
-        
-        sorted_restaurants = sorted(
-            all_restaurants.values(),
-            key=lambda x: x['total_score'],
-            reverse=True
-        )[:limit]
+        if period not in RestaurantPopularity.PERIOD_DAYS:
+            period = 'monthly'
+        limit = min(int(request.args.get('limit', 10)), RestaurantPopularity.TOP_N)  # 최대 50개
+        
+        # 스케줄러가 미리 계산한 순위만 읽음 (아직 계산 전이면 빈 목록, computed_at은 null)
+        leaderboard = RestaurantPopularity.query.join(RestaurantPopularity.restaurant)\
+            .options(db.contains_eager(RestaurantPopularity.restaurant))\
+            .filter(RestaurantPopularity.period == period)\
+            .order_by(RestaurantPopularity.rank)\
+            .limit(limit).all()
+        
+        sorted_restaurants = [{
+            'restaurant': entry.restaurant.to_dict(),
+            'visit_score': entry.visit_score,
+            'review_score': entry.review_score,
+            'total_score': entry.total_score
+        } for entry in leaderboard]
         
         return jsonify({
             'period': period,
             'restaurants': sorted_restaurants,
-            'total_count': len(sorted_restaurants)
+            'total_count': len(sorted_restaurants),
+            'computed_at': leaderboard[0].computed_at.isoformat() if leaderboard else None
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/restaurants/visits/stats/<user_id>', methods=['GET'])
@@ -2689,87 +3733,43 @@ def get_personalized_recommendations(user_id):
     """사용자 취향 기반 맞춤 추천"""
     try:
         limit = min(int(request.args.get('limit', 10)), 20)  # 최대 20개
+        latitude = request.args.get('latitude', type=float)
+        longitude = request.args.get('longitude', type=float)
+        location = (latitude, longitude) if latitude is not None and longitude is not None else None
         
-        # 1. 사용자 리뷰 기반 선호 카테고리 분석
-        user_reviews = Review.query.filter_by(user_id=user_id).all()
-        category_preferences = {}
-        total_rating = 0
+        features = get_restaurant_features()
         
-        for review in user_reviews:
-            restaurant = Restaurant.query.get(review.restaurant_id)
-            if restaurant:
-                category = restaurant.category
-                if category not in category_preferences:
-                    category_preferences[category] = {'total_rating': 0, 'count': 0}
-                category_preferences[category]['total_rating'] += review.rating
-                category_preferences[category]['count'] += 1
-                total_rating += review.rating
-        
-        # 카테고리별 평균 평점 계산
-        for category in category_preferences:
-            category_preferences[category]['avg_rating'] = \
-                category_preferences[category]['total_rating'] / category_preferences[category]['count']
-        
-        # 2. 사용자 방문 기록 기반 선호 식당 분석
-        user_visits = RestaurantVisit.query.filter_by(user_id=user_id).all()
-        restaurant_preferences = {}
-        
-        for visit in user_visits:
-            restaurant_name = visit.restaurant.name
-            if restaurant_name not in restaurant_preferences:
-                restaurant_preferences[restaurant_name] = 0
-            restaurant_preferences[restaurant_name] += 1
+        # 1. 사용자 리뷰/방문 기록을 식당별로 한 번에 집계해 취향 벡터 생성
+        review_rows = db.session.query(
+            db.literal('review'), Review.restaurant_id, func.sum(Review.rating), func.count(Review.id)
+        ).filter(Review.user_id == user_id).group_by(Review.restaurant_id)
+        visit_rows = db.session.query(
+            db.literal('visit'), RestaurantVisit.restaurant_id, db.literal(0), func.count(RestaurantVisit.id)
+        ).filter(RestaurantVisit.user_id == user_id).group_by(RestaurantVisit.restaurant_id)
+        taste = TasteProfile(features, review_rows.union_all(visit_rows).all())
         
-        # 3. 추천 점수 계산
-        recommendations = []
-        all_restaurants = Restaurant.query.all()
+        # 2. 전체 식당 점수 벡터 계산 후 상위 k개 선택
+        scores = RecommendationScores(features, taste, location)
+        top_positions = scores.top_k(limit)
         
-        for restaurant in all_restaurants:
-            score = 0
-            
-            # 카테고리 선호도 점수 (0-5점)
-            if restaurant.category in category_preferences:
-                avg_rating = category_preferences[restaurant.category]['avg_rating']
-                score += avg_rating
-            
-            # 방문 빈도 점수 (0-3점)
-            if restaurant.name in restaurant_preferences:
-                visit_count = restaurant_preferences[restaurant.name]
-                score += min(visit_count * 0.5, 3)
-            
-            # 리뷰 점수 (0-2점)
-            if restaurant.reviews:
-                avg_restaurant_rating = sum(r.rating for r in restaurant.reviews) / len(restaurant.reviews)
-                score += min(avg_restaurant_rating / 5 * 2, 2)
-            
-            # 거리 점수 (현재 위치 기반, 0-1점)
-            # 여기서는 기본값으로 설정 (실제로는 현재 위치 정보 필요)
-            distance_score = 0.5
-            score += distance_score
-            
-            if score > 0:
+        top_ids = [int(features.ids[i]) for i in top_positions]
+        restaurants = {r.id: r for r in Restaurant.query.filter(Restaurant.id.in_(top_ids)).all()} if top_ids else {}
+        
+        recommendations = []
+        for i in top_positions:
+            restaurant = restaurants.get(int(features.ids[i]))
+            if restaurant:
                 recommendations.append({
                     'restaurant': restaurant.to_dict(),
-                    'score': round(score, 2),
-                    'reasons': []
+                    'score': round(float(scores.total[i]), 2),
+                    'reasons': scores.reasons(i)
                 })
-                
-                # 추천 이유 추가
-                if restaurant.category in category_preferences:
-                    recommendations[-1]['reasons'].append(f"선호하는 {restaurant.category}")
-                if restaurant.name in restaurant_preferences:
-                    recommendations[-1]['reasons'].append("자주 방문하는 곳")
-                if restaurant.reviews and any(r.rating >= 4 for r in restaurant.reviews):
-                    recommendations[-1]['reasons'].append("높은 평점")
-        
-        # 점수 순으로 정렬
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
         
         return jsonify({
             'user_id': user_id,
-            'recommendations': recommendations[:limit],
-            'total_count': len(recommendations),
-            'category_preferences': category_preferences
+            'recommendations': recommendations,
+            'total_count': int(np.count_nonzero(scores.total > 0)),
+            'category_preferences': taste.category_preferences(features)
         })
         
     except Exception as e:
@@ -2778,7 +3778,7 @@ def get_personalized_recommendations(user_id):
 # --- 데이터 분석 API ---
 @app.route('/analytics/user/<employee_id>', methods=['GET'])
 def get_user_analytics(employee_id):
-    """사용자 분석 데이터 조회"""
+    """사용자 분석 데이터 조회 (일별 롤업된 UserAnalytics 범위 조회)"""
     try:
         # 최근 30일 데이터
         end_date = datetime.now().date()
@@ -2788,44 +3788,29 @@ def get_user_analytics(employee_id):
             UserAnalytics.user_id == employee_id,  # type: ignore
             UserAnalytics.date >= start_date,  # type: ignore
             UserAnalytics.date <= end_date  # type: ignore
-        ).all()
-        
-        # 파티 참여 통계
-        parties_joined = Party.query.join(PartyMember, Party.id == PartyMember.party_id).filter(
-            PartyMember.employee_id == employee_id
-        ).count()
-        
-        # 리뷰 작성 통계
-        reviews_written = Review.query.filter_by(user_id=employee_id).count()
-        
-        # 친구 수 (일방적 관계)
-        friendships = Friendship.query.filter_by(
-            requester_id=employee_id,
-            status='accepted'
-        ).count()
-        
-        # 선호 카테고리 분석
-        user_reviews = Review.query.filter_by(user_id=employee_id).all()
-        category_counts = {}
-        total_rating = 0
-        
-        for review in user_reviews:
-            restaurant = Restaurant.query.get(review.restaurant_id)
-            if restaurant:
-                category = restaurant.category
-                category_counts[category] = category_counts.get(category, 0) + 1
-                total_rating += review.rating
-        
-        favorite_category = max(category_counts.items(), key=lambda x: x[1])[0] if category_counts else None
-        avg_rating = total_rating / len(user_reviews) if user_reviews else 0
+        ).order_by(UserAnalytics.date).all()
+        
+        # 가장 최근 롤업 기준 누적 통계 (아직 롤업되지 않은 사용자는 즉시 계산)
+        if analytics:
+            latest = analytics[-1]
+            totals = {
+                'total_parties_joined': latest.total_parties_joined or 0,
+                'total_reviews_written': latest.total_reviews_written or 0,
+                'total_friends_added': latest.total_friends_added or 0,
+                'favorite_restaurant_category': latest.favorite_restaurant_category,
+                'average_rating_given': latest.average_rating_given or 0
+            }
+        else:
+            totals = compute_user_rollups([employee_id])[employee_id]
         
         return jsonify({
-            'parties_joined': parties_joined,
-            'reviews_written': reviews_written,
-            'friends_count': friendships,
-            'favorite_category': favorite_category,
-            'average_rating': round(avg_rating, 1),
-            'activity_trend': [a.total_parties_joined for a in analytics]
+            'parties_joined': totals['total_parties_joined'],
+            'reviews_written': totals['total_reviews_written'],
+            'friends_count': totals['total_friends_added'],
+            'favorite_category': totals['favorite_restaurant_category'],
+            'average_rating': round(totals['average_rating_given'], 1),
+            'activity_trend': [a.total_parties_joined for a in analytics],
+            'as_of': analytics[-1].date.strftime('%Y-%m-%d') if analytics else None
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2873,42 +3858,16 @@ def get_restaurant_analytics(restaurant_id):
 def get_trends():
     """전체 트렌드 분석"""
     try:
-        # 인기 식당 카테고리
-        restaurants = Restaurant.query.all()
-        category_stats = {}
-        
-        for restaurant in restaurants:
-            reviews = Review.query.filter_by(restaurant_id=restaurant.id).all()
-            if reviews:
-                avg_rating = sum(r.rating for r in reviews) / len(reviews)
-                category_stats[restaurant.category] = category_stats.get(restaurant.category, {
-                    'count': 0,
-                    'total_rating': 0,
-                    'total_reviews': 0
-                })
-                category_stats[restaurant.category]['count'] += 1
-                category_stats[restaurant.category]['total_rating'] += avg_rating
-                category_stats[restaurant.category]['total_reviews'] += len(reviews)
+        history_days = min(request.args.get('history_days', 0, type=int), 90)
         
-        # 평균 평점으로 정렬
-        popular_categories = sorted(
-            [(cat, stats) for cat, stats in category_stats.items()],
-            key=lambda x: x[1]['total_rating'] / x[1]['count'],
-            reverse=True
-        )[:5]
+        # 인기 식당 카테고리 (시간 기반 캐시)
+        popular_categories = get_category_trends()
         
         # 최근 활성 사용자
         recent_users = User.query.order_by(desc(User.id)).limit(10).all()
         
-        return jsonify({
-            'popular_categories': [
-                {
-                    'category': cat,
-                    'average_rating': round(stats['total_rating'] / stats['count'], 1),
-                    'total_reviews': stats['total_reviews']
-                }
-                for cat, stats in popular_categories
-            ],
+        response = {
+            'popular_categories': popular_categories,
             'recent_active_users': [
                 {
                     'employee_id': user.employee_id,
@@ -2917,10 +3876,71 @@ def get_trends():
                 }
                 for user in recent_users
             ]
-        })
+        }
+        
+        # 일별 스냅샷 기반 카테고리 추이 (요청 시)
+        if history_days > 0:
+            response['category_history'] = get_category_history(history_days)
+        
+        return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def compute_category_trends(limit=5):
+    """카테고리별 (식당 평균 평점의 평균, 리뷰 수)를 Review JOIN Restaurant 집계 한 번으로 계산"""
+    per_restaurant = db.session.query(
+        Review.restaurant_id.label('restaurant_id'),
+        func.avg(Review.rating).label('avg_rating'),
+        func.count(Review.id).label('review_count')
+    ).group_by(Review.restaurant_id).subquery()
+    
+    average_rating = func.avg(per_restaurant.c.avg_rating)
+    rows = db.session.query(
+        Restaurant.category, average_rating, func.sum(per_restaurant.c.review_count)
+    ).join(per_restaurant, per_restaurant.c.restaurant_id == Restaurant.id)\
+     .group_by(Restaurant.category)\
+     .order_by(average_rating.desc(), Restaurant.category)\
+     .limit(limit).all()
+    
+    return [{
+        'category': category,
+        'average_rating': round(float(avg_rating), 1),
+        'total_reviews': int(total_reviews)
+    } for category, avg_rating, total_reviews in rows]
+
+TRENDS_CACHE_TTL_SECONDS = 600
+TRENDS_CACHE = {'value': None, 'expires_at': 0.0}
+
+def get_category_trends():
+    """카테고리 트렌드 (TTL 동안 캐시된 결과 재사용)"""
+    now = time.monotonic()
+    if TRENDS_CACHE['value'] is None or now >= TRENDS_CACHE['expires_at']:
+        TRENDS_CACHE['value'] = compute_category_trends()
+        TRENDS_CACHE['expires_at'] = now + TRENDS_CACHE_TTL_SECONDS
+    return TRENDS_CACHE['value']
+
+def get_category_history(days):
+    """RestaurantAnalytics 일별 스냅샷에서 카테고리별 평점/리뷰 수 추이 조회"""
+    start_date = get_seoul_today() - timedelta(days=days)
+    rows = db.session.query(
+        RestaurantAnalytics.date,
+        Restaurant.category,
+        func.avg(RestaurantAnalytics.average_rating),
+        func.sum(RestaurantAnalytics.total_reviews),
+        func.sum(RestaurantAnalytics.total_visits)
+    ).join(Restaurant, Restaurant.id == RestaurantAnalytics.restaurant_id)\
+     .filter(RestaurantAnalytics.date >= start_date, RestaurantAnalytics.total_reviews > 0)\
+     .group_by(RestaurantAnalytics.date, Restaurant.category)\
+     .order_by(RestaurantAnalytics.date, Restaurant.category).all()
+    
+    return [{
+        'date': snapshot_date.strftime('%Y-%m-%d'),
+        'category': category,
+        'average_rating': round(float(avg_rating or 0), 1),
+        'total_reviews': int(total_reviews or 0),
+        'total_visits': int(total_visits or 0)
+    } for snapshot_date, category, avg_rating, total_reviews, total_visits in rows]
+
 # --- 오프라인 데이터 API ---
 @app.route('/offline/sync', methods=['POST'])
 def sync_offline_data():
@@ -3579,11 +4599,12 @@ def get_all_parties():
         # 일반 파티 조회 (랜덤런치 제외)
         parties = Party.query.filter_by(is_from_match=False).order_by(desc(Party.id)).all()
     
+    hydration = PartyHydration(parties)
     return jsonify([{
         'id': p.id, 
         'title': p.title, 
         'restaurant_name': p.restaurant_name, 
-        'current_members': p.current_members, 
+        'current_members': hydration.member_count(p.id), 
         'max_members': p.max_members, 
         'party_date': p.party_date, 
         'party_time': p.party_time,
@@ -3656,6 +4677,9 @@ def create_party():
     
     db.session.commit()
     
+    # 추천 캐시에 가용성 변경 반영
+    emit_availability_delta([data['host_employee_id']] + list(additional_members), new_party.party_date)
+    
     # 포인트 획득
     host_employee_id = data['host_employee_id']
     if host_employee_id:
@@ -3753,6 +4777,9 @@ def join_party(party_id):
     db.session.add(new_member)
     db.session.commit()
     
+    # 추천 캐시에 가용성 변경 반영
+    emit_availability_delta([employee_id], party.party_date)
+    
     # 파티 참여 포인트
     earn_points(employee_id, 'party_joined', 30, '파티 참여')
     
@@ -3819,14 +4846,19 @@ def leave_party(party_id):
     # PartyMember 테이블에서 제거
     member = PartyMember.query.filter_by(party_id=party_id, employee_id=employee_id).first()
     if member:
+        affected_ids = [employee_id]
+        party_date = party.party_date
         db.session.delete(member)
         
         # 호스트가 나가는 경우, 파티 자체도 삭제 (랜덤런치 파티의 경우)
         if party.host_employee_id == employee_id and party.is_from_match:
-    
+            affected_ids.extend(party.member_ids)
             db.session.delete(party)
         
         db.session.commit()
+        
+        # 추천 캐시에 가용성 변경 반영
+        emit_availability_delta(affected_ids, party_date)
         print(f"✅ [파티나가기] 사용자 {employee_id}가 파티 {party_id}에서 성공적으로 나감")
         return jsonify({'message': '파티에서 나갔습니다.'})
     else:
@@ -3842,35 +4874,9 @@ def get_my_parties(employee_id):
         )
     ).all()
     
-    parties_data = []
-    for party in my_parties:
-        # PartyMember 테이블에서 멤버 정보 조회
-        party_members = PartyMember.query.filter_by(party_id=party.id).all()
-        member_ids = [member.employee_id for member in party_members]
-        members_details = [{
-            'employee_id': u.employee_id, 
-            'nickname': u.nickname,
-            'lunch_preference': u.lunch_preference,
-            'main_dish_genre': u.main_dish_genre
-        } for u in User.query.filter(User.employee_id.in_(member_ids)).all()]  # type: ignore
-        
-        party_data = {
-            'id': party.id,
-            'host_employee_id': party.host_employee_id,
-            'title': party.title,
-            'restaurant_name': party.restaurant_name,
-            'restaurant_address': party.restaurant_address,
-            'party_date': party.party_date,
-            'party_time': party.party_time,
-            'meeting_location': party.meeting_location,
-            'max_members': party.max_members,
-            'current_members': party.current_members,
-            'members': members_details,
-            'is_from_match': party.is_from_match
-        }
-        parties_data.append(party_data)
-    
-    return jsonify(parties_data)
+    # 멤버/사용자 정보를 일괄 조회하여 파티 카드 생성
+    hydration = PartyHydration(my_parties)
+    return jsonify([hydration.card(party) for party in my_parties])
 
 @app.route('/my_regular_parties/<employee_id>', methods=['GET'])
 def get_my_regular_parties(employee_id):
@@ -3887,35 +4893,9 @@ def get_my_regular_parties(employee_id):
         )
     ).all()
     
-    parties_data = []
-    for party in my_regular_parties:
-        # PartyMember 테이블에서 멤버 정보 조회
-        party_members = PartyMember.query.filter_by(party_id=party.id).all()
-        member_ids = [member.employee_id for member in party_members]
-        members_details = [{
-            'employee_id': u.employee_id, 
-            'nickname': u.nickname,
-            'lunch_preference': u.lunch_preference,
-            'main_dish_genre': u.main_dish_genre
-        } for u in User.query.filter(User.employee_id.in_(member_ids)).all()]  # type: ignore
-        
-        party_data = {
-            'id': party.id,
-            'host_employee_id': party.host_employee_id,
-            'title': party.title,
-            'restaurant_name': party.restaurant_name,
-            'restaurant_address': party.restaurant_address,
-            'party_date': party.party_date,
-            'party_time': party.party_time,
-            'meeting_location': party.meeting_location,
-            'max_members': party.max_members,
-            'current_members': party.current_members,
-            'members': members_details,
-            'is_from_match': party.is_from_match
-        }
-        parties_data.append(party_data)
-    
-    return jsonify(parties_data)
+    # 멤버/사용자 정보를 일괄 조회하여 파티 카드 생성
+    hydration = PartyHydration(my_regular_parties)
+    return jsonify([hydration.card(party) for party in my_regular_parties])
 
 @app.route('/parties/<int:party_id>', methods=['DELETE'])
 def delete_party(party_id):
@@ -4460,215 +5440,96 @@ def get_my_chats(employee_id):
     if employee_id != authenticated_user.employee_id:
         return jsonify({'error': '자신의 채팅 목록만 조회할 수 있습니다'}), 403
     
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(min(request.args.get('per_page', 100, type=int), 200), 1)  # 한 번에 최대 200개까지
+    
+    # 사용자가 속한 채팅방 키 (파티/단골파티 멤버십 + 일반 채팅방 참여)
+    memberships = db.union(
+        db.select(db.literal('party').label('chat_type'), PartyMember.party_id.label('chat_id')).where(
+            PartyMember.employee_id == employee_id),
+        db.select(db.literal('dangolpot').label('chat_type'), DangolPotMember.dangolpot_id.label('chat_id')).where(
+            DangolPotMember.employee_id == employee_id),
+        db.select(db.case((ChatRoom.type == 'group', 'group'), else_='custom').label('chat_type'),
+                  ChatParticipant.room_id.label('chat_id')).join(
+            ChatRoom, ChatRoom.id == ChatParticipant.room_id).where(ChatParticipant.user_id == employee_id),
+    ).subquery()
+    
+    rows = db.session.query(
+        memberships.c.chat_type, memberships.c.chat_id,
+        ChatRoomSummary.last_message_preview, ChatRoomSummary.last_message_time, ChatRoomSummary.member_count,
+        Party.title, Party.restaurant_name, Party.max_members, Party.is_from_match,
+        DangolPot.name, DangolPot.tags, ChatRoom.name
+    ).outerjoin(ChatRoomSummary, and_(
+        ChatRoomSummary.chat_type == memberships.c.chat_type, ChatRoomSummary.chat_id == memberships.c.chat_id
+    )).outerjoin(Party, and_(
+        memberships.c.chat_type == 'party', Party.id == memberships.c.chat_id
+    )).outerjoin(DangolPot, and_(
+        memberships.c.chat_type == 'dangolpot', DangolPot.id == memberships.c.chat_id
+    )).outerjoin(ChatRoom, and_(
+        memberships.c.chat_type.in_(('group', 'custom')), ChatRoom.id == memberships.c.chat_id
+    )).filter(
+        # 삭제된 파티/단골파티/채팅방에 남은 멤버십 제외
+        or_(Party.id.isnot(None), DangolPot.id.isnot(None), ChatRoom.id.isnot(None))
+    ).order_by(
+        # 마지막 메시지 시간 기준으로 정렬 (메시지가 없는 채팅방은 뒤로)
+        ChatRoomSummary.last_message_time.is_(None), desc(ChatRoomSummary.last_message_time),
+        desc(memberships.c.chat_id)
+    ).offset((page - 1) * per_page).limit(per_page).all()
+
+    # 안읽은 메시지 수: 방별 내 읽음 위치 이후 메시지 수 (그룹 쿼리 1회)
+    unread_counts = {}
+    chat_keys = [(chat_type, chat_id) for chat_type, chat_id, *_ in rows]
+    if chat_keys:
+        unread_counts = {(chat_type, chat_id): count for chat_type, chat_id, count in db.session.query(
+            ChatMessage.chat_type, ChatMessage.chat_id, func.count(ChatMessage.id)
+        ).outerjoin(ChatReadCursor, and_(
+            ChatReadCursor.chat_type == ChatMessage.chat_type,
+            ChatReadCursor.chat_id == ChatMessage.chat_id,
+            ChatReadCursor.user_id == employee_id
+        )).filter(
+            tuple_(ChatMessage.chat_type, ChatMessage.chat_id).in_(chat_keys),
+            ChatMessage.id > func.coalesce(ChatReadCursor.last_read_message_id, 0)
+        ).group_by(ChatMessage.chat_type, ChatMessage.chat_id).all()}
+
     chat_list = []
-    
-    print(f"=== DEBUG: 채팅방 목록 조회 시작 (사용자: {employee_id}) ===")
-    
-    # 파티 채팅방들 (랜덤 런치 제외)
-    party_chat_list = []
-    joined_parties = Party.query.join(PartyMember, Party.id == PartyMember.party_id).filter(
-        PartyMember.employee_id == employee_id
-    ).order_by(desc(Party.id)).all()
-    
-    # 중복 제거를 위한 set
-    seen_party_ids = set()
-    
-    for party in joined_parties:
-        # 중복 체크
-        if party.id in seen_party_ids:
-            continue
-        seen_party_ids.add(party.id)
-        
-        # 랜덤 런치(is_from_match=True)는 일반 채팅방으로 분류하지 않음
-        if party.is_from_match:
-            continue
-        
-        # 파티의 마지막 메시지 가져오기
-        last_message = ChatMessage.query.filter_by(
-            chat_type='party',
-            chat_id=party.id
-        ).order_by(desc(ChatMessage.created_at)).first()
-        
-        # 최근 메시지 미리보기 (최대 15글자)
-        if last_message:
-            message_preview = last_message.message
-            if len(message_preview) > 15:
-                message_preview = message_preview[:15] + '...'
-        else:
-            message_preview = f"{party.restaurant_name} | {party.current_members}/{party.max_members}명"
-        
-        party_chat_list.append({
-            'id': party.id, 
-            'type': 'party', 
-            'title': party.title, 
-            'subtitle': message_preview,
-            'is_from_match': party.is_from_match,
-            'last_message_time': last_message.created_at if last_message else None,
-            'unread_count': 3 if party.id % 2 == 0 else 0  # 테스트용 안읽은 메시지 수
-        })
-    
-    # 단골파티 채팅방들
-    pot_chat_list = []
-    joined_pots = DangolPot.query.filter(DangolPot.members.contains(employee_id)).order_by(desc(DangolPot.created_at)).all()  # type: ignore
-    
-    # 중복 제거를 위한 set
-    seen_pot_ids = set()
-    
-    for pot in joined_pots:
-        # 중복 체크
-        if pot.id in seen_pot_ids:
-            continue
-        seen_pot_ids.add(pot.id)
-        
-        # 단골파티의 마지막 메시지 가져오기
-        last_message = ChatMessage.query.filter_by(
-            chat_type='dangolpot',
-            chat_id=pot.id
-        ).order_by(desc(ChatMessage.created_at)).first()
-        
+    for (chat_type, chat_id, preview, last_message_time, member_count,
+         party_title, restaurant_name, max_members, is_from_match, pot_name, pot_tags, room_name) in rows:
         # 최근 메시지 미리보기 (최대 15글자)
-        if last_message:
-            message_preview = last_message.message
-            if len(message_preview) > 15:
-                message_preview = message_preview[:15] + '...'
-        else:
-            message_preview = pot.tags
-        
-        pot_chat_list.append({
-            'id': pot.id, 
-            'type': 'dangolpot', 
-            'title': pot.name, 
-            'subtitle': message_preview,
-            'last_message_time': last_message.created_at if last_message else None,
-            'unread_count': 5 if pot.id % 3 == 0 else 0  # 테스트용 안읽은 메시지 수
-        })
-    
-    # 일반 채팅방들 (투표로 생성된 채팅방 포함)
-    user_participations = ChatParticipant.query.filter_by(user_id=employee_id).all()
-    print(f"=== DEBUG: 사용자 참여 채팅방 수: {len(user_participations)} ===")
-    
-    custom_chat_list = []
-    
-    # 중복 제거를 위한 set
-    seen_chat_room_ids = set()
-    
-    # 랜덤 런치 채팅방들도 일반 채팅방으로 분류
-    random_lunch_parties = Party.query.join(PartyMember).filter(
-        PartyMember.employee_id == employee_id,
-        Party.is_from_match == True
-    ).order_by(desc(Party.id)).all()
-    
-    for party in random_lunch_parties:
-        # 중복 체크 (랜덤 런치용 별도 체크)
-        if party.id in seen_chat_room_ids:
-            continue
-        seen_chat_room_ids.add(party.id)
-        
-        # 랜덤 런치의 마지막 메시지 가져오기
-        last_message = ChatMessage.query.filter_by(
-            chat_type='party',
-            chat_id=party.id
-        ).order_by(desc(ChatMessage.created_at)).first()
+        message_preview = preview
+        if message_preview is not None and len(message_preview) > 15:
+            message_preview = message_preview[:15] + '...'
         
-        # 최근 메시지 미리보기 (최대 15글자)
-        if last_message:
-            message_preview = last_message.message
-            if len(message_preview) > 15:
-                message_preview = message_preview[:15] + '...'
+        if chat_type == 'party':
+            chat_list.append({
+                'id': chat_id,
+                'type': 'party',
+                'title': party_title,
+                'subtitle': message_preview if preview is not None else f"{restaurant_name} | {member_count or 0}/{max_members}명",
+                'is_from_match': is_from_match,
+                'last_message_time': last_message_time,
+                'unread_count': unread_counts.get((chat_type, chat_id), 0)
+            })
+        elif chat_type == 'dangolpot':
+            chat_list.append({
+                'id': chat_id,
+                'type': 'dangolpot',
+                'title': pot_name,
+                'subtitle': message_preview if preview is not None else pot_tags,
+                'last_message_time': last_message_time,
+                'unread_count': unread_counts.get((chat_type, chat_id), 0)
+            })
         else:
-            message_preview = f"{party.restaurant_name} | {party.current_members}/{party.max_members}명"
-        
-        custom_chat_list.append({
-            'id': party.id, 
-            'type': 'party', 
-            'title': party.title, 
-            'subtitle': message_preview,
-            'is_from_match': party.is_from_match,
-            'last_message_time': last_message.created_at if last_message else None,
-            'unread_count': 3 if party.id % 2 == 0 else 0  # 테스트용 안읽은 메시지 수
-        })
-    
-    # 일반 채팅방용 별도 중복 체크
-    seen_custom_chat_ids = set()
-    
-    for participation in user_participations:
-        chat_room = ChatRoom.query.get(participation.room_id)
-        print(f"=== DEBUG: 채팅방 ID {participation.room_id} - 타입: {chat_room.type if chat_room else 'None'} - 이름: {chat_room.name if chat_room else 'None'} ===")
-        
-        # 중복 체크 (일반 채팅방용 별도 체크)
-        if chat_room and chat_room.id in seen_custom_chat_ids:
-            print(f"=== DEBUG: 채팅방 ID {participation.room_id} 중복 제외 ===")
-            continue
-        if chat_room:
-            seen_custom_chat_ids.add(chat_room.id)
-        
-        print(f"=== DEBUG: 채팅방 ID {participation.room_id} 조건 체크 - chat_room: {chat_room is not None}, type: {chat_room.type if chat_room else 'None'} ===")
-        
-        if chat_room:  # 모든 채팅방을 포함
-            # 채팅방 타입에 따라 올바른 chat_type 결정
-            if chat_room.type == 'group':
-                chat_type = 'group'
-            elif chat_room.type == 'friend':
-                chat_type = 'custom'
-            else:
-                chat_type = 'custom'  # 기본값
-            
-            # 마지막 메시지 가져오기 (실제 채팅방 타입에 맞는 chat_type 사용)
-            last_message = ChatMessage.query.filter_by(
-                chat_type=chat_type, 
-                chat_id=chat_room.id
-            ).order_by(desc(ChatMessage.created_at)).first()
-            
-            print(f"=== DEBUG: chat_type='{chat_type}'으로 검색한 마지막 메시지: {last_message.message if last_message else 'None'} ===")
-            
-            # 마지막 메시지가 없으면 다른 chat_type으로도 시도
-            if not last_message:
-                last_message = ChatMessage.query.filter_by(
-                    chat_id=chat_room.id
-                ).order_by(desc(ChatMessage.created_at)).first()
-                
-                print(f"=== DEBUG: chat_id로만 검색한 마지막 메시지: {last_message.message if last_message else 'None'} ===")
-            
-            # 최근 메시지 미리보기 (최대 15글자)
-            message_preview = last_message.message if last_message else '새로운 채팅방입니다'
-            if len(message_preview) > 15:
-                message_preview = message_preview[:15] + '...'
-            
-            # 프론트엔드 호환성을 위해 type='group'인 채팅방을 'custom'으로 반환
-            frontend_type = 'custom' if chat_room.type == 'group' else chat_type
-            
-            custom_chat_list.append({
-                'id': chat_room.id, 
-                'type': frontend_type, 
-                'title': chat_room.name or '새로운 채팅방',
-                'subtitle': message_preview,
-                'last_message': last_message.message if last_message else None,
-                'last_message_time': last_message.created_at if last_message else None,
-                'unread_count': 2 if chat_room.id % 2 == 0 else 0  # 테스트용 안읽은 메시지 수
+            # 프론트엔드 호환성을 위해 type='group'인 채팅방도 'custom'으로 반환
+            chat_list.append({
+                'id': chat_id,
+                'type': 'custom',
+                'title': room_name or '새로운 채팅방',
+                'subtitle': message_preview if preview is not None else '새로운 채팅방입니다',
+                'last_message': preview,
+                'last_message_time': last_message_time,
+                'unread_count': unread_counts.get((chat_type, chat_id), 0)
             })
     
-    # 마지막 메시지 시간 기준으로 정렬 (최신 메시지가 있는 채팅방이 위로)
-    custom_chat_list.sort(key=lambda x: x['last_message_time'] or datetime.min, reverse=True)
-    
-    # 파티 채팅방들도 마지막 메시지 시간 기준으로 정렬
-    party_chat_list.sort(key=lambda x: x['last_message_time'] or datetime.min, reverse=True)
-    
-    # 단골파티 채팅방들도 마지막 메시지 시간 기준으로 정렬
-    pot_chat_list.sort(key=lambda x: x['last_message_time'] or datetime.min, reverse=True)
-    
-    # 모든 채팅방을 하나의 리스트로 합치고 마지막 메시지 시간 기준으로 정렬
-    all_chats = party_chat_list + pot_chat_list + custom_chat_list
-    all_chats.sort(key=lambda x: x['last_message_time'] or datetime.min, reverse=True)
-    
-    # last_message_time 필드 제거하지 않음 (프론트엔드에서 사용)
-    # 디버깅을 위한 로그 추가
-    print(f"=== DEBUG: 최종 채팅방 목록 ===")
-    for i, chat in enumerate(all_chats):
-        print(f"채팅방 {i+1}: {chat['title']} - last_message_time: {chat.get('last_message_time')} - unread_count: {chat.get('unread_count')}")
-    
-    chat_list = all_chats
-    
-    print(f"=== DEBUG: 최종 채팅방 목록: {chat_list} ===")
     return jsonify(chat_list)
 
 @app.route('/users/<employee_id>', methods=['GET'])
@@ -4833,101 +5694,43 @@ def get_user_preferences(employee_id):
 # --- 채팅 API ---
 @app.route('/chat/messages/<chat_type>/<int:chat_id>', methods=['GET'])
 def get_chat_messages(chat_type, chat_id):
-    print(f"=== DEBUG: 채팅 메시지 조회 - chat_type: {chat_type}, chat_id: {chat_id} ===")
+    """채팅 메시지 조회 (최신 메시지부터 limit개, 이전 메시지는 응답의 첫 id를 before_id로 다시 요청)"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)  # 기본 50개, 최대 200개
+    before_id = request.args.get('before_id', type=int)
     
     # 프론트엔드 호환성을 위해 chat_type='custom'인 경우 실제 저장된 chat_type 확인
-    actual_chat_type = chat_type
-    if chat_type == 'custom':
-        # ChatRoom에서 실제 타입 확인
-        chat_room = ChatRoom.query.get(chat_id)
-        if chat_room and chat_room.type == 'group':
-            actual_chat_type = 'group'
-    
-    messages = ChatMessage.query.filter_by(chat_type=actual_chat_type, chat_id=chat_id).order_by(ChatMessage.created_at).all()
-    print(f"=== DEBUG: 조회된 메시지 수: {len(messages)} ===")
-    
-    for msg in messages:
-        print(f"=== DEBUG: 메시지 - ID: {msg.id}, 발신자: {msg.sender_nickname}, 내용: {msg.message[:50]}... ===")
-
-    # 채팅방 참여자 목록 구하기
-    if chat_type == 'party':
-        party = Party.query.get(chat_id)
-        if party:
-            # PartyMember 테이블에서 멤버 ID 가져오기
-            party_members = PartyMember.query.filter_by(party_id=chat_id).all()
-            member_ids = [member.employee_id for member in party_members]
-        else:
-            member_ids = []
-    elif chat_type == 'dangolpot':
-        pot = DangolPot.query.get(chat_id)
-        if pot and pot.members:
-            member_ids = [mid.strip() for mid in pot.members.split(',') if mid.strip()]
-        else:
-            member_ids = []
-    elif chat_type == 'custom':
-        # custom 채팅은 ChatRoom/ChatParticipant에서 조회 (투표로 생성된 채팅방 포함)
-        room = ChatRoom.query.get(chat_id)
-        if room:
-            participants = ChatParticipant.query.filter_by(room_id=room.id).all()
-            member_ids = [p.user_id for p in participants]
-        else:
-            member_ids = []
-    else:
-        member_ids = []
+    actual_chat_type = resolve_chat_type(chat_type, chat_id)
+    flush_pending_chat_messages(actual_chat_type, chat_id)
+    
+    # (chat_type, chat_id, id) 인덱스 역순 탐색 후 오래된 순으로 뒤집음
+    query = db.session.query(
+        ChatMessage.id, ChatMessage.sender_employee_id, ChatMessage.sender_nickname, ChatMessage.message,
+        ChatMessage.created_at, ChatMessage.message_type, ChatMessage.voting_session_id
+    ).filter(ChatMessage.chat_type == actual_chat_type, ChatMessage.chat_id == chat_id)
+    if before_id is not None:
+        query = query.filter(ChatMessage.id < before_id)
+    messages = query.order_by(desc(ChatMessage.id)).limit(limit).all()
+    messages.reverse()
+
+    # 멤버별 읽음 위치로 메시지별 안읽은 수 계산
+    read_state = ChatReadState(actual_chat_type, chat_id)
 
     result = []
     for msg in messages:
-        read_count = ChatMessageRead.query.filter_by(message_id=msg.id).count()
-        unread_count = max(0, len(member_ids) - read_count)
-        
         message_data = {
             'id': msg.id,
             'sender_employee_id': msg.sender_employee_id,
             'sender_nickname': msg.sender_nickname,
             'message': msg.message,
             'created_at': format_korean_time(msg.created_at),
-            'unread_count': unread_count
+            'unread_count': read_state.unread_count(msg.id)
         }
         
-        # 투표 알림 메시지인지 확인 (시스템 메시지 + 특정 패턴)
-        if (msg.sender_employee_id == 'SYSTEM' and 
-            '📊 새로운 투표가 시작되었습니다!' in msg.message and
-            '이 메시지를 터치하여 투표에 참여하세요' in msg.message):
-            message_data['message_type'] = 'voting_notification'
-            
-            # 해당 채팅방의 최신 투표 세션 ID 찾기
-            latest_voting = VotingSession.query.filter_by(
-                chat_room_id=chat_id,
-                status='active'
-            ).order_by(VotingSession.created_at.desc()).first()
-            
-            if latest_voting:
-                message_data['voting_session_id'] = latest_voting.id
-        
-        # 투표 삭제 메시지인지 확인
-        elif (msg.sender_employee_id == 'SYSTEM' and 
-              '🚫' in msg.message and 
-              '투표가 삭제되었습니다' in msg.message):
-            message_data['message_type'] = 'voting_cancelled'
-        
-        # 투표 완료 메시지인지 확인
-        elif (msg.sender_employee_id == 'SYSTEM' and 
-              ('⏰' in msg.message and '투표가 마감되었습니다' in msg.message) or
-              ('🎉' in msg.message and '투표가 완료되었습니다' in msg.message)):
-            message_data['message_type'] = 'voting_completed'
-            # 투표 완료 메시지에서 투표 세션 ID 찾기
-            completed_voting = VotingSession.query.filter_by(
-                chat_room_id=chat_id,
-                status='completed'
-            ).order_by(desc(VotingSession.confirmed_at)).first()
-            if completed_voting:
-                message_data['voting_session_id'] = completed_voting.id
-        
-        # 투표 정보 수정 메시지인지 확인
-        elif (msg.sender_employee_id == 'SYSTEM' and 
-              '📝' in msg.message and 
-              '투표 정보가 수정되었습니다' in msg.message):
-            message_data['message_type'] = 'voting_updated'
+        # 투표 알림/취소/완료/수정 등 시스템 메시지 종류
+        if msg.message_type != 'text':
+            message_data['message_type'] = msg.message_type
+            if msg.voting_session_id is not None:
+                message_data['voting_session_id'] = msg.voting_session_id
         
         result.append(message_data)
     return jsonify(result)
@@ -4992,13 +5795,20 @@ def mark_message_read():
     if not message_id or not user_id:
         return jsonify({'message': 'message_id와 user_id가 필요합니다.'}), 400
 
-    # 이미 읽음 처리된 경우 중복 저장 방지
-    existing = ChatMessageRead.query.filter_by(message_id=message_id, user_id=user_id).first()
-    if existing:
+    try:
+        message_id = int(message_id)
+    except (TypeError, ValueError):
+        return jsonify({'message': 'message_id는 숫자여야 합니다.'}), 400
+
+    room = find_chat_message_room(message_id)
+    if not room:
+        return jsonify({'message': '메시지를 찾을 수 없습니다.'}), 404
+
+    # 읽음 위치가 이미 이 메시지 이후면 변경 없음
+    chat_type, chat_id = room
+    if not advance_read_cursor(db.session.connection(), chat_type, chat_id, user_id, message_id):
         return jsonify({'message': '이미 읽음 처리됨.'}), 200
 
-    read = ChatMessageRead(message_id=message_id, user_id=user_id)
-    db.session.add(read)
     db.session.commit()
     return jsonify({'message': '읽음 처리 완료.'}), 201
 
@@ -5259,46 +6069,46 @@ def handle_leave_chat(data):
 
 @socketio.on('send_message')
 def handle_send_message(data):
+    """메시지 전송 - 공유 id 시퀀스가 있으면 id를 할당해 바로 전송하고 저장은 쓰기 지연 작성기에 맡김"""
     chat_type = data.get('chat_type')
     chat_id = data.get('chat_id')
     sender_employee_id = data.get('sender_employee_id')
     message = data.get('message')
     
-    print(f'Send message event received: {data}')
-    
     if not all([chat_type, chat_id, sender_employee_id, message]):
         print('Missing required fields in send_message event')
         return
     
     try:
-        # 사용자 정보 조회
-        user = User.query.filter_by(employee_id=sender_employee_id).first()
-        if not user:
+        # 사용자 닉네임 (캐시)
+        nickname = get_user_nickname(sender_employee_id)
+        if nickname is None:
             print(f'User not found: {sender_employee_id}')
             return
         
-        # 메시지 저장
-        new_message = ChatMessage()
-        new_message.chat_type = chat_type
-        new_message.chat_id = chat_id
-        new_message.sender_employee_id = sender_employee_id
-        new_message.sender_nickname = user.nickname
-        new_message.message = message
-        db.session.add(new_message)
-        db.session.commit()
-        print(f'Message saved with ID: {new_message.id}')
+        record = {
+            'chat_type': chat_type,
+            'chat_id': int(chat_id),
+            'sender_employee_id': sender_employee_id,
+            'sender_nickname': nickname,
+            'message': message,
+            'created_at': datetime.utcnow()
+        }
+        # 배치 모드는 공유 시퀀스에서 id를 받아 바로 전송, sync 모드는 저장이 끝난 뒤 DB id로 전송
+        room = f"{chat_type}_{chat_id}"
+        if CHAT_MESSAGE_IDS is not None:
+            record['id'] = CHAT_MESSAGE_IDS.next_id(room)
+        CHAT_MESSAGE_WRITER.submit(record)
         
         # 채팅방의 모든 사용자에게 메시지 전송
-        room = f"{chat_type}_{chat_id}"
         message_data = {
-            'id': new_message.id,
+            'id': record['id'],
             'sender_employee_id': sender_employee_id,
-            'sender_nickname': user.nickname,
+            'sender_nickname': nickname,
             'message': message,
-            'created_at': format_korean_time(new_message.created_at),
+            'created_at': format_korean_time(record['created_at']),
             'unread_count': 0
         }
-        print(f'Emitting new_message to room {room}: {message_data}')
         emit('new_message', message_data, to=room)
         
     except Exception as e:
@@ -5306,66 +6116,81 @@ def handle_send_message(data):
         import traceback
         traceback.print_exc()
 
+def lock_read_cursors(connection, chat_type, chat_id, user_ids):
+    """읽음 위치 행에 쓰기 잠금을 먼저 잡음 (다른 워커가 같은 행을 바꾸는 동안 이전 위치를 읽지 않도록)"""
+    cursors = ChatReadCursor.__table__
+    connection.execute(cursors.update().where(
+        cursors.c.chat_type == chat_type, cursors.c.chat_id == chat_id, cursors.c.user_id.in_(user_ids)
+    ).values(updated_at=cursors.c.updated_at))
+
+def apply_read_receipts(batch):
+    """모인 읽음 위치를 한 트랜잭션에 반영하고 방마다 안읽음 감소분을 한 번씩 전송
+
+    실제로 바뀐 읽음 위치의 (이전 위치, 새 위치] 구간만 전송하므로 여러 워커가 같은 사용자의 읽음을
+    처리해도 구간이 겹치지 않음 (실패 시 롤백 후 예외를 다시 던져 배치가 재시도되도록 함)
+    """
+    cursors = ChatReadCursor.__table__
+    room_reads = {}
+    with app.app_context():
+        try:
+            connection = db.session.connection()
+            # 여러 워커가 같은 순서로 잠그도록 방/사용자 순으로 처리
+            for (chat_type, chat_id), readers in sorted(batch.items()):
+                actual_chat_type = resolve_chat_type(chat_type, chat_id)
+                user_ids = sorted(readers)
+                lock_read_cursors(connection, actual_chat_type, chat_id, user_ids)
+                previous = dict(connection.execute(db.select(cursors.c.user_id, cursors.c.last_read_message_id).where(
+                    cursors.c.chat_type == actual_chat_type, cursors.c.chat_id == chat_id,
+                    cursors.c.user_id.in_(user_ids)
+                )).all())
+                reads = []
+                for user_id in user_ids:
+                    message_id = readers[user_id]
+                    after_message_id = previous.get(user_id, 0)
+                    if message_id > after_message_id and advance_read_cursor(connection, actual_chat_type, chat_id,
+                                                                             user_id, message_id):
+                        reads.append({
+                            'user_id': user_id,
+                            'after_message_id': after_message_id,
+                            'up_to_message_id': message_id
+                        })
+                if reads:
+                    room_reads[(chat_type, chat_id)] = reads
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    # 클라이언트는 각 read의 (after_message_id, up_to_message_id] 구간 메시지마다 unread_count를 1씩 감소
+    for (chat_type, chat_id), reads in room_reads.items():
+        socketio.emit('messages_read', {
+            'chat_type': chat_type,
+            'chat_id': chat_id,
+            'reads': reads
+        }, to=f"{chat_type}_{chat_id}")
+
+# 읽음 처리 묶음 전송 (READ_RECEIPT_INTERVAL_MS 간격으로 방별 한 번씩 반영/전송, 0이면 요청마다 바로)
+READ_RECEIPTS = ReadReceiptAggregator(
+    apply_read_receipts, interval=float(os.getenv('READ_RECEIPT_INTERVAL_MS', '300')) / 1000
+)
+atexit.register(READ_RECEIPTS.flush)
+
 @socketio.on('read_message')
 def handle_read_message(data):
+    """'message_id까지 읽음' 요청 - 읽음 위치 저장과 방 알림은 모아서 처리"""
     message_id = data.get('message_id')
     user_id = data.get('user_id')
     chat_type = data.get('chat_type')
     chat_id = data.get('chat_id')
     
-    print(f'Read message event received: {data}')
-    
     if not message_id or not user_id or not chat_type or not chat_id:
         print('Missing required fields in read_message event')
         return
     
     try:
-        # 이미 읽음 처리된 경우 중복 저장 방지
-        existing = ChatMessageRead.query.filter_by(message_id=message_id, user_id=user_id).first()
-        if not existing:
-            read = ChatMessageRead(message_id=message_id, user_id=user_id)
-            db.session.add(read)
-            db.session.commit()
-            print(f'Message {message_id} marked as read by {user_id}')
-        
-        # 채팅방 참여자 목록 구하기
-        if chat_type == 'party':
-            party = Party.query.get(chat_id)
-            if party:
-                # PartyMember 테이블에서 멤버 ID 가져오기
-                party_members = PartyMember.query.filter_by(party_id=chat_id).all()
-                member_ids = [member.employee_id for member in party_members]
-            else:
-                member_ids = []
-        elif chat_type == 'dangolpot':
-            pot = DangolPot.query.get(chat_id)
-            member_ids = [mid.strip() for mid in pot.members.split(',') if mid.strip()] if pot and pot.members else []
-        elif chat_type == 'custom':
-            room = ChatRoom.query.filter_by(type='friend', id=chat_id).first()
-            if room:
-                participants = ChatParticipant.query.filter_by(room_id=room.id).all()
-                member_ids = [p.user_id for p in participants]
-            else:
-                member_ids = []
-        else:
-            member_ids = []
-        
-        read_count = ChatMessageRead.query.filter_by(message_id=message_id).count()
-        unread_count = max(0, len(member_ids) - read_count)
-        
-        room_name = f"{chat_type}_{chat_id}"
-        print(f'Emitting message_read to room {room_name}: message_id={message_id}, unread_count={unread_count}')
-        
-        socketio.emit('message_read', {
-            'message_id': message_id,
-            'user_id': user_id,
-            'unread_count': unread_count
-        }, to=room_name)
-        
-    except Exception as e:
-        print(f'Error in handle_read_message: {e}')
-        import traceback
-        traceback.print_exc()
+        READ_RECEIPTS.record((chat_type, int(chat_id)), user_id, int(message_id))
+    except (TypeError, ValueError):
+        print(f'Invalid read_message event: {data}')
 
 # --- 친구 API ---
 @app.route('/users/search', methods=['GET'])
@@ -5910,53 +6735,31 @@ def get_filtered_chats():
     return jsonify(chats_data)
 
 def find_available_dates_for_participants(participant_ids, max_days=30):
-    """참가자들의 공통 가능 날짜를 찾는 공통 함수"""
+    """참가자들의 공통 가능 날짜를 찾는 공통 함수 (기간 전체를 쿼리 두 번으로 조회)"""
     today = get_seoul_today()
-    available_dates = []
-    alternative_dates = []
-    
-    for i in range(max_days):
-        check_date = today + timedelta(days=i)
-        date_str = check_date.strftime('%Y-%m-%d')
-        
-        # 각 참여자의 해당 날짜 약속 확인
-        available_participants = []
-        unavailable_participants = []
-        
-        for participant_id in participant_ids:
-            # 파티 약속 확인
-            has_party = Party.query.join(PartyMember, Party.id == PartyMember.party_id).filter(
-                PartyMember.employee_id == participant_id,
-                Party.party_date == date_str  # type: ignore
-            ).first() is not None
-            
-            # 개인 일정 확인
-            has_schedule = PersonalSchedule.query.filter_by(
-                employee_id=participant_id,
-                schedule_date=date_str
-            ).first() is not None
-            
-            if not has_party and not has_schedule:
-                available_participants.append(participant_id)
-            else:
-                unavailable_participants.append(participant_id)
-        
-        date_info = {
-            'date': date_str,
-            'available_participants': available_participants,
-            'unavailable_participants': unavailable_participants,
-            'available_count': len(available_participants),
-            'total_count': len(participant_ids)
-        }
-        
-        # 모든 참여자가 가능한 경우
-        if len(available_participants) == len(participant_ids):
-            available_dates.append(date_info)
-        # 1명만 빠지고 나머지가 가능한 경우 (3명 이상일 때)
-        elif len(participant_ids) >= 3 and len(available_participants) == len(participant_ids) - 1:
-            alternative_dates.append(date_info)
-    
-    return available_dates, alternative_dates
+    dates = [(today + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(max_days)]
+    if not dates or not participant_ids:
+        return [], []
+    start_date, end_date = dates[0], dates[-1]
+    
+    # 참가자들의 기간 내 파티 약속
+    party_rows = db.session.query(PartyMember.employee_id, Party.party_date).join(
+        Party, Party.id == PartyMember.party_id
+    ).filter(
+        PartyMember.employee_id.in_(participant_ids),
+        Party.party_date >= start_date,
+        Party.party_date <= end_date
+    ).distinct().all()
+    
+    # 참가자들의 기간 내 개인 일정
+    schedule_rows = db.session.query(PersonalSchedule.employee_id, PersonalSchedule.schedule_date).filter(
+        PersonalSchedule.employee_id.in_(participant_ids),
+        PersonalSchedule.schedule_date >= start_date,
+        PersonalSchedule.schedule_date <= end_date
+    ).distinct().all()
+    
+    # 참가자 x 날짜 행렬의 열 집계로 공통 가능 날짜 / 1명 빠지는 날짜 계산
+    return find_common_dates(participant_ids, dates, party_rows + schedule_rows)
 
 # --- 지능형 약속 잡기 API ---
 @app.route('/intelligent/suggest-dates', methods=['POST'])
@@ -6117,22 +6920,21 @@ def get_nearby_restaurants():
     longitude = request.args.get('longitude', type=float)
     radius = request.args.get('radius', 1000, type=int)  # 기본 1km
     
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)  # 기본 10개, 최대 50개
+    
     if not latitude or not longitude:
         return jsonify({'message': '위치 정보가 필요합니다.'}), 400
     
-    # 간단한 거리 계산 (실제로는 Haversine 공식 사용)
-    restaurants = Restaurant.query.filter(
-        Restaurant.latitude.isnot(None),  # type: ignore
-        Restaurant.longitude.isnot(None)  # type: ignore
-    ).all()
+    # 공간 인덱스에서 반경 내 가장 가까운 식당 id와 하버사인 거리(m) 조회
+    nearest = get_restaurant_spatial_index().nearest(latitude, longitude, limit, max_radius_m=radius)
+    restaurants = {r.id: r for r in Restaurant.query.filter(
+        Restaurant.id.in_([restaurant_id for restaurant_id, _ in nearest])
+    ).all()} if nearest else {}
     
     nearby_restaurants = []
-    for restaurant in restaurants:
-        # 간단한 유클리드 거리 계산 (실제로는 Haversine 공식 사용)
-        distance = ((restaurant.latitude - latitude) ** 2 + 
-                   (restaurant.longitude - longitude) ** 2) ** 0.5 * 111000  # 대략적인 km 변환
-        
-        if distance <= radius:
+    for restaurant_id, distance in nearest:
+        restaurant = restaurants.get(restaurant_id)
+        if restaurant:
             nearby_restaurants.append({
                 'id': restaurant.id,
                 'name': restaurant.name,
@@ -6143,11 +6945,8 @@ def get_nearby_restaurants():
                 'review_count': restaurant.review_count
             })
     
-    # 거리순으로 정렬
-    nearby_restaurants.sort(key=lambda x: x['distance'])
-    
     return jsonify({
-        'restaurants': nearby_restaurants[:10],  # 최대 10개
+        'restaurants': nearby_restaurants,  # 거리순
         'user_location': {'latitude': latitude, 'longitude': longitude}
     })
 
@@ -6197,16 +6996,16 @@ def recommend_restaurants():
     if user.food_preferences:
         user_preferences = user.food_preferences.split(',')
     
-            # 기본 추천 (사용자 선호도가 없으면 인기 식당)
-        if user_preferences:
-            recommended_restaurants = Restaurant.query.filter(
-                Restaurant.category.in_(user_preferences)  # type: ignore
-            ).limit(10).all()
-        else:
-            # 평점 높은 식당 추천
-            recommended_restaurants = Restaurant.query.order_by(
-                Restaurant.avg_rating.desc()  # type: ignore
-            ).limit(10).all()
+    # 기본 추천 (사용자 선호도가 없으면 인기 식당)
+    if user_preferences:
+        recommended_restaurants = Restaurant.query.filter(
+            Restaurant.category.in_(user_preferences)  # type: ignore
+        ).limit(10).all()
+    else:
+        # 평점 높은 식당 추천 (리뷰 집계 테이블 기준)
+        recommended_restaurants = Restaurant.query.join(Restaurant.stats).options(
+            db.contains_eager(Restaurant.stats)
+        ).order_by(RestaurantStats.avg_rating.desc(), Restaurant.id).limit(10).all()
     
     # 친구들이 좋아하는 식당 추천
     friends = get_user_friends(employee_id)
@@ -6412,9 +7211,6 @@ def calculate_compatibility_score(user1, user2):
     return min(score, 1.0)
 
 # --- 스마트 랜덤 런치 API ---
-SMART_LUNCH_CACHE = {}
-SMART_LUNCH_CACHE_DATE = None
-
 # 패턴 점수 계산 예시 함수
 # (실제 서비스에서는 더 정교하게 구현 가능)
 def get_last_dining_together(user1_id, user2_id):
@@ -6437,28 +7233,7 @@ def get_last_dining_together(user1_id, user2_id):
             )
         ).order_by(desc(Party.party_date)).first()
         
-        if latest_party:
-            party_date = datetime.strptime(latest_party.party_date, '%Y-%m-%d').date()
-            today = get_seoul_today()
-            days_diff = (today - party_date).days
-            
-            if days_diff == 0:
-                return "오늘"
-            elif days_diff == 1:
-                return "어제"
-            elif days_diff < 7:
-                return f"{days_diff}일 전"
-            elif days_diff < 30:
-                weeks = days_diff // 7
-                return f"{weeks}주 전"
-            elif days_diff < 365:
-                months = days_diff // 30
-                return f"{months}개월 전"
-            else:
-                years = days_diff // 365
-                return f"{years}년 전"
-        else:
-            return "처음 만나는 동료"
+        return describe_last_dining(latest_party.party_date if latest_party else None)
     except Exception as e:
         print(f"Error calculating last dining together: {e}")
         return "알 수 없음"
@@ -6495,8 +7270,8 @@ def get_smart_recommendations():
     print(f"DEBUG: All request args: {dict(request.args)}")
 
     try:
-        # 캐시가 없으면 먼저 생성
-        if not RECOMMENDATION_CACHE:
+        # 공유 캐시가 없으면 먼저 생성
+        if not RECOMMENDATION_STORE.generation:
             generate_recommendation_cache()
         
         # 기본 날짜 설정: 가장 가까운 영업일
@@ -6513,9 +7288,10 @@ def get_smart_recommendations():
 
         # 캐시에서 추천 그룹 조회
         cache_key = f"{employee_id}_{selected_date}"
-        if cache_key in RECOMMENDATION_CACHE:
+        recommendations = RECOMMENDATION_STORE.get(cache_key)
+        if recommendations is not None:
             print(f"DEBUG: Returning cached recommendations for {cache_key}")
-            return jsonify(RECOMMENDATION_CACHE[cache_key])
+            return jsonify(recommendations)
         
         print(f"DEBUG: No cache found for {cache_key}, returning empty list")
         return jsonify([])
@@ -6659,7 +7435,9 @@ def create_voting_session():
             chat_id=chat_room_id,
             sender_employee_id='SYSTEM',
             sender_nickname='시스템',
-            message=system_message
+            message=system_message,
+            message_type='voting_notification',
+            voting_session_id=voting_session.id
         )
         chat_message.created_at = datetime.now()  # 한국 시간으로 설정
         db.session.add(chat_message)
@@ -6769,7 +7547,9 @@ def get_voting_session(session_id):
                         chat_id=session.chat_room_id,
                         sender_employee_id='SYSTEM',
                         sender_nickname='시스템',
-                        message=completion_message
+                        message=completion_message,
+                        message_type='voting_completed',
+                        voting_session_id=session.id
                     )
                     chat_message.created_at = datetime.now()
                     db.session.add(chat_message)
@@ -6988,7 +7768,9 @@ def vote_for_date(session_id):
                     chat_id=session.chat_room_id,
                     sender_employee_id='SYSTEM',
                     sender_nickname='시스템',
-                    message=completion_message
+                    message=completion_message,
+                    message_type='voting_completed',
+                    voting_session_id=session.id
                 )
                 chat_message.created_at = datetime.now()
                 db.session.add(chat_message)
@@ -7056,7 +7838,9 @@ def cancel_voting_session(session_id):
                 chat_id=session.chat_room_id,
                 sender_employee_id='SYSTEM',
                 sender_nickname='시스템',
-                message=cancel_message
+                message=cancel_message,
+                message_type='voting_cancelled',
+                voting_session_id=session.id
             )
             chat_message.created_at = datetime.now()  # 한국 시간으로 설정
             db.session.add(chat_message)
@@ -7152,7 +7936,9 @@ def update_voting_session(session_id):
                 chat_id=session.chat_room_id,
                 sender_employee_id='SYSTEM',
                 sender_nickname='시스템',
-                message=update_message
+                message=update_message,
+                message_type='voting_updated',
+                voting_session_id=session.id
             )
             chat_message.created_at = datetime.now()
             db.session.add(chat_message)
@@ -7448,6 +8234,8 @@ from api.points_api import points_api
 app.register_blueprint(points_api, url_prefix='/api')
 
 # 스케줄러 초기화
+# 여러 프로세스로 확장할 때는 한 프로세스만 RUN_SCHEDULER=true로 두어 예약 작업이 중복 실행되지 않도록 함
+RUN_SCHEDULER = os.getenv('RUN_SCHEDULER', 'true').lower() == 'true'
 scheduler = BackgroundScheduler()
 scheduler.add_job(
     func=generate_daily_recommendations,
@@ -7456,7 +8244,48 @@ scheduler.add_job(
     name='Generate daily recommendations at midnight',
     replace_existing=True
 )
-scheduler.start()
+scheduler.add_job(
+    func=reconcile_restaurant_stats,
+    trigger=CronTrigger(hour=3, minute=0, timezone='Asia/Seoul'),
+    id='reconcile_restaurant_stats',
+    name='Rebuild restaurant review stats at 3am',
+    replace_existing=True
+)
+scheduler.add_job(
+    func=rollup_daily_user_analytics,
+    trigger=CronTrigger(hour=0, minute=20, timezone='Asia/Seoul'),
+    id='rollup_user_analytics',
+    name='Roll up user analytics for the previous day',
+    replace_existing=True
+)
+scheduler.add_job(
+    func=snapshot_daily_restaurant_analytics,
+    trigger=CronTrigger(hour=0, minute=10, timezone='Asia/Seoul'),
+    id='snapshot_restaurant_analytics',
+    name='Snapshot restaurant analytics for the previous day',
+    replace_existing=True
+)
+scheduler.add_job(
+    func=refresh_popularity_leaderboards,
+    trigger='interval',
+    minutes=RestaurantPopularity.REFRESH_MINUTES,
+    next_run_time=datetime.now(),  # 시작하자마자 한 번 계산 (조회 API는 재계산하지 않음)
+    id='refresh_popularity_leaderboards',
+    name='Refresh weekly/monthly popular restaurants',
+    replace_existing=True
+)
+scheduler.add_job(
+    func=refresh_recommend_signals,
+    trigger='interval',
+    minutes=30,
+    id='refresh_recommend_signals',
+    name='Refresh restaurant recommend score signals',
+    replace_existing=True
+)
+if RUN_SCHEDULER:
+    scheduler.start()
+else:
+    print("ℹ️ RUN_SCHEDULER=false - 이 프로세스에서는 예약 작업을 실행하지 않습니다.")
 
 @app.route('/proposals/generate-today', methods=['POST'])
 def generate_today_recommendations():
@@ -7474,6 +8303,8 @@ def delete_all_parties():
         # 모든 파티 삭제
         Party.query.delete()
         db.session.commit()
+        AVAILABILITY_INDEX.clear()
+        rebuild_chat_summaries()
         
         return jsonify({"message": "모든 파티 삭제 완료!"})
     except Exception as e:
@@ -7522,6 +8353,7 @@ def delete_all_schedules():
         # 모든 개인 일정 삭제
         deleted_count = PersonalSchedule.query.delete()
         db.session.commit()
+        AVAILABILITY_INDEX.clear()
         
         return jsonify({
             "message": "모든 기타 일정 삭제 완료!",
@@ -7565,6 +8397,11 @@ def delete_all_randomlunch():
         
         db.session.commit()
         
+        # 벌크 삭제는 매퍼 이벤트를 거치지 않으므로 참여 횟수 벡터, 가용성 인덱스, 채팅방 요약 재로드
+        load_party_activity_counts()
+        AVAILABILITY_INDEX.clear()
+        rebuild_chat_summaries()
+
         print(f"✅ [랜덤런치] 정리 완료: 파티{deleted_parties}개, 멤버{deleted_members}개, 제안{deleted_proposals}개, 채팅{deleted_chats}개")
         
         return jsonify({
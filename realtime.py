@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+실시간 채팅 Socket.IO 서버 설정
+여러 워커/서버가 메시지 큐(Redis pub/sub)를 통해 방 브로드캐스트를 공유하도록 구성
+"""
+
+import os
+import logging
+from typing import Any, Dict, Optional
+
+from flask_socketio import SocketIO
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent', 'gevent_uwsgi')
+DEFAULT_CHANNEL = 'lunch-app-socketio'
+
+
+def redis_available(url: str) -> bool:
+    """메시지 큐로 쓸 Redis에 연결 가능한지 확인"""
+    try:
+        import redis
+
+        redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2).ping()
+        return True
+    except Exception as e:
+        logger.error(f"Socket.IO 메시지 큐 Redis 연결 실패: {e}")
+        return False
+
+
+def socketio_options(async_mode: Optional[str] = None, message_queue: Optional[str] = None) -> Dict[str, Any]:
+    """환경변수 설정에 따라 Socket.IO 서버 옵션 결정
+
+    SOCKETIO_ASYNC_MODE: 'threading'(기본값), 'eventlet', 'gevent' - gunicorn 워커 클래스와 맞춰야 함
+    SOCKETIO_MESSAGE_QUEUE: 워커 간 브로드캐스트 공유 큐
+        'redis' - REDIS_URL 사용, 'redis://...' - 지정 URL 사용,
+        'memory://' - 프로세스 내 kombu 큐 (큐 경로 점검용, Flask-SocketIO 테스트 클라이언트는 큐 없이 사용),
+        비어 있으면 큐 없이 단일 프로세스
+    SOCKETIO_CHANNEL: 큐 채널 이름 (같은 Redis를 쓰는 다른 앱과 구분)
+    """
+    async_mode = (async_mode or os.getenv('SOCKETIO_ASYNC_MODE', 'threading')).lower()
+    if async_mode not in ASYNC_MODES:
+        logger.error(f"지원하지 않는 SOCKETIO_ASYNC_MODE: {async_mode} - threading으로 대체합니다.")
+        async_mode = 'threading'
+
+    options: Dict[str, Any] = {'cors_allowed_origins': '*', 'async_mode': async_mode}
+
+    message_queue = message_queue if message_queue is not None else os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+    if message_queue == 'redis':
+        message_queue = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    if message_queue.startswith(('redis://', 'rediss://')) and not redis_available(message_queue):
+        logger.error("Socket.IO 메시지 큐 없이 단일 프로세스 브로드캐스트로 동작합니다.")
+        message_queue = ''
+
+    if message_queue:
+        options['message_queue'] = message_queue
+        options['channel'] = socketio_channel()
+    return options
+
+
+def socketio_channel() -> str:
+    """메시지 큐 채널 이름 (같은 Redis를 쓰는 다른 앱과 키/채널 구분에도 사용)"""
+    return os.getenv('SOCKETIO_CHANNEL', DEFAULT_CHANNEL)
+
+
+def message_queue_redis(server: SocketIO):
+    """Socket.IO 메시지 큐로 쓰는 Redis 클라이언트 (Redis 큐가 아니면 None)"""
+    url = server.server_options.get('message_queue') or ''
+    if not url.startswith(('redis://', 'rediss://')):
+        return None
+    import redis
+
+    return redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+
+
+def create_socketio(app=None, **overrides) -> SocketIO:
+    """Flask 앱에 연결된 Socket.IO 서버 생성"""
+    options = socketio_options(overrides.pop('async_mode', None), overrides.pop('message_queue', None))
+    options.update(overrides)
+    logger.info(f"Socket.IO async_mode={options['async_mode']}, message_queue={options.get('message_queue') or '-'}")
+    return SocketIO(app, **options)
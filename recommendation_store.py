@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+추천 그룹 저장소
+프로세스 내 LRU 계층 + 워커 간 공유 계층(Redis 또는 로컬 SQLite 파일)
+한 워커(빌더)만 전체 캐시를 생성하고 나머지 워커는 공유 계층에서 읽기만 함
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "recommendation"
+
+
+class LRUTier:
+    """프로세스 내 LRU 계층 (다른 워커의 증분 갱신을 반영하도록 짧은 TTL 적용)"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """(적중 여부, 값) 반환"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class MemoryTier:
+    """단일 프로세스용 공유 계층 (테스트/로컬 실행용)"""
+
+    def __init__(self):
+        self._entries: Dict[str, Any] = {}
+        self._generation: Optional[str] = None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        return {key: self._entries[key] for key in keys if key in self._entries}
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def replace_all(self, entries: Dict[str, Any], generation: str) -> None:
+        self._entries = dict(entries)
+        self._generation = generation
+
+    def get_generation(self) -> Optional[str]:
+        return self._generation
+
+    def try_acquire_build_lock(self, owner: str, ttl_seconds: int) -> bool:
+        return True
+
+    def release_build_lock(self, owner: str) -> None:
+        pass
+
+
+class SQLiteTier:
+    """로컬 SQLite 파일 공유 계층 (같은 호스트의 모든 워커가 공유)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS recommendation_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS recommendation_meta (name TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드별 연결 재사용 (WAL 모드로 읽기와 쓰기 동시 허용)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        result = {}
+        conn = self._connect()
+        # SQLite 바인딩 변수 제한을 고려해 나누어 조회
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM recommendation_entries WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            result.update((key, json.loads(value)) for key, value in rows)
+        return result
+
+    def put(self, key: str, value: Any) -> None:
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO recommendation_entries (key, value) VALUES (?, ?)",
+                         (key, json.dumps(value, ensure_ascii=False)))
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM recommendation_entries WHERE key = ?", (key,))
+
+    def replace_all(self, entries: Dict[str, Any], generation: str) -> None:
+        """한 트랜잭션으로 전체 교체 (읽는 워커는 이전 또는 새 세대 중 하나만 봄)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM recommendation_entries")
+            conn.executemany("INSERT INTO recommendation_entries (key, value) VALUES (?, ?)",
+                             ((key, json.dumps(value, ensure_ascii=False)) for key, value in entries.items()))
+            conn.execute("INSERT OR REPLACE INTO recommendation_meta (name, value, expires_at) VALUES ('generation', ?, NULL)",
+                         (generation,))
+
+    def get_generation(self) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM recommendation_meta WHERE name = 'generation'").fetchone()
+        return row[0] if row else None
+
+    def try_acquire_build_lock(self, owner: str, ttl_seconds: int) -> bool:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value, expires_at FROM recommendation_meta WHERE name = 'build_lock'").fetchone()
+            if row and row[0] != owner and row[1] and row[1] > time.time():
+                conn.rollback()
+                return False
+            conn.execute("INSERT OR REPLACE INTO recommendation_meta (name, value, expires_at) VALUES ('build_lock', ?, ?)",
+                         (owner, time.time() + ttl_seconds))
+            conn.commit()
+            return True
+        except Exception:
+            conn.rollback()
+            raise
+
+    def release_build_lock(self, owner: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM recommendation_meta WHERE name = 'build_lock' AND value = ?", (owner,))
+
+
+class RedisTier:
+    """Redis 공유 계층 (여러 호스트의 워커가 공유)"""
+
+    def __init__(self, cache):
+        self.client = cache.redis_client
+        self.entries_key = f"{REDIS_KEY_PREFIX}:entries"
+        self.generation_key = f"{REDIS_KEY_PREFIX}:generation"
+        self.lock_key = f"{REDIS_KEY_PREFIX}:build_lock"
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        values = self.client.hmget(self.entries_key, keys)
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def put(self, key: str, value: Any) -> None:
+        self.client.hset(self.entries_key, key, json.dumps(value, ensure_ascii=False))
+
+    def delete(self, key: str) -> None:
+        self.client.hdel(self.entries_key, key)
+
+    def replace_all(self, entries: Dict[str, Any], generation: str) -> None:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self.entries_key)
+        if entries:
+            pipe.hset(self.entries_key, mapping={key: json.dumps(value, ensure_ascii=False)
+                                                 for key, value in entries.items()})
+        pipe.set(self.generation_key, generation)
+        pipe.execute()
+
+    def get_generation(self) -> Optional[str]:
+        value = self.client.get(self.generation_key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def try_acquire_build_lock(self, owner: str, ttl_seconds: int) -> bool:
+        return bool(self.client.set(self.lock_key, owner, nx=True, ex=ttl_seconds))
+
+    def release_build_lock(self, owner: str) -> None:
+        value = self.client.get(self.lock_key)
+        if value is not None and (value.decode('utf-8') if isinstance(value, bytes) else value) == owner:
+            self.client.delete(self.lock_key)
+
+
+class RecommendationStore:
+    """LRU 계층과 공유 계층을 묶은 추천 그룹 저장소"""
+
+    def __init__(self, shared, lru_size: int = 2048, lru_ttl_seconds: float = 30):
+        self.shared = shared
+        self.lru = LRUTier(lru_size, lru_ttl_seconds)
+        self.owner = f"{os.getpid()}:{id(self)}"
+
+    @property
+    def generation(self) -> Optional[str]:
+        """현재 공유 캐시가 생성된 날짜 (YYYY-MM-DD)"""
+        return self.shared.get_generation()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        hit, value = self.lru.get(key)
+        if hit:
+            return value
+        value = self.shared.get_many([key]).get(key)
+        if value is None:
+            return default
+        self.lru.put(key, value)
+        return value
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        result = {}
+        missing = []
+        for key in keys:
+            hit, value = self.lru.get(key)
+            if hit:
+                result[key] = value
+            else:
+                missing.append(key)
+        for key, value in self.shared.get_many(missing).items():
+            self.lru.put(key, value)
+            result[key] = value
+        return result
+
+    def set(self, key: str, value: Any) -> None:
+        self.shared.put(key, value)
+        self.lru.put(key, value)
+
+    def delete(self, key: str) -> None:
+        self.shared.delete(key)
+        self.lru.delete(key)
+
+    def replace_all(self, entries: Dict[str, Any], generation: str) -> None:
+        """전체 캐시를 새 세대로 교체"""
+        self.shared.replace_all(entries, generation)
+        self.lru.clear()
+
+    def try_acquire_build_lock(self, ttl_seconds: int = 1800) -> bool:
+        """빌더 잠금 획득 (다른 워커가 생성 중이면 False)"""
+        return self.shared.try_acquire_build_lock(self.owner, ttl_seconds)
+
+    def release_build_lock(self) -> None:
+        self.shared.release_build_lock(self.owner)
+
+
+def create_recommendation_store(backend: Optional[str] = None) -> RecommendationStore:
+    """환경변수 설정에 따라 추천 그룹 저장소 생성
+
+    RECOMMENDATION_STORE: 'sqlite'(기본값), 'redis', 'memory'
+    RECOMMENDATION_STORE_PATH: SQLite 파일 경로
+    """
+    backend = (backend or os.getenv('RECOMMENDATION_STORE', 'sqlite')).lower()
+    lru_size = int(os.getenv('RECOMMENDATION_LRU_SIZE', '2048'))
+    lru_ttl = float(os.getenv('RECOMMENDATION_LRU_TTL', '30'))
+
+    if backend == 'redis':
+        from redis_cache import RedisCache
+
+        url = urlparse(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        cache = RedisCache(
+            host=url.hostname or 'localhost',
+            port=url.port or 6379,
+            db=int(url.path.lstrip('/') or 0),
+            password=url.password
+        )
+        if cache.is_connected():
+            return RecommendationStore(RedisTier(cache), lru_size, lru_ttl)
+        logger.error("Redis 추천 저장소 연결 실패 - SQLite 파일 저장소로 대체합니다.")
+        backend = 'sqlite'
+
+    if backend == 'sqlite':
+        path = os.getenv('RECOMMENDATION_STORE_PATH', 'recommendation_store.db')
+        return RecommendationStore(SQLiteTier(path), lru_size, lru_ttl)
+
+    return RecommendationStore(MemoryTier(), lru_size, lru_ttl)
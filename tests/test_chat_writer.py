@@ -0,0 +1,190 @@
+"""
+채팅 메시지 쓰기 지연 작성기 / 공유 id 시퀀스 테스트
+"""
+
+import threading
+import time
+
+from utils.chat_writer import ChatMessageWriter, SharedMessageIdSequence
+
+
+class RecordingPersist:
+    """저장 호출을 기록하고 fail_times번 실패하거나 poison 메시지가 포함되면 실패"""
+
+    def __init__(self, fail_times=0, poison=None):
+        self.fail_times = fail_times
+        self.poison = poison
+        self.batches = []
+        self.saved = []
+        self.threads = set()
+
+    def __call__(self, records):
+        self.threads.add(threading.current_thread().name)
+        self.batches.append([record['id'] for record in records])
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError('db down')
+        if self.poison is not None and any(record['id'] == self.poison for record in records):
+            raise ValueError('bad message')
+        self.saved.extend(record['id'] for record in records)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_sync_mode_persists_in_caller_thread():
+    persist = RecordingPersist()
+    writer = ChatMessageWriter(persist, sync=True)
+
+    writer.submit({'id': 1})
+
+    assert persist.saved == [1]
+    assert persist.threads == {threading.current_thread().name}
+    assert writer.pending_records() == []
+
+
+def test_flush_saves_pending_records_in_batches():
+    persist = RecordingPersist()
+    writer = ChatMessageWriter(persist, max_batch=3, max_delay=60)
+
+    for message_id in range(1, 8):
+        writer.submit({'id': message_id})
+    writer.flush()
+
+    assert persist.saved == list(range(1, 8))
+    assert all(len(batch) <= 3 for batch in persist.batches)
+    assert writer.pending_records() == []
+    writer.close()
+
+
+def test_background_thread_saves_after_max_delay():
+    persist = RecordingPersist()
+    writer = ChatMessageWriter(persist, max_batch=100, max_delay=0.01)
+
+    writer.submit({'id': 1})
+    writer.submit({'id': 2})
+
+    assert wait_until(lambda: persist.saved == [1, 2])
+    assert persist.threads == {'chat-message-writer'}
+    writer.close()
+
+
+def test_failed_batch_is_retried_in_order():
+    persist = RecordingPersist(fail_times=2)
+    writer = ChatMessageWriter(persist, max_batch=100, max_delay=0.01, max_retries=3, retry_delay=0.01)
+
+    for message_id in range(1, 4):
+        writer.submit({'id': message_id})
+
+    assert wait_until(lambda: persist.saved == [1, 2, 3])
+    assert persist.batches[:3] == [[1, 2, 3]] * 3
+    assert writer.dropped == 0
+    writer.close()
+
+
+def test_records_submitted_during_retry_stay_behind_failed_batch():
+    persist = RecordingPersist(fail_times=1)
+    writer = ChatMessageWriter(persist, max_batch=100, max_delay=60, max_retries=3)
+
+    writer.submit({'id': 1})
+    writer.submit({'id': 2})
+    with writer._cond:
+        batch = writer._take_batch()
+        writer._in_flight.append(batch)
+    writer._persist_in_flight(batch)
+    writer.submit({'id': 3})
+
+    assert [record['id'] for record in writer.pending_records()] == [1, 2, 3]
+    writer.flush()
+    assert persist.saved == [1, 2, 3]
+
+
+def test_poison_message_dropped_after_retries():
+    persist = RecordingPersist(poison=2)
+    writer = ChatMessageWriter(persist, max_batch=100, max_delay=60, max_retries=2)
+
+    for message_id in range(1, 4):
+        writer.submit({'id': message_id})
+    writer.flush()
+
+    assert persist.saved == [1, 3]
+    assert writer.dropped == 1
+    assert writer.pending_records() == []
+
+
+def test_close_rejects_new_records():
+    writer = ChatMessageWriter(RecordingPersist(), max_delay=60)
+    writer.close()
+
+    try:
+        writer.submit({'id': 1})
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('종료된 작성기가 메시지를 받음')
+
+
+class FakeRedis:
+    """SharedMessageIdSequence가 사용하는 명령만 흉내내는 Redis 클라이언트"""
+
+    def __init__(self):
+        self.values = {}
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def get(self, key):
+        value = self.values.get(key)
+        return str(value).encode() if value is not None else None
+
+    def eval(self, script, key_count, key, *args):
+        if script == SharedMessageIdSequence.RAISE_TO_FLOOR:
+            self.values[key] = max(int(self.values.get(key, 0)), int(args[0]))
+            return 1
+        assert script == SharedMessageIdSequence.INCR_WITH_ROOM
+        message_id = self.incr(key)
+        self.values[f'{key}:room:{message_id}'] = args[0]
+        return message_id
+
+
+def test_shared_sequence_orders_ids_across_workers():
+    client = FakeRedis()
+    first = SharedMessageIdSequence(client, 'chat_message_id', lambda: 10)
+    second = SharedMessageIdSequence(client, 'chat_message_id', lambda: 10)
+    first.seed()
+    second.seed()
+
+    ids = [first.next_id(), second.next_id(), first.next_id()]
+
+    assert ids == [11, 12, 13]
+    assert first.current() == 13
+
+
+def test_shared_sequence_records_room():
+    sequence = SharedMessageIdSequence(FakeRedis(), 'chat_message_id', lambda: 0)
+
+    message_id = sequence.next_id('party_3')
+
+    assert sequence.room_of(message_id) == 'party_3'
+    assert sequence.room_of(message_id + 1) is None
+
+
+def test_shared_sequence_recovers_from_counter_reset():
+    client = FakeRedis()
+    floor = {'value': 0}
+    sequence = SharedMessageIdSequence(client, 'chat_message_id', lambda: floor['value'])
+    sequence.seed()
+    for _ in range(5):
+        sequence.next_id()
+
+    floor['value'] = 5
+    client.values.clear()
+
+    assert sequence.next_id() == 6
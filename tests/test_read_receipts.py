@@ -0,0 +1,85 @@
+"""
+읽음 처리 묶음 전송 테스트
+"""
+
+import time
+
+from utils.read_receipts import ReadReceiptAggregator
+
+
+class RecordingApply:
+    """반영된 배치를 기록하고 fail_times번 실패"""
+
+    def __init__(self, fail_times=0):
+        self.fail_times = fail_times
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append({room_key: dict(readers) for room_key, readers in batch.items()})
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError('db down')
+
+
+def test_requests_coalesce_to_latest_message_per_user():
+    apply = RecordingApply()
+    aggregator = ReadReceiptAggregator(apply, interval=60)
+
+    aggregator.record(('party', 1), 'u1', 5)
+    aggregator.record(('party', 1), 'u1', 9)
+    aggregator.record(('party', 1), 'u1', 7)
+    aggregator.record(('party', 1), 'u2', 3)
+    aggregator.record(('party', 2), 'u1', 4)
+    aggregator.flush()
+
+    assert apply.batches == [{('party', 1): {'u1': 9, 'u2': 3}, ('party', 2): {'u1': 4}}]
+
+
+def test_zero_interval_applies_each_request():
+    apply = RecordingApply()
+    aggregator = ReadReceiptAggregator(apply, interval=0)
+
+    aggregator.record(('party', 1), 'u1', 5)
+    aggregator.record(('party', 1), 'u1', 6)
+
+    assert apply.batches == [{('party', 1): {'u1': 5}}, {('party', 1): {'u1': 6}}]
+
+
+def test_background_flush_after_interval():
+    apply = RecordingApply()
+    aggregator = ReadReceiptAggregator(apply, interval=0.01)
+
+    aggregator.record(('party', 1), 'u1', 5)
+
+    deadline = time.monotonic() + 2
+    while not apply.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert apply.batches == [{('party', 1): {'u1': 5}}]
+
+
+def test_failed_batch_merges_back_with_newer_requests():
+    apply = RecordingApply(fail_times=1)
+    aggregator = ReadReceiptAggregator(apply, interval=60)
+
+    aggregator.record(('party', 1), 'u1', 5)
+    aggregator.record(('party', 1), 'u2', 8)
+    aggregator.flush()
+    # 실패한 배치보다 앞선 위치는 무시, 뒤의 위치는 반영
+    aggregator.record(('party', 1), 'u1', 3)
+    aggregator.record(('party', 1), 'u2', 10)
+    aggregator.flush()
+
+    assert apply.batches[-1] == {('party', 1): {'u1': 5, 'u2': 10}}
+
+
+def test_batch_dropped_after_max_retries():
+    apply = RecordingApply(fail_times=10)
+    aggregator = ReadReceiptAggregator(apply, interval=60, max_retries=2)
+
+    aggregator.record(('party', 1), 'u1', 5)
+    for _ in range(3):
+        aggregator.flush()
+    apply.fail_times = 0
+    aggregator.flush()
+
+    assert len(apply.batches) == 3
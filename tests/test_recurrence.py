@@ -0,0 +1,47 @@
+"""
+반복 일정 전개 테스트
+"""
+
+from datetime import date
+
+from utils.recurrence import add_months, iter_occurrences
+
+
+def occurrences(start_date, recurrence_type, window_start, window_end, **kwargs):
+    return list(iter_occurrences(start_date, recurrence_type, window_start, window_end, **kwargs))
+
+
+def test_add_months_clamps_to_month_end():
+    assert add_months(date(2025, 1, 31), 1) == date(2025, 2, 28)
+    assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    assert add_months(date(2025, 1, 31), 3) == date(2025, 4, 30)
+    assert add_months(date(2025, 11, 30), 2) == date(2026, 1, 30)
+
+
+def test_monthly_month_end_keeps_original_day():
+    # 2월에 말일로 보정되어도 다음 달은 다시 31일
+    assert occurrences(date(2025, 1, 31), 'monthly', date(2025, 1, 1), date(2025, 6, 1)) == [
+        date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30), date(2025, 5, 31)]
+
+
+def test_yearly_leap_day():
+    assert occurrences(date(2024, 2, 29), 'yearly', date(2024, 1, 1), date(2029, 1, 1)) == [
+        date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)]
+
+
+def test_window_start_skips_earlier_occurrences():
+    full = occurrences(date(2024, 1, 31), 'monthly', date(2024, 1, 1), date(2027, 1, 1))
+    for window_start in (date(2024, 2, 29), date(2024, 3, 1), date(2025, 2, 28), date(2026, 12, 31)):
+        assert occurrences(date(2024, 1, 31), 'monthly', window_start, date(2027, 1, 1)) == \
+            [day for day in full if day >= window_start]
+
+
+def test_weekly_interval_end_date_and_exclusions():
+    assert occurrences(date(2025, 3, 3), 'weekly', date(2025, 3, 10), date(2025, 5, 1), interval=2,
+                       end_date=date(2025, 4, 14), excluded_dates={date(2025, 3, 31)}) == [
+        date(2025, 3, 17), date(2025, 4, 14)]
+
+
+def test_unsupported_type_yields_start_date_only():
+    assert occurrences(date(2025, 3, 3), 'daily', date(2025, 3, 1), date(2025, 4, 1)) == [date(2025, 3, 3)]
+    assert occurrences(date(2025, 3, 3), None, date(2025, 3, 4), date(2025, 4, 1)) == []
@@ -0,0 +1,91 @@
+"""
+식당 검색 인덱스 테스트
+"""
+
+from utils.search_index import RestaurantSearchIndex, ngrams, to_chosung
+
+ROWS = [
+    (1, '김치찌개 명가', '한식'),
+    (2, '명동 김치찌개', '한식'),
+    (3, '김밥천국', '분식'),
+    (4, 'Pasta House', '양식'),
+    (5, '국수나무', '분식'),
+]
+
+
+def make_index():
+    index = RestaurantSearchIndex()
+    index.load(ROWS)
+    return index
+
+
+def test_ngrams_and_chosung():
+    assert ngrams('김치찌개') == {'김치', '치찌', '찌개'}
+    assert ngrams('김') == {'김'}
+    assert to_chosung('김치 pasta') == 'ㄱㅊ pasta'
+
+
+def test_substring_search_ranks_prefix_before_contains():
+    assert make_index().search('김치찌개') == [1, 2]
+    assert make_index().search('찌개') == [1, 2]
+
+
+def test_word_prefix_and_case_insensitive_match():
+    index = make_index()
+    assert index.search('house') == [4]
+    assert index.search('PASTA') == [4]
+
+
+def test_single_character_query():
+    assert make_index().search('김') == [3, 1, 2]
+
+
+def test_chosung_query():
+    index = make_index()
+    assert index.search('ㄱㅊㅉㄱ') == [1, 2]
+    assert index.search('ㄱㅂ') == [3]
+
+
+def test_trailing_chosung_query():
+    assert make_index().search('김치찌ㄱ') == [1, 2]
+    assert make_index().search('김ㅂ') == [3]
+
+
+def test_category_match_ranks_after_name_match():
+    assert make_index().search('분식') == [3, 5]
+
+
+def test_limit():
+    assert make_index().search('김', limit=2) == [3, 1]
+
+
+def test_upsert_replaces_previous_terms():
+    index = make_index()
+    index.upsert(3, '참치김밥', '분식')
+    index.upsert(6, '라멘집', '일식')
+
+    assert index.search('천국') == []
+    assert index.search('참치') == [3]
+    assert index.search('ㄹㅁ') == [6]
+
+
+def test_remove():
+    index = make_index()
+    index.remove(1)
+    index.remove(99)
+
+    assert index.search('김치찌개') == [2]
+    assert not any(1 in ids for ids in index.name_postings.values())
+
+
+def test_filter_category_keeps_order():
+    assert make_index().filter_category([5, 1, 3, 42], '분식') == [5, 3]
+
+
+def test_loaded_expires_after_ttl():
+    index = RestaurantSearchIndex(ttl_seconds=60)
+    assert not index.loaded
+    index.load(ROWS)
+    assert index.loaded
+    index.loaded_at -= 61
+    assert not index.loaded
@@ -0,0 +1,116 @@
+"""
+날짜별 가용성 인덱스
+날짜별로 바쁜(파티 참여 또는 개인 일정) 사원 ID 집합을 보관하여
+"X 날짜에 누가 한가한가"를 집합 차이 한 번으로 계산
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+class AvailabilityIndex:
+    """날짜별 바쁜 사원 ID 집합 인덱스 (다른 워커의 변경은 ttl_seconds가 지나 다시 로드할 때 반영)"""
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.user_ids: Set[str] = set()
+        self.busy: Dict[str, Set[str]] = {}
+        self.loaded_at: Dict[str, float] = {}
+
+    def set_user_ids(self, user_ids: Iterable[str]) -> None:
+        """전체 사원 ID 집합 교체"""
+        self.user_ids = set(user_ids)
+
+    def load(self, dates: Iterable[str], party_rows: Iterable, schedule_rows: Iterable) -> None:
+        """날짜 범위의 바쁜 사원 집합을 집계 결과로 교체
+
+        party_rows: (party_date, host_employee_id, member_employee_id 또는 None)
+        schedule_rows: (schedule_date, employee_id)
+        """
+        busy = {date_str: set() for date_str in dates}
+        for party_date, host_id, member_id in party_rows:
+            if party_date in busy:
+                busy[party_date].add(host_id)
+                if member_id:
+                    busy[party_date].add(member_id)
+        for schedule_date, employee_id in schedule_rows:
+            if schedule_date in busy:
+                busy[schedule_date].add(employee_id)
+        loaded_at = time.monotonic()
+        self.busy.update(busy)
+        self.loaded_at.update((date_str, loaded_at) for date_str in busy)
+
+    def invalidate(self, date_str: Optional[str]) -> None:
+        """해당 날짜를 다음 조회 시 다시 로드하도록 표시"""
+        self.busy.pop(date_str, None)
+        self.loaded_at.pop(date_str, None)
+
+    def clear(self) -> None:
+        self.busy.clear()
+        self.loaded_at.clear()
+
+    def covers(self, date_str: str) -> bool:
+        return self.busy_on(date_str) is not None
+
+    def discard_before(self, date_str: str) -> None:
+        """지난 날짜의 인덱스 제거"""
+        for old_date in [d for d in self.busy if d < date_str]:
+            self.invalidate(old_date)
+
+    def busy_on(self, date_str: str) -> Optional[Set[str]]:
+        """해당 날짜의 바쁜 사원 ID 집합 (인덱스에 없거나 TTL이 지난 날짜면 None)"""
+        busy = self.busy.get(date_str)
+        if busy is None or time.monotonic() - self.loaded_at.get(date_str, 0) >= self.ttl_seconds:
+            return None
+        return busy
+
+    def available_on(self, date_str: str) -> Optional[Set[str]]:
+        """해당 날짜에 한가한 사원 ID 집합 (인덱스에 없거나 TTL이 지난 날짜면 None)"""
+        busy = self.busy_on(date_str)
+        if busy is None:
+            return None
+        return self.user_ids - busy
+
+
+def build_busy_matrix(participant_ids: Sequence[str], dates: Sequence[str], busy_rows: Iterable) -> np.ndarray:
+    """참가자 x 날짜 바쁨 여부 행렬 생성 (busy_rows: (employee_id, date_str))"""
+    participant_rows = defaultdict(list)
+    for i, participant_id in enumerate(participant_ids):
+        participant_rows[participant_id].append(i)
+    date_columns = {date_str: j for j, date_str in enumerate(dates)}
+
+    busy = np.zeros((len(participant_ids), len(dates)), dtype=bool)
+    for employee_id, date_str in busy_rows:
+        j = date_columns.get(date_str)
+        if j is None:
+            continue
+        for i in participant_rows.get(employee_id, ()):
+            busy[i, j] = True
+    return busy
+
+
+def find_common_dates(participant_ids: Sequence[str], dates: Sequence[str],
+                      busy_rows: Iterable) -> Tuple[List[dict], List[dict]]:
+    """모든 참가자가 가능한 날짜와 1명만 빠지는 날짜(3명 이상일 때)를 열 단위 집계로 계산"""
+    free = ~build_busy_matrix(participant_ids, dates, busy_rows)
+    free_counts = free.sum(axis=0)
+    total_count = len(participant_ids)
+
+    def date_info(j):
+        available = free[:, j]
+        return {
+            'date': dates[j],
+            'available_participants': [participant_ids[i] for i in np.flatnonzero(available)],
+            'unavailable_participants': [participant_ids[i] for i in np.flatnonzero(~available)],
+            'available_count': int(free_counts[j]),
+            'total_count': total_count
+        }
+
+    available_dates = [date_info(j) for j in np.flatnonzero(free_counts == total_count)]
+    alternative_dates = []
+    if total_count >= 3:
+        alternative_dates = [date_info(j) for j in np.flatnonzero(free_counts == total_count - 1)]
+    return available_dates, alternative_dates
@@ -0,0 +1,218 @@
+"""
+채팅 메시지 쓰기 지연(write-behind) 파이프라인
+메시지 id를 워커 간 공유 시퀀스(Redis)에서 할당해 즉시 전송하고,
+DB 저장은 백그라운드 작성기가 시간/개수 제한이 있는 작은 배치로 묶어 한 트랜잭션에 커밋
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SharedMessageIdSequence:
+    """Redis INCR 기반 메시지 id 시퀀스 - 모든 워커가 한 카운터에서 id를 받아 id 순서가 전송 순서와 같음
+
+    load_floor(): DB에 저장된 최대 메시지 id (카운터 초기화/복구용, 읽기만 수행)
+    room_ttl: 할당한 id의 방 기록 보관 시간(초) - 아직 저장되지 않은 다른 워커의 메시지도 방을 찾을 수 있도록 함
+    """
+
+    # 카운터가 floor보다 작을 때만 올림 (다른 워커가 이미 올린 값은 유지)
+    RAISE_TO_FLOOR = (
+        "local current = tonumber(redis.call('GET', KEYS[1]) or '0') "
+        "if current < tonumber(ARGV[1]) then redis.call('SET', KEYS[1], ARGV[1]) end "
+        "return 1"
+    )
+
+    # id 할당과 id -> 방 기록을 한 번의 왕복으로 처리
+    INCR_WITH_ROOM = (
+        "local id = redis.call('INCR', KEYS[1]) "
+        "redis.call('SET', KEYS[1] .. ':room:' .. id, ARGV[1], 'EX', ARGV[2]) "
+        "return id"
+    )
+
+    def __init__(self, client, key: str, load_floor: Callable[[], int], room_ttl: int = 3600):
+        self.client = client
+        self.key = key
+        self.load_floor = load_floor
+        self.room_ttl = room_ttl
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def seed(self) -> None:
+        """카운터를 DB 최대 id 이상으로 맞춤 (앱 시작 시, Redis 카운터가 사라진 경우)"""
+        floor = self.load_floor()
+        self.client.eval(self.RAISE_TO_FLOOR, 1, self.key, floor)
+        with self._lock:
+            self.last_id = max(self.last_id, floor)
+
+    def _incr(self, room: Optional[str]) -> int:
+        if room is None:
+            return int(self.client.incr(self.key))
+        return int(self.client.eval(self.INCR_WITH_ROOM, 1, self.key, room, self.room_ttl))
+
+    def next_id(self, room: Optional[str] = None) -> int:
+        """다음 메시지 id (room을 주면 room_of로 찾을 수 있도록 함께 기록)"""
+        value = self._incr(room)
+        if value <= self.last_id:
+            # Redis 재시작 등으로 카운터가 초기화된 경우 저장된 id 이후로 다시 맞춤
+            self.seed()
+            value = self._incr(room)
+        with self._lock:
+            self.last_id = max(self.last_id, value)
+        return value
+
+    def room_of(self, message_id: int) -> Optional[str]:
+        """next_id에 기록한 메시지의 방 (기록이 없거나 만료되면 None)"""
+        room = self.client.get(f"{self.key}:room:{int(message_id)}")
+        return room.decode() if isinstance(room, bytes) else room
+
+    def current(self) -> int:
+        """모든 워커를 통틀어 마지막으로 할당된 id"""
+        return int(self.client.get(self.key) or 0)
+
+
+class ChatMessageWriter:
+    """메시지 저장 요청을 모아 백그라운드에서 배치 커밋
+
+    persist(records): 레코드 목록을 한 트랜잭션으로 저장 (실패 시 예외)
+    max_batch: 한 배치 최대 메시지 수
+    max_delay: 첫 메시지가 들어온 뒤 배치를 모으는 최대 시간(초)
+    sync: True면 submit이 호출 스레드에서 바로 저장 (테스트/내구성 우선 모드)
+    max_retries: 저장 실패 시 배치를 대기열 앞에 다시 넣어 재시도하는 최대 연속 횟수
+    retry_delay: 재시도 전 대기 시간(초, 연속 실패 횟수만큼 늘어남)
+    """
+
+    def __init__(self, persist: Callable[[List[dict]], None], max_batch: int = 100,
+                 max_delay: float = 0.05, sync: bool = False, max_retries: int = 3, retry_delay: float = 0.5):
+        self.persist = persist
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.sync = sync
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.dropped = 0
+        self._failures = 0
+        self._retry_at: Optional[float] = None
+        self._pending: List[dict] = []
+        self._first_pending_at: Optional[float] = None
+        self._in_flight: List[List[dict]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, record: dict) -> None:
+        if self.sync:
+            self.persist([record])
+            return
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("종료된 메시지 작성기입니다.")
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append(record)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='chat-message-writer', daemon=True)
+                self._thread.start()
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def pending_records(self) -> List[dict]:
+        """아직 커밋되지 않은 메시지 (저장 중인 배치 포함)"""
+        with self._cond:
+            return [record for batch in self._in_flight for record in batch] + self._pending
+
+    def _take_batch(self) -> List[dict]:
+        batch = self._pending[:self.max_batch]
+        del self._pending[:self.max_batch]
+        self._first_pending_at = time.monotonic() if self._pending else None
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                # 저장 실패 후에는 retry_delay가 지날 때까지 기다림
+                while self._retry_at is not None and not self._closed:
+                    remaining = self._retry_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                # 배치가 차거나 첫 메시지 후 max_delay가 지날 때까지 모음
+                while self._pending and len(self._pending) < self.max_batch and not self._closed:
+                    remaining = self._first_pending_at + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+                if not batch:  # flush()가 먼저 가져간 경우
+                    continue
+                self._in_flight.append(batch)
+            self._persist_in_flight(batch)
+
+    def _persist_in_flight(self, batch: List[dict]) -> None:
+        try:
+            self._persist_batch(batch)
+        finally:
+            with self._cond:
+                self._in_flight = [pending for pending in self._in_flight if pending is not batch]
+                self._cond.notify_all()
+
+    def _persist_batch(self, batch: List[dict]) -> None:
+        """배치 저장 (실패하면 대기열 앞에 다시 넣어 재시도, 재시도 횟수를 넘으면 문제 메시지만 제외하도록 한 건씩 저장)"""
+        try:
+            self.persist(batch)
+            with self._cond:
+                self._failures = 0
+                self._retry_at = None
+            return
+        except Exception:
+            with self._cond:
+                self._failures += 1
+                failures = self._failures
+                if failures <= self.max_retries:
+                    # 그 사이 들어온 메시지보다 앞에 두어 id 순서대로 저장
+                    self._pending[:0] = batch
+                    self._first_pending_at = time.monotonic()
+                    self._retry_at = time.monotonic() + self.retry_delay * failures
+                    self._cond.notify_all()
+            if failures <= self.max_retries:
+                logger.exception(f"채팅 메시지 배치 저장 실패 ({len(batch)}건) - 다시 시도 ({failures}/{self.max_retries})")
+                return
+            logger.exception(f"채팅 메시지 배치 저장 실패 ({len(batch)}건) - 재시도 횟수 초과, 한 건씩 저장")
+
+        with self._cond:
+            self._failures = 0
+            self._retry_at = None
+        for record in batch:
+            try:
+                self.persist([record])
+            except Exception:
+                self.dropped += 1
+                logger.error(f"채팅 메시지 저장 실패 - 이미 전송된 메시지를 버림 (누적 {self.dropped}건): {record}",
+                             exc_info=True)
+
+    def flush(self) -> None:
+        """대기 중인 메시지를 호출 스레드에서 모두 저장 (진행 중인 배치가 끝날 때까지 대기)"""
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+                if not batch:
+                    while self._in_flight:
+                        self._cond.wait()
+                    return
+                self._in_flight.append(batch)
+            self._persist_in_flight(batch)
+
+    def close(self) -> None:
+        """새 메시지를 받지 않고 남은 메시지 저장"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.flush()
@@ -0,0 +1,86 @@
+"""
+읽음 처리 묶음 전송
+"message_id까지 읽음" 요청을 (방, 사용자)별 최대값으로 모아 두었다가
+일정 간격마다 방별로 한 번만 반영/전송
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# {방 키: {사용자 id: 마지막으로 읽은 메시지 id}}
+ReadBatch = Dict[Hashable, Dict[str, int]]
+
+
+class ReadReceiptAggregator:
+    """읽음 위치 요청 디바운스
+
+    apply(batch): 모인 읽음 위치를 저장하고 방별로 알림 (백그라운드 스레드에서 호출)
+    interval: 반영 간격(초), 0 이하면 요청마다 바로 반영
+    max_retries: 반영 실패 시 배치를 다시 모아 재시도하는 최대 연속 횟수
+    """
+
+    def __init__(self, apply: Callable[[ReadBatch], None], interval: float = 0.3, max_retries: int = 3):
+        self.apply = apply
+        self.interval = interval
+        self.max_retries = max_retries
+        self._failures = 0
+        self._pending: ReadBatch = {}
+        self._lock = threading.Lock()
+        self._apply_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _merge(self, room_key: Hashable, user_id: str, message_id: int) -> None:
+        readers = self._pending.setdefault(room_key, {})
+        if message_id > readers.get(user_id, 0):
+            readers[user_id] = message_id
+
+    def record(self, room_key: Hashable, user_id: str, message_id: int) -> None:
+        """room_key 방에서 user_id가 message_id까지 읽음 (더 앞선 요청은 무시)"""
+        with self._lock:
+            self._merge(room_key, user_id, message_id)
+            if self.interval > 0 and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='read-receipt-aggregator', daemon=True)
+                self._thread.start()
+        if self.interval <= 0:
+            self.flush()
+        else:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # 첫 요청 이후 interval 동안 같은 방/사용자 요청을 모음
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self) -> None:
+        """모인 읽음 위치를 바로 반영"""
+        with self._apply_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self.apply(batch)
+                self._failures = 0
+                return
+            except Exception:
+                self._failures += 1
+                if self._failures > self.max_retries:
+                    logger.exception(f"읽음 처리 반영 실패 ({len(batch)}개 방) - 재시도 횟수 초과로 버림")
+                    self._failures = 0
+                    return
+                logger.exception(f"읽음 처리 반영 실패 ({len(batch)}개 방) - 다음 반영 때 다시 시도")
+            # 실패한 배치를 그 사이 들어온 요청과 합쳐 다시 대기
+            with self._lock:
+                for room_key, readers in batch.items():
+                    for user_id, message_id in readers.items():
+                        self._merge(room_key, user_id, message_id)
+        if self.interval > 0:
+            self._wakeup.set()
@@ -0,0 +1,160 @@
+"""
+추천 그룹 계산 엔진
+사용자 특성을 정수 배열로 인코딩하고 NumPy 브로드캐스팅으로 점수 행렬을 계산
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# 추천 계산에 필요한 사용자 필드만 담은 스냅샷 (세션과 분리되어 재사용 가능)
+UserSnapshot = namedtuple('UserSnapshot', ['employee_id', 'nickname', 'main_dish_genre', 'age_group', 'gender'])
+
+
+def snapshot_users(users: Sequence) -> List[UserSnapshot]:
+    """User 모델 목록을 스냅샷 목록으로 변환"""
+    return [UserSnapshot(user.employee_id, user.nickname, user.main_dish_genre, user.age_group, user.gender)
+            for user in users]
+
+
+def encode_feature(values: Sequence[Optional[str]]) -> np.ndarray:
+    """문자열 특성을 정수 코드 배열로 변환 (값이 없으면 0, 나머지는 1부터)"""
+    codes: Dict[str, int] = {}
+    encoded = np.zeros(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if not value:
+            continue
+        encoded[i] = codes.setdefault(value, len(codes) + 1)
+    return encoded
+
+
+class CompatibilityMatrix:
+    """사용자 간 호환성 점수 행렬 관리 클래스"""
+
+    # 메인 요리 장르 일치, 나이대 일치, 성별 다양성 가중치
+    GENRE_MATCH_SCORE = 30
+    AGE_GROUP_MATCH_SCORE = 20
+    GENDER_DIVERSITY_SCORE = 15
+
+    def __init__(self, employee_ids: List[str], genre_codes: np.ndarray,
+                 age_group_codes: np.ndarray, gender_codes: np.ndarray):
+        self.employee_ids = employee_ids
+        self.index = {employee_id: i for i, employee_id in enumerate(employee_ids)}
+        self.scores = self._build_scores(genre_codes, age_group_codes, gender_codes)
+
+    @classmethod
+    def from_users(cls, users: Sequence) -> 'CompatibilityMatrix':
+        """User 목록으로부터 호환성 행렬 생성"""
+        return cls(
+            [user.employee_id for user in users],
+            encode_feature([user.main_dish_genre for user in users]),
+            encode_feature([user.age_group for user in users]),
+            encode_feature([user.gender for user in users]),
+        )
+
+    @classmethod
+    def _build_scores(cls, genre: np.ndarray, age_group: np.ndarray, gender: np.ndarray) -> np.ndarray:
+        """브로드캐스팅으로 전체 N x N 점수 행렬 계산 (0-65점, uint8)"""
+        def same(codes):
+            return (codes[:, None] == codes[None, :]) & (codes[:, None] > 0)
+
+        gender_present = gender > 0
+        different_gender = ((gender[:, None] != gender[None, :])
+                            & gender_present[:, None] & gender_present[None, :])
+
+        scores = (same(genre) * cls.GENRE_MATCH_SCORE
+                  + same(age_group) * cls.AGE_GROUP_MATCH_SCORE
+                  + different_gender * cls.GENDER_DIVERSITY_SCORE).astype(np.uint8)
+        np.fill_diagonal(scores, 0)
+        return scores
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+    def indices_of(self, employee_ids: Iterable[str]) -> np.ndarray:
+        """사원 ID 집합을 행 인덱스 배열로 변환 (원래 사용자 순서 유지)"""
+        indices = [self.index[employee_id] for employee_id in employee_ids if employee_id in self.index]
+        return np.array(sorted(indices), dtype=np.int64)
+
+
+class ActivityCounter:
+    """사용자별 파티 참여 횟수 벡터 관리 클래스"""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.loaded = False
+
+    def load(self, rows: Iterable) -> None:
+        """(employee_id, count) 집계 결과로 전체 카운트 교체"""
+        self.counts = {employee_id: int(count) for employee_id, count in rows}
+        self.loaded = True
+
+    def increment(self, employee_id: str, delta: int = 1) -> None:
+        """PartyMember 추가/삭제 시 해당 사용자의 카운트만 갱신"""
+        count = self.counts.get(employee_id, 0) + delta
+        if count > 0:
+            self.counts[employee_id] = count
+        else:
+            self.counts.pop(employee_id, None)
+
+    def vector(self, employee_ids: Sequence[str]) -> np.ndarray:
+        """주어진 사용자 순서대로 참여 횟수 배열 반환"""
+        return np.array([self.counts.get(employee_id, 0) for employee_id in employee_ids], dtype=np.int64)
+
+
+def pattern_scores(activity: np.ndarray, user_index: int, candidate_indices: np.ndarray) -> np.ndarray:
+    """활동 수준 차이 기반 패턴 점수 (차이 2 이하 20점, 5 이하 10점)"""
+    activity_diff = np.abs(activity[candidate_indices] - activity[user_index])
+    return np.where(activity_diff <= 2, 20, np.where(activity_diff <= 5, 10, 0))
+
+
+class RecommendationEnrichment:
+    """추천 그룹 멤버 정보(선호도, 마지막 식사 날짜) 일괄 조회 결과"""
+
+    def __init__(self, preference_rows: Iterable, dining_rows: Iterable):
+        # 사용자별 첫 번째 선호도 값만 사용 (id 순으로 정렬된 행 기준)
+        self.preferences: Dict[str, str] = {}
+        for user_id, value in preference_rows:
+            self.preferences.setdefault(user_id, value)
+
+        # (호스트, 멤버, 파티 날짜) 행을 한 번 훑어 쌍별 가장 최근 날짜 계산
+        self.last_dining: Dict[tuple, str] = {}
+        for host_id, member_id, party_date in dining_rows:
+            if host_id == member_id:
+                continue
+            key = self.pair_key(host_id, member_id)
+            if party_date > self.last_dining.get(key, ''):
+                self.last_dining[key] = party_date
+
+    @staticmethod
+    def pair_key(user1_id: str, user2_id: str) -> tuple:
+        """순서와 무관한 사용자 쌍 키"""
+        return (user1_id, user2_id) if user1_id <= user2_id else (user2_id, user1_id)
+
+    def preference(self, user_id: str) -> str:
+        return self.preferences.get(user_id, '')
+
+    def last_dining_date(self, user1_id: str, user2_id: str) -> Optional[str]:
+        return self.last_dining.get(self.pair_key(user1_id, user2_id))
+
+
+class RecommendationContext:
+    """증분 캐시 갱신에 재사용하는 추천 계산 상태"""
+
+    def __init__(self, users: List[UserSnapshot], matrix: CompatibilityMatrix,
+                 enrichment: RecommendationEnrichment, start_date: date, days: int = 30):
+        self.users = users
+        self.matrix = matrix
+        self.enrichment = enrichment
+        self.start_date = start_date
+        self.end_date = start_date + timedelta(days=days)
+
+    def covers(self, date_str: str) -> bool:
+        """캐시 대상 기간(주말 제외)에 포함된 날짜인지 확인"""
+        try:
+            target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return False
+        return self.start_date <= target_date < self.end_date and target_date.weekday() < 5
@@ -0,0 +1,73 @@
+"""
+반복 일정 전개 엔진
+요청한 [start, end) 구간에 해당하는 반복 일정 날짜만 지연 생성
+"""
+
+import calendar
+from datetime import date, timedelta
+from typing import Container, Iterator, Optional
+
+
+def add_months(base_date: date, months: int) -> date:
+    """월 단위 이동 (해당 월에 같은 일이 없으면 말일로 보정)"""
+    month_index = base_date.month - 1 + months
+    year = base_date.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(base_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def occurrence_date(start_date: date, recurrence_type: str, index: int, interval: int = 1) -> Optional[date]:
+    """시작일로부터 index번째 반복 날짜 (지원하지 않는 반복 유형이면 None)"""
+    step = index * interval
+    if recurrence_type == 'weekly':
+        return start_date + timedelta(weeks=step)
+    elif recurrence_type == 'monthly':
+        return add_months(start_date, step)
+    elif recurrence_type == 'yearly':
+        return add_months(start_date, step * 12)
+    return None
+
+
+def first_index_on_or_after(start_date: date, recurrence_type: str, interval: int, window_start: date) -> int:
+    """window_start 이후 첫 반복의 index (앞선 반복들을 건너뛰기 위한 추정값)"""
+    if window_start <= start_date:
+        return 0
+    if recurrence_type == 'weekly':
+        return max(0, (window_start - start_date).days // (7 * interval))
+    elif recurrence_type == 'monthly':
+        months = (window_start.year - start_date.year) * 12 + window_start.month - start_date.month
+        return max(0, months // interval - 1)
+    elif recurrence_type == 'yearly':
+        return max(0, (window_start.year - start_date.year) // interval - 1)
+    return 0
+
+
+def iter_occurrences(start_date: date, recurrence_type: Optional[str], window_start: date, window_end: date,
+                     interval: Optional[int] = 1, end_date: Optional[date] = None,
+                     excluded_dates: Container[date] = ()) -> Iterator[date]:
+    """[window_start, window_end) 구간의 반복 날짜를 순서대로 생성
+
+    interval: 반복 간격 (2면 격주/격월/격년)
+    end_date: 반복 종료일 (포함)
+    excluded_dates: 개별 수정/삭제로 대체된 날짜
+    """
+    interval = max(int(interval or 1), 1)
+    last_date = window_end - timedelta(days=1)
+    if end_date is not None and end_date < last_date:
+        last_date = end_date
+
+    # 지원하지 않는 반복 유형은 시작일만 표시
+    if occurrence_date(start_date, recurrence_type, 1, interval) is None:
+        if window_start <= start_date <= last_date and start_date not in excluded_dates:
+            yield start_date
+        return
+
+    index = first_index_on_or_after(start_date, recurrence_type, interval, window_start)
+    while True:
+        current = occurrence_date(start_date, recurrence_type, index, interval)
+        if current > last_date:
+            return
+        if current >= window_start and current not in excluded_dates:
+            yield current
+        index += 1
@@ -0,0 +1,148 @@
+"""
+개인화 식당 추천 점수 엔진
+식당 특성(카테고리, 평점 집계, 위치)을 열 단위 NumPy 배열로 보관하고
+사용자 취향 벡터와의 내적 + argpartition으로 상위 k개를 계산
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.recommendation_engine import encode_feature
+from utils.spatial_index import haversine_m
+
+
+class RestaurantFeatures:
+    """식당 특성 열 배열 (식당 변경 시 또는 TTL 경과 후 다시 로드)"""
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self.loaded_at: Optional[float] = None
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.position: Dict[int, int] = {}
+        self.names: List[str] = []
+        self.categories: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl_seconds
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    def load(self, rows: Iterable) -> None:
+        """(id, name, category, latitude, longitude, avg_rating, review_count) 행으로 전체 교체"""
+        rows = list(rows)
+        with self._lock:
+            self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+            self.position = {int(restaurant_id): i for i, restaurant_id in enumerate(self.ids)}
+            self.names = [row[1] for row in rows]
+            self.categories = [row[2] for row in rows]
+
+            # 카테고리/이름 정수 코드 (0은 값 없음) 및 카테고리 원-핫 행렬
+            self.category_codes = encode_feature(self.categories)
+            self.category_labels = [''] + list(dict.fromkeys(c for c in self.categories if c))
+            self.category_onehot = np.zeros((len(rows), len(self.category_labels)), dtype=np.float32)
+            self.category_onehot[np.arange(len(rows)), self.category_codes] = 1.0
+            self.name_codes = encode_feature(self.names)
+
+            self.latitudes = np.array([np.nan if row[3] is None else row[3] for row in rows], dtype=np.float64)
+            self.longitudes = np.array([np.nan if row[4] is None else row[4] for row in rows], dtype=np.float64)
+            self.avg_ratings = np.array([row[5] or 0.0 for row in rows], dtype=np.float64)
+            self.review_counts = np.array([row[6] or 0 for row in rows], dtype=np.int64)
+            self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class TasteProfile:
+    """사용자 취향: 카테고리별 평점 합/리뷰 수와 식당별 방문 수"""
+
+    def __init__(self, features: RestaurantFeatures, rows: Iterable):
+        """rows: (kind, restaurant_id, rating_sum, count) - kind는 'review' 또는 'visit'"""
+        category_count = len(features.category_labels)
+        self.rating_sums = np.zeros(category_count, dtype=np.float64)
+        self.review_counts = np.zeros(category_count, dtype=np.int64)
+        self.visit_counts = np.zeros(len(features), dtype=np.int64)
+
+        for kind, restaurant_id, rating_sum, count in rows:
+            i = features.position.get(restaurant_id)
+            if i is None:
+                continue
+            if kind == 'review':
+                code = features.category_codes[i]
+                self.rating_sums[code] += rating_sum or 0
+                self.review_counts[code] += count
+            else:
+                self.visit_counts[i] += count
+
+        # 카테고리 취향 벡터 = 해당 카테고리에 준 평균 평점 (리뷰가 없으면 0)
+        self.category_vector = np.divide(self.rating_sums, self.review_counts,
+                                         out=np.zeros(category_count), where=self.review_counts > 0)
+
+    def category_preferences(self, features: RestaurantFeatures) -> Dict[str, dict]:
+        """응답용 카테고리 선호도 딕셔너리"""
+        return {
+            features.category_labels[code]: {
+                'total_rating': int(self.rating_sums[code]),
+                'count': int(self.review_counts[code]),
+                'avg_rating': float(self.category_vector[code])
+            }
+            for code in np.flatnonzero(self.review_counts)
+        }
+
+
+class RecommendationScores:
+    """식당별 점수 구성 요소 (0-5 카테고리, 0-3 방문, 0-2 평점, 0-1 거리)"""
+
+    VISIT_WEIGHT = 0.5
+    MAX_VISIT_SCORE = 3
+    MAX_RATING_SCORE = 2
+    DEFAULT_DISTANCE_SCORE = 0.5
+    DISTANCE_SCALE_M = 3000
+    HIGH_RATING = 4
+
+    def __init__(self, features: RestaurantFeatures, taste: TasteProfile,
+                 location: Optional[Tuple[float, float]] = None):
+        self.features = features
+        self.category_scores = features.category_onehot @ taste.category_vector.astype(np.float32)
+
+        # 방문 수는 같은 이름의 식당(지점)끼리 합산
+        visits_by_name = np.bincount(features.name_codes, weights=taste.visit_counts,
+                                     minlength=int(features.name_codes.max(initial=0)) + 1)
+        self.visit_by_name = visits_by_name[features.name_codes]
+        self.visit_by_name[features.name_codes == 0] = 0
+        self.visit_scores = np.minimum(self.visit_by_name * self.VISIT_WEIGHT, self.MAX_VISIT_SCORE)
+
+        self.rating_scores = np.minimum(features.avg_ratings / 5 * 2, self.MAX_RATING_SCORE)
+
+        self.distance_scores = np.full(len(features), self.DEFAULT_DISTANCE_SCORE)
+        if location is not None:
+            has_location = ~np.isnan(features.latitudes)
+            distances = haversine_m(location[0], location[1],
+                                    features.latitudes[has_location], features.longitudes[has_location])
+            self.distance_scores[has_location] = np.clip(1 - distances / self.DISTANCE_SCALE_M, 0, 1)
+
+        self.total = self.category_scores + self.visit_scores + self.rating_scores + self.distance_scores
+
+    def top_k(self, k: int) -> np.ndarray:
+        """점수 상위 k개 위치 (점수 내림차순, 동점은 식당 순서)"""
+        candidates = np.flatnonzero(self.total > 0)
+        if k < len(candidates):
+            candidates = candidates[np.argpartition(-self.total[candidates], k - 1)[:k]]
+        return candidates[np.lexsort((candidates, -self.total[candidates]))]
+
+    def reasons(self, i: int) -> List[str]:
+        """추천 이유"""
+        reasons = []
+        if self.category_scores[i] > 0:
+            reasons.append(f"선호하는 {self.features.categories[i]}")
+        if self.visit_by_name[i] > 0:
+            reasons.append("자주 방문하는 곳")
+        if self.features.review_counts[i] > 0 and self.features.avg_ratings[i] >= self.HIGH_RATING:
+            reasons.append("높은 평점")
+        return reasons
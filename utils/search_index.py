@@ -0,0 +1,202 @@
+"""
+식당 검색 인덱스
+이름/카테고리의 문자 2-gram 역색인과 한글 초성 문자열로 부분 일치·초성 검색을 처리하고
+완전 일치 > 접두 일치 > 단어 접두 일치 > 부분 일치 > 카테고리 일치 순으로 정렬
+"""
+
+import heapq
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+JUNGSUNG_JONGSUNG_COUNT = 21 * 28
+CHOSUNG = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ',
+           'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+CHOSUNG_SET = set(CHOSUNG)
+
+# 정렬 순위 (작을수록 먼저)
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_CONTAINS = 3
+RANK_CHOSUNG = 4
+RANK_CATEGORY = 5
+
+
+def normalize(text: Optional[str]) -> str:
+    """소문자 변환 및 공백 제거"""
+    return ''.join((text or '').lower().split())
+
+
+def to_chosung(text: str) -> str:
+    """한글 음절은 초성으로, 나머지 문자는 그대로 변환"""
+    result = []
+    for ch in text:
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            result.append(CHOSUNG[(code - HANGUL_BASE) // JUNGSUNG_JONGSUNG_COUNT])
+        else:
+            result.append(ch)
+    return ''.join(result)
+
+
+def is_chosung_query(text: str) -> bool:
+    return bool(text) and all(ch in CHOSUNG_SET for ch in text)
+
+
+def ngrams(text: str, n: int = 2) -> Set[str]:
+    """문자 n-gram 집합 (n보다 짧으면 문자열 자체)"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def index_terms(text: str) -> Set[str]:
+    """역색인 키: 2-gram과 한 글자 검색용 단일 문자"""
+    return ngrams(text) | set(text)
+
+
+class RestaurantSearchIndex:
+    """식당 이름/카테고리 인메모리 검색 인덱스 (TTL이 지나면 다시 로드)"""
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self.documents: Dict[int, Tuple[str, str, str, Tuple[str, ...]]] = {}
+        self.name_postings: Dict[str, Set[int]] = defaultdict(set)
+        self.chosung_postings: Dict[str, Set[int]] = defaultdict(set)
+        self.category_postings: Dict[str, Set[int]] = defaultdict(set)
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl_seconds
+
+    def load(self, rows: Iterable) -> None:
+        """(id, name, category) 행으로 인덱스 전체 교체"""
+        with self._lock:
+            self.documents.clear()
+            self.name_postings.clear()
+            self.chosung_postings.clear()
+            self.category_postings.clear()
+            for restaurant_id, name, category in rows:
+                self._add(restaurant_id, name, category)
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, restaurant_id: int, name: str, category: str) -> None:
+        """식당 추가/수정 반영"""
+        with self._lock:
+            self._remove(restaurant_id)
+            self._add(restaurant_id, name, category)
+
+    def remove(self, restaurant_id: int) -> None:
+        with self._lock:
+            self._remove(restaurant_id)
+
+    def _add(self, restaurant_id: int, name: str, category: str) -> None:
+        name_norm = normalize(name)
+        category_norm = normalize(category)
+        chosung = to_chosung(name_norm)
+        words = tuple(normalize(word) for word in (name or '').lower().split())
+        self.documents[restaurant_id] = (name_norm, category_norm, chosung, words)
+        for term in index_terms(name_norm):
+            self.name_postings[term].add(restaurant_id)
+        for term in index_terms(chosung):
+            self.chosung_postings[term].add(restaurant_id)
+        for term in index_terms(category_norm):
+            self.category_postings[term].add(restaurant_id)
+
+    def _remove(self, restaurant_id: int) -> None:
+        document = self.documents.pop(restaurant_id, None)
+        if document is None:
+            return
+        name_norm, category_norm, chosung, _ = document
+        for postings, text in ((self.name_postings, name_norm), (self.chosung_postings, chosung),
+                               (self.category_postings, category_norm)):
+            for term in index_terms(text):
+                ids = postings.get(term)
+                if ids is not None:
+                    ids.discard(restaurant_id)
+                    if not ids:
+                        del postings[term]
+
+    @staticmethod
+    def _candidates(postings: Dict[str, Set[int]], text: str) -> Set[int]:
+        """n-gram 역색인 교집합으로 후보 축소 (실제 일치 여부는 _rank에서 확인)"""
+        grams = sorted(ngrams(text), key=lambda gram: len(postings.get(gram, ())))
+        result = None
+        for gram in grams:
+            ids = postings.get(gram)
+            if not ids:
+                return set()
+            result = set(ids) if result is None else result & ids
+        return result or set()
+
+    def _rank(self, restaurant_id: int, query: str, chosung_query: str, trailing_chosung: str) -> Optional[int]:
+        """검색어에 대한 문서 순위 (일치하지 않으면 None)"""
+        name_norm, category_norm, chosung, words = self.documents[restaurant_id]
+        if query:
+            if name_norm == query:
+                return RANK_EXACT
+            if name_norm.startswith(query):
+                return RANK_PREFIX
+            if any(word.startswith(query) for word in words):
+                return RANK_WORD_PREFIX
+            if query in name_norm:
+                return RANK_CONTAINS
+        if chosung_query and chosung_query in chosung:
+            # 마지막 글자가 아직 초성만 입력된 경우: 앞부분 완성 글자 + 다음 글자 초성 일치
+            if trailing_chosung:
+                position = name_norm.find(query[:-1]) if len(query) > 1 else 0
+                while position != -1:
+                    next_index = position + len(query) - 1
+                    if next_index < len(chosung) and chosung[next_index] == trailing_chosung:
+                        return RANK_PREFIX if position == 0 else RANK_CONTAINS
+                    position = name_norm.find(query[:-1], position + 1) if len(query) > 1 else -1
+                return None
+            return RANK_PREFIX if chosung.startswith(chosung_query) else RANK_CHOSUNG
+        if query and query in category_norm:
+            return RANK_CATEGORY
+        return None
+
+    def filter_category(self, restaurant_ids: Iterable[int], category: str) -> List[int]:
+        """카테고리가 일치하는 id만 순서대로 남김"""
+        category = normalize(category)
+        with self._lock:
+            return [restaurant_id for restaurant_id in restaurant_ids
+                    if restaurant_id in self.documents and self.documents[restaurant_id][1] == category]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """검색어와 일치하는 식당 id 목록 (순위, 이름 길이, id 순)"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        with self._lock:
+            trailing_chosung = ''
+            if is_chosung_query(query):
+                # 초성만 입력: 초성 문자열 부분 일치
+                chosung_query = query
+                candidates = self._candidates(self.chosung_postings, query)
+                query = ''
+            elif query[-1] in CHOSUNG_SET:
+                # 입력 중인 마지막 글자 (예: '김치찌ㄱ')
+                chosung_query = to_chosung(query)
+                trailing_chosung = query[-1]
+                candidates = self._candidates(self.chosung_postings, chosung_query)
+            else:
+                chosung_query = ''
+                candidates = (self._candidates(self.name_postings, query)
+                              | self._candidates(self.category_postings, query))
+
+            ranked = []
+            for restaurant_id in candidates:
+                rank = self._rank(restaurant_id, query, chosung_query, trailing_chosung)
+                if rank is not None:
+                    ranked.append((rank, len(self.documents[restaurant_id][0]), restaurant_id))
+
+        ranked = heapq.nsmallest(limit, ranked) if limit is not None else sorted(ranked)
+        return [restaurant_id for _, _, restaurant_id in ranked]
@@ -0,0 +1,98 @@
+"""
+식당 위치 공간 인덱스
+위도 순으로 정렬한 NumPy 좌표 배열에서 위도 구간을 이진 탐색으로 좁힌 뒤
+하버사인 거리로 반경/최근접 검색
+"""
+
+import math
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_LAT_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """한 지점에서 좌표 배열까지의 하버사인 거리(m)"""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons - lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def radius_bounds(lat: float, lon: float, radius_m: float) -> Tuple[float, float, float, float, float]:
+    """반경 원을 감싸는 (최소 위도, 최대 위도, 최소 경도, 최대 경도, 경도 1도의 거리 m) - SQL 범위 조건용"""
+    dlat = radius_m / METERS_PER_LAT_DEGREE
+    meters_per_lon_degree = METERS_PER_LAT_DEGREE * max(math.cos(math.radians(lat)), 1e-6)
+    dlon = radius_m / meters_per_lon_degree
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon, meters_per_lon_degree
+
+
+class SpatialIndex:
+    """(id, 위도, 경도) 좌표 인덱스 (무효화되거나 TTL이 지나면 다시 로드)"""
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._arrays: Tuple[np.ndarray, np.ndarray, np.ndarray] = (
+            np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0))
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl_seconds
+
+    def __len__(self) -> int:
+        return len(self._arrays[0])
+
+    def load(self, rows: Iterable) -> None:
+        """(id, latitude, longitude) 행으로 인덱스 전체 교체 (좌표가 없는 행은 제외)"""
+        points = [(item_id, lat, lon) for item_id, lat, lon in rows if lat is not None and lon is not None]
+        ids = np.array([p[0] for p in points], dtype=np.int64)
+        lats = np.array([p[1] for p in points], dtype=np.float64)
+        lons = np.array([p[2] for p in points], dtype=np.float64)
+        order = np.argsort(lats, kind='stable')
+        with self._lock:
+            self._arrays = (ids[order], lats[order], lons[order])
+            self.loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        """다음 조회 시 다시 로드하도록 표시 (다시 로드되기 전까지는 기존 배열로 응답)"""
+        self.loaded_at = None
+
+    def _band(self, lat: float, radius_m: float):
+        """위도 차이만으로 반경 밖임이 확실한 점을 제외한 후보 구간"""
+        ids, lats, lons = self._arrays
+        dlat = radius_m / METERS_PER_LAT_DEGREE
+        lo = np.searchsorted(lats, lat - dlat, side='left')
+        hi = np.searchsorted(lats, lat + dlat, side='right')
+        return ids[lo:hi], lats[lo:hi], lons[lo:hi]
+
+    def within_radius(self, lat: float, lon: float, radius_m: float,
+                      limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """반경 안의 (id, 거리 m) 목록 (가까운 순)"""
+        ids, lats, lons = self._band(lat, radius_m)
+        distances = haversine_m(lat, lon, lats, lons)
+        inside = np.flatnonzero(distances <= radius_m)
+        if limit is not None and len(inside) > limit:
+            inside = inside[np.argpartition(distances[inside], limit - 1)[:limit]]
+        inside = inside[np.lexsort((ids[inside], distances[inside]))]
+        return [(int(ids[i]), float(distances[i])) for i in inside]
+
+    def nearest(self, lat: float, lon: float, k: int,
+                max_radius_m: Optional[float] = None) -> List[Tuple[int, float]]:
+        """가장 가까운 k개의 (id, 거리 m) 목록"""
+        if max_radius_m is not None:
+            return self.within_radius(lat, lon, max_radius_m, limit=k)
+        ids, lats, lons = self._arrays
+        if k <= 0 or len(ids) == 0:
+            return []
+        distances = haversine_m(lat, lon, lats, lons)
+        candidates = np.argpartition(distances, min(k, len(ids)) - 1)[:k]
+        candidates = candidates[np.lexsort((ids[candidates], distances[candidates]))]
+        return [(int(ids[i]), float(distances[i])) for i in candidates]